@@ -0,0 +1,77 @@
+"""Helpers shared by the benchmark scripts."""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from mcp_memory.storage import MemoryStore
+
+
+def summarize(latencies: Sequence[float], items: int | None = None) -> dict[str, Any]:
+    """Percentiles in milliseconds and throughput for one operation.
+
+    ``items`` is the number of memories processed in total, for operations
+    that handle more than one per call (bulk loads).
+    """
+    if not latencies:
+        return {"count": 0}
+    ms = np.asarray(latencies) * 1000
+    total = float(np.sum(latencies))
+    summary: dict[str, Any] = {
+        "count": len(latencies),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(np.mean(ms)), 3),
+        "ops_per_sec": round(len(latencies) / total, 2) if total else None,
+    }
+    if items is not None:
+        summary["items_per_sec"] = round(items / total, 2) if total else None
+    return summary
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def load_corpus(
+    store: MemoryStore, items: list[dict[str, Any]], load_batch: int
+) -> tuple[list[str], dict[str, Any]]:
+    """Store ``items`` with ``store_many`` in batches of ``load_batch``.
+    Returns the new memory IDs and the load timings."""
+    ids: list[str] = []
+    latencies: list[float] = []
+    for start in range(0, len(items), load_batch):
+        batch = items[start : start + load_batch]
+        t0 = time.perf_counter()
+        results = store.store_many(batch)
+        latencies.append(time.perf_counter() - t0)
+        ids.extend(r.memory.id for r in results if r.memory is not None)
+    return ids, summarize(latencies, items=len(items))
+
+
+def int_list(value: str) -> list[int]:
+    try:
+        numbers = [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers: {value}")
+    if not numbers or any(n < 1 for n in numbers):
+        raise argparse.ArgumentTypeError(f"expected positive integers: {value}")
+    return numbers
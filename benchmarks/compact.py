@@ -0,0 +1,258 @@
+"""What compact (float16 / int8) vectors would save, and what they would cost.
+
+Chroma holds a float32 HNSW index for every collection it touches, so a
+quantized copy only saves memory if it replaces Chroma's vectors rather
+than sitting beside them. This measures the trade-off before committing to
+that change: it loads a synthetic corpus, exports the stored embeddings,
+and answers each query by scanning quantized vectors for ``k * overfetch``
+candidates and rescoring those at full precision. Results are compared
+with ``MemoryStore.recall`` on the same data.
+
+    python -m benchmarks.compact --sizes 1000,10000 --k 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import chromadb
+import numpy as np
+import numpy.typing as npt
+
+from benchmarks.common import git_commit, int_list, load_corpus, summarize
+from benchmarks.corpus import generate_corpus, generate_queries
+from mcp_memory.embeddings import HashEmbeddingFunction
+from mcp_memory.routing import normalize
+from mcp_memory.snapshot import SnapshotReader
+from mcp_memory.storage import MemoryStore
+
+MODES = ("float32", "float16", "int8")
+
+# Rows converted to float32 per matrix product while scanning.
+_SCAN_BLOCK = 1024
+
+
+def quantize(
+    vectors: npt.ArrayLike, mode: str
+) -> tuple[npt.NDArray[Any], npt.NDArray[np.float32] | None]:
+    """Unit-normalize ``vectors`` and store them as ``mode``. ``int8`` rows
+    come with a per-row scale (largest magnitude / 127) to map them back."""
+    unit = normalize(vectors)
+    if mode != "int8":
+        return unit.astype(mode), None
+    scales = np.abs(unit).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    return np.rint(unit / scales[:, None]).astype(np.int8), scales
+
+
+def bytes_per_vector(dim: int, mode: str) -> int:
+    return dim * np.dtype(mode).itemsize + (4 if mode == "int8" else 0)
+
+
+def scan(
+    rows: npt.NDArray[Any],
+    scales: npt.NDArray[np.float32] | None,
+    query: npt.NDArray[np.float32],
+    k: int,
+) -> npt.NDArray[np.intp]:
+    """Indices of the ``k`` rows most similar to the unit ``query``."""
+    scores = np.empty(len(rows), dtype=np.float32)
+    for start in range(0, len(rows), _SCAN_BLOCK):
+        block = rows[start : start + _SCAN_BLOCK].astype(np.float32)
+        scores[start : start + len(block)] = block @ query
+    if scales is not None:
+        scores *= scales
+    k = min(k, len(rows))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def recall_at_k(
+    expected: Sequence[Sequence[str]], found: Sequence[Sequence[str]]
+) -> float:
+    """Mean share of each expected result list that was found, over the
+    queries that expected anything."""
+    shares = [len(set(e) & set(f)) / len(e) for e, f in zip(expected, found) if e]
+    return sum(shares) / len(shares) if shares else 1.0
+
+
+def _read_snapshot(path: Path) -> tuple[list[str], npt.NDArray[np.float32]]:
+    reader = SnapshotReader(path)
+    ids: list[str] = []
+    parts: list[npt.NDArray[np.float32]] = []
+    for _, memories, embeddings in reader.batches(4096):
+        ids.extend(m.id for m in memories)
+        parts.append(np.asarray(embeddings, dtype=np.float32))
+    return ids, normalize(np.concatenate(parts))
+
+
+def run_scenario(
+    size: int,
+    n_projects: int,
+    modes: Sequence[str],
+    k: int,
+    n_queries: int,
+    overfetch: int,
+    seed: int,
+    load_batch: int,
+) -> dict[str, Any]:
+    items = generate_corpus(size, n_projects, seed=seed)
+    queries = generate_queries(n_queries, seed=seed)
+    embedder = HashEmbeddingFunction()
+    with tempfile.TemporaryDirectory(prefix="mcp-memory-bench-") as tmp:
+        # Result caching would hide the search being measured.
+        store = MemoryStore(
+            Path(tmp) / "data", embedding_function=embedder, result_cache_size=0
+        )
+        try:
+            load_corpus(store, items, load_batch)
+            expected: list[list[str]] = []
+            latencies: list[float] = []
+            for q in queries:
+                t0 = time.perf_counter()
+                results = store.recall(q, n_results=k)
+                latencies.append(time.perf_counter() - t0)
+                expected.append([r.memory.id for r in results])
+            store.export_snapshot(Path(tmp) / "snapshot")
+        finally:
+            store.close()
+        ids, full = _read_snapshot(Path(tmp) / "snapshot")
+
+    dim = full.shape[1]
+    query_vectors = normalize(embedder(queries))
+    report: dict[str, Any] = {
+        "size": size,
+        "projects": n_projects,
+        "dim": dim,
+        "k": k,
+        "recall": summarize(latencies),
+        "modes": {},
+    }
+    for mode in modes:
+        rows, scales = quantize(full, mode)
+        found: list[list[str]] = []
+        latencies = []
+        for query in query_vectors:
+            t0 = time.perf_counter()
+            candidates = scan(rows, scales, query, k * overfetch)
+            # Rescore the candidates against the full-precision vectors.
+            exact = full[candidates] @ query
+            best = candidates[np.argsort(-exact)[:k]]
+            latencies.append(time.perf_counter() - t0)
+            found.append([ids[i] for i in best])
+        per_vector = bytes_per_vector(dim, mode)
+        report["modes"][mode] = {
+            "bytes_per_vector": per_vector,
+            "bytes": per_vector * len(ids),
+            "saved_ratio": round(1 - per_vector / bytes_per_vector(dim, "float32"), 4),
+            "recall_at_k": round(recall_at_k(expected, found), 4),
+            "scan": summarize(latencies),
+        }
+    return report
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.compact",
+        description="Measure memory and recall@k of quantized vector search.",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int_list,
+        default=[1000],
+        help="Comma-separated corpus sizes (default: 1000).",
+    )
+    parser.add_argument(
+        "--projects",
+        type=int_list,
+        default=[1],
+        help="Comma-separated project counts (default: 1).",
+    )
+    parser.add_argument(
+        "--modes",
+        type=lambda v: [m for m in v.split(",") if m],
+        default=list(MODES),
+        help="Comma-separated vector modes (default: float32,float16,int8).",
+    )
+    parser.add_argument(
+        "--k", type=int, default=10, help="Results per query (default: 10)."
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=100,
+        help="Queries per scenario (default: 100).",
+    )
+    parser.add_argument(
+        "--overfetch",
+        type=int,
+        default=4,
+        help="Candidates rescored per result (default: 4).",
+    )
+    parser.add_argument(
+        "--load-batch",
+        type=int,
+        default=500,
+        help="Items per store_many call while loading (default: 500).",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", type=Path, help="Write JSON here instead of stdout."
+    )
+    args = parser.parse_args(argv)
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    runs: list[dict[str, Any]] = []
+    for size in args.sizes:
+        for n_projects in args.projects:
+            print(
+                f"benchmarking {size} memories in {n_projects} projects...",
+                file=sys.stderr,
+            )
+            runs.append(
+                run_scenario(
+                    size,
+                    n_projects,
+                    modes=args.modes,
+                    k=args.k,
+                    n_queries=args.queries,
+                    overfetch=args.overfetch,
+                    seed=args.seed,
+                    load_batch=args.load_batch,
+                )
+            )
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "chromadb": chromadb.__version__,
+            "embedding": HashEmbeddingFunction.name(),
+            "k": args.k,
+            "overfetch": args.overfetch,
+            "seed": args.seed,
+        },
+        "runs": runs,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
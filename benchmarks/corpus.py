@@ -0,0 +1,107 @@
+"""Seeded synthetic corpora for the benchmarks.
+
+The same seed, size and project count always produce the same items, so runs
+on different commits measure the same workload.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Any
+
+TOPICS: dict[str, list[str]] = {
+    "database": [
+        "postgres", "index", "migration", "schema", "query", "replica",
+        "transaction", "vacuum", "partition", "connection", "pool", "lock",
+    ],
+    "frontend": [
+        "react", "component", "render", "state", "hook", "css", "layout",
+        "bundle", "hydration", "router", "form", "accessibility",
+    ],
+    "infra": [
+        "kubernetes", "deploy", "cluster", "node", "terraform", "dns",
+        "certificate", "ingress", "autoscaling", "docker", "registry", "helm",
+    ],
+    "auth": [
+        "oauth", "token", "session", "password", "jwt", "refresh", "scope",
+        "login", "sso", "permission", "role", "audit",
+    ],
+    "testing": [
+        "pytest", "fixture", "mock", "coverage", "flaky", "snapshot",
+        "integration", "assertion", "benchmark", "ci", "regression", "seed",
+    ],
+    "api": [
+        "endpoint", "rest", "graphql", "pagination", "rate", "limit",
+        "versioning", "webhook", "payload", "timeout", "retry", "cache",
+    ],
+}  # fmt: skip
+
+FILLER = [
+    "we", "decided", "to", "use", "the", "for", "because", "after", "fixing",
+    "switched", "from", "keep", "avoid", "when", "with", "should", "always",
+    "never", "prefer", "over", "in", "production", "staging", "locally",
+]  # fmt: skip
+
+SOURCES = ["", "", "standup", "code review", "incident", "design doc"]
+
+
+def _tag_pool(n_tags: int) -> tuple[list[str], list[float]]:
+    """Tags with Zipf-like weights: a few are common, most are rare."""
+    tags = [f"tag{i:03d}" for i in range(n_tags)]
+    weights = [1.0 / (rank + 1) for rank in range(n_tags)]
+    return tags, weights
+
+
+def _sentence(rng: random.Random, topic: str) -> str:
+    words = rng.choices(TOPICS[topic], k=rng.randint(4, 8))
+    words += rng.choices(FILLER, k=rng.randint(4, 10))
+    rng.shuffle(words)
+    return " ".join(words)
+
+
+def project_names(n_projects: int) -> list[str]:
+    return [f"project-{i:03d}" for i in range(n_projects)]
+
+
+def generate_corpus(
+    size: int,
+    n_projects: int,
+    seed: int = 0,
+    n_tags: int = 50,
+) -> list[dict[str, Any]]:
+    """Build ``size`` memory items spread over ``n_projects`` projects.
+
+    Items are dicts accepted by ``MemoryStore.store_many``. Project sizes are
+    skewed (earlier projects get more memories), each item has zero to three
+    tags drawn from a Zipf-like pool, and importance is uniform over 1-5.
+    """
+    rng = random.Random(seed)
+    projects = project_names(n_projects)
+    project_weights = [1.0 / (i + 1) ** 0.5 for i in range(n_projects)]
+    tags, tag_weights = _tag_pool(n_tags)
+    topics = sorted(TOPICS)
+
+    items: list[dict[str, Any]] = []
+    for _ in range(size):
+        topic = rng.choice(topics)
+        item_tags = sorted(set(rng.choices(tags, tag_weights, k=rng.randint(0, 3))))
+        items.append(
+            {
+                "content": _sentence(rng, topic),
+                "project": rng.choices(projects, project_weights)[0],
+                "tags": [topic, *item_tags],
+                "source": rng.choice(SOURCES),
+                "importance": rng.randint(1, 5),
+            }
+        )
+    return items
+
+
+def generate_queries(count: int, seed: int = 0) -> list[str]:
+    """Short natural-language-ish queries over the corpus vocabulary."""
+    rng = random.Random(seed)
+    topics = sorted(TOPICS)
+    return [
+        " ".join(rng.choices(TOPICS[rng.choice(topics)], k=rng.randint(2, 4)))
+        for _ in range(count)
+    ]
@@ -0,0 +1,275 @@
+"""Latency and throughput benchmarks for MemoryStore and the MCP tools.
+
+Builds a synthetic corpus for every (size, projects) combination, loads it
+into a fresh data directory and times each operation. Embeddings come from
+:class:`~mcp_memory.embeddings.HashEmbeddingFunction`, so no model is needed
+and results are comparable across machines and commits. Prints one JSON
+document with p50/p95/p99 latency and ops/sec per operation.
+
+    python -m benchmarks.run --sizes 1000,10000 --projects 1,10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import chromadb
+
+from benchmarks.common import git_commit, int_list, load_corpus, summarize
+from benchmarks.corpus import generate_corpus, generate_queries, project_names
+from mcp_memory.config import Config
+from mcp_memory.embeddings import HashEmbeddingFunction
+from mcp_memory.storage import LAYOUTS, MemoryStore
+
+
+def _time(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+async def _time_async(fn: Callable[[], Awaitable[Any]]) -> float:
+    start = time.perf_counter()
+    await fn()
+    return time.perf_counter() - start
+
+
+def bench_store(
+    store: MemoryStore,
+    ids: list[str],
+    projects: list[str],
+    ops: int,
+    seed: int,
+) -> dict[str, dict[str, Any]]:
+    """Time the MemoryStore operations against an already loaded store."""
+    rng = random.Random(seed)
+    queries = generate_queries(ops, seed=seed)
+    tags = ["tag000", "tag001", "tag005", "database", "api"]
+    results: dict[str, dict[str, Any]] = {}
+
+    results["recall_global"] = summarize(
+        [_time(lambda: store.recall(q, n_results=10)) for q in queries]
+    )
+    results["recall_project"] = summarize(
+        [_time(lambda: store.recall(q, project=rng.choice(projects))) for q in queries]
+    )
+    results["recall_tag"] = summarize(
+        [_time(lambda: store.recall(q, tags=[rng.choice(tags)])) for q in queries]
+    )
+
+    results["list_first_page"] = summarize(
+        [_time(lambda: store.list_memories(page_size=20)) for _ in range(ops)]
+    )
+    results["list_project_page"] = summarize(
+        [
+            _time(lambda: store.list_memories(project=rng.choice(projects)))
+            for _ in range(ops)
+        ]
+    )
+
+    cursor_latencies: list[float] = []
+    cursor: str | None = None
+    for _ in range(ops):
+        t0 = time.perf_counter()
+        _, _, _, cursor = store.list_memories(page_size=20, cursor=cursor)
+        cursor_latencies.append(time.perf_counter() - t0)
+    results["list_cursor_walk"] = summarize(cursor_latencies)
+
+    results["get"] = summarize(
+        [_time(lambda: store.get(rng.choice(ids))) for _ in range(ops)]
+    )
+    results["stats"] = summarize([_time(lambda: store.stats()) for _ in range(ops)])
+
+    results["store"] = summarize(
+        [
+            _time(
+                lambda: store.store(
+                    content=f"benchmark insert {i} {q}",
+                    project=rng.choice(projects),
+                    tags=["bench"],
+                )
+            )
+            for i, q in enumerate(queries)
+        ]
+    )
+
+    victims = rng.sample(ids, min(ops, len(ids)))
+    results["forget_id"] = summarize(
+        [_time(lambda: store.forget(ids=[mid])) for mid in victims]
+    )
+    return results
+
+
+async def bench_tools(
+    store: MemoryStore,
+    config: Config,
+    projects: list[str],
+    ops: int,
+    seed: int,
+) -> dict[str, dict[str, Any]]:
+    """Time the MCP tool functions end to end, including output formatting."""
+    # Imported here: the server module builds its own store from the
+    # environment on import, which the benchmark then replaces.
+    from mcp_memory import server
+
+    rng = random.Random(seed)
+    queries = generate_queries(ops, seed=seed)
+    results: dict[str, dict[str, Any]] = {}
+
+    with patch.object(server, "store", store), patch.object(server, "config", config):
+        results["tool_remember"] = summarize(
+            [
+                await _time_async(
+                    lambda: server.remember(
+                        f"tool insert {i} {q}", project=rng.choice(projects)
+                    )
+                )
+                for i, q in enumerate(queries)
+            ]
+        )
+        results["tool_recall"] = summarize(
+            [await _time_async(lambda: server.recall(q)) for q in queries]
+        )
+        results["tool_list_memories"] = summarize(
+            [await _time_async(lambda: server.list_memories()) for _ in range(ops)]
+        )
+        results["tool_memory_stats"] = summarize(
+            [await _time_async(lambda: server.memory_stats()) for _ in range(ops)]
+        )
+    return results
+
+
+def run_scenario(
+    size: int,
+    n_projects: int,
+    layout: str,
+    ops: int,
+    seed: int,
+    load_batch: int,
+    tools: bool = True,
+) -> dict[str, Any]:
+    items = generate_corpus(size, n_projects, seed=seed)
+    projects = project_names(n_projects)
+    with tempfile.TemporaryDirectory(prefix="mcp-memory-bench-") as tmp:
+        data_dir = Path(tmp)
+        store = MemoryStore(
+            data_dir, embedding_function=HashEmbeddingFunction(), layout=layout
+        )
+        try:
+            ids, load = load_corpus(store, items, load_batch)
+            operations = {"store_many": load}
+            operations.update(bench_store(store, ids, projects, ops, seed))
+            if tools:
+                config = Config(
+                    data_dir=data_dir,
+                    default_project="global",
+                    max_results=10,
+                    layout=layout,
+                    warmup=False,
+                )
+                operations.update(
+                    asyncio.run(bench_tools(store, config, projects, ops, seed))
+                )
+        finally:
+            store.close()
+    return {
+        "size": size,
+        "projects": n_projects,
+        "layout": layout,
+        "operations": operations,
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Benchmark MemoryStore and the MCP tools on synthetic data.",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int_list,
+        default=[1000],
+        help="Comma-separated corpus sizes (default: 1000).",
+    )
+    parser.add_argument(
+        "--projects",
+        type=int_list,
+        default=[1, 10],
+        help="Comma-separated project counts (default: 1,10).",
+    )
+    parser.add_argument("--layout", choices=LAYOUTS, default=LAYOUTS[0])
+    parser.add_argument(
+        "--ops",
+        type=int,
+        default=100,
+        help="Timed calls per operation (default: 100).",
+    )
+    parser.add_argument(
+        "--load-batch",
+        type=int,
+        default=500,
+        help="Items per store_many call while loading (default: 500).",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-tools", action="store_true", help="Skip the MCP tool benchmarks."
+    )
+    parser.add_argument(
+        "--output", type=Path, help="Write JSON here instead of stdout."
+    )
+    args = parser.parse_args(argv)
+
+    runs: list[dict[str, Any]] = []
+    for size in args.sizes:
+        for n_projects in args.projects:
+            print(
+                f"benchmarking {size} memories in {n_projects} projects...",
+                file=sys.stderr,
+            )
+            runs.append(
+                run_scenario(
+                    size,
+                    n_projects,
+                    layout=args.layout,
+                    ops=args.ops,
+                    seed=args.seed,
+                    load_batch=args.load_batch,
+                    tools=not args.no_tools,
+                )
+            )
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "chromadb": chromadb.__version__,
+            "embedding": HashEmbeddingFunction.name(),
+            "layout": args.layout,
+            "ops": args.ops,
+            "seed": args.seed,
+        },
+        "runs": runs,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
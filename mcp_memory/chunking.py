@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import TextIO
+
+# all-MiniLM-L6-v2 reads at most 256 word pieces, roughly 1000 characters of
+# English prose; anything longer is silently cut off by the model.
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_OVERLAP = 200
+
+_SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+
+def _break_point(text: str, size: int) -> int:
+    """Where to end a chunk of at most ``size`` characters: after the last
+    paragraph, line, sentence or word break in its second half, if any."""
+    for sep in _SEPARATORS:
+        i = text.rfind(sep, size // 2, size)
+        if i != -1:
+            return i + len(sep)
+    return size
+
+
+def iter_chunks(
+    stream: TextIO,
+    size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> Iterator[str]:
+    """Split text read from ``stream`` into chunks of at most ``size``
+    characters, each repeating up to ``overlap`` characters of the one
+    before so that no passage is only ever seen cut in half. The overlap
+    never exceeds half the previous chunk, so each chunk moves on by at
+    least half its length.
+
+    The stream is read incrementally; at most about ``2 * size`` characters
+    are held at once. Chunks are stripped and blank ones skipped.
+    """
+    if size < 1:
+        raise ValueError(f"size must be >= 1, got {size}")
+    if not 0 <= overlap < size:
+        raise ValueError(f"overlap must be 0-{size - 1}, got {overlap}")
+
+    buffer = ""
+    eof = False
+    while True:
+        while not eof and len(buffer) <= size:
+            block = stream.read(size)
+            eof = not block
+            buffer += block
+        if eof and len(buffer) <= size:
+            if buffer.strip():
+                yield buffer.strip()
+            return
+
+        cut = _break_point(buffer, size)
+        chunk = buffer[:cut].strip()
+        if chunk:
+            yield chunk
+        if eof and not buffer[cut:].strip():
+            return
+        start = max(cut - overlap, cut // 2)
+        if overlap:
+            # Start the overlap on a word boundary rather than mid-word.
+            space = buffer.find(" ", start, cut)
+            if space != -1:
+                start = space + 1
+        buffer = buffer[max(start, 1) :]
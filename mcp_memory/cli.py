@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import argparse
+from collections.abc import Sequence
+from pathlib import Path
+
+from mcp_memory.compaction import DEFAULT_MIN_DELETED, describe
+from mcp_memory.config import Config
+from mcp_memory.daemon import run_proxy
+from mcp_memory.storage import DEFAULT_BATCH_SIZE, LAYOUT_PER_PROJECT, MemoryStore
+
+
+def _migrate(args: argparse.Namespace) -> None:
+    config = Config.from_env()
+    store = MemoryStore.from_config(config, layout=LAYOUT_PER_PROJECT)
+    try:
+        moved = store.migrate_to_unified(batch_size=args.batch_size)
+    finally:
+        store.close()
+    print(f"Migrated {moved} memories into the unified collection.")
+    if config.layout != "unified":
+        print("Set MCP_MEMORY_LAYOUT=unified to serve from the new layout.")
+
+
+def _export(args: argparse.Namespace) -> None:
+    config = Config.from_env()
+    store = MemoryStore.from_config(config)
+    try:
+        count = store.export_snapshot(args.path, batch_size=args.batch_size)
+    finally:
+        store.close()
+    print(f"Exported {count} memories to {args.path}.")
+
+
+def _import(args: argparse.Namespace) -> None:
+    config = Config.from_env()
+    store = MemoryStore.from_config(config)
+    try:
+        count = store.import_snapshot(args.path, batch_size=args.batch_size)
+    finally:
+        store.close()
+    print(f"Imported {count} memories from {args.path}.")
+
+
+def _compact(args: argparse.Namespace) -> None:
+    config = Config.from_env()
+    store = MemoryStore.from_config(config)
+    try:
+        result = store.compact(min_deleted=args.min_deleted, batch_size=args.batch_size)
+    finally:
+        store.close()
+    print(describe(result))
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="mcp-memory",
+        description="MCP server for persistent agent memory with semantic search.",
+    )
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("serve", help="Run the MCP server over stdio (default).")
+    sub.add_parser(
+        "daemon",
+        help="Run one shared server over HTTP on MCP_MEMORY_DAEMON_HOST/PORT.",
+    )
+    proxy = sub.add_parser(
+        "proxy",
+        help="Serve stdio by forwarding to the daemon, starting it if needed.",
+    )
+    proxy.add_argument(
+        "--no-spawn",
+        action="store_true",
+        help="Fail instead of starting the daemon when none is running.",
+    )
+
+    migrate = sub.add_parser(
+        "migrate",
+        help="Move per-project collections into the unified layout.",
+    )
+    migrate.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Memories copied per batch (default: {DEFAULT_BATCH_SIZE}).",
+    )
+
+    export = sub.add_parser(
+        "export",
+        help="Write all memories and their embeddings to a snapshot directory.",
+    )
+    export.add_argument("path", type=Path, help="New or empty directory.")
+    import_ = sub.add_parser(
+        "import",
+        help="Load a snapshot without re-embedding; resumes if interrupted.",
+    )
+    import_.add_argument("path", type=Path, help="Snapshot directory.")
+    compact = sub.add_parser(
+        "compact",
+        help="Reclaim disk space left behind by forgotten memories.",
+    )
+    compact.add_argument(
+        "--min-deleted",
+        type=float,
+        default=DEFAULT_MIN_DELETED,
+        help="Rebuild collections whose index is at least this share deleted "
+        f"(default: {DEFAULT_MIN_DELETED}).",
+    )
+    for command in (export, import_, compact):
+        command.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Memories per batch (default: {DEFAULT_BATCH_SIZE}).",
+        )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        _migrate(args)
+    elif args.command == "export":
+        _export(args)
+    elif args.command == "import":
+        _import(args)
+    elif args.command == "compact":
+        if not 0.0 <= args.min_deleted <= 1.0:
+            parser.error("--min-deleted must be between 0 and 1")
+        _compact(args)
+    elif args.command == "proxy":
+        run_proxy(Config.from_env(), spawn=not args.no_spawn)
+    elif args.command == "daemon":
+        from mcp_memory.server import run_daemon
+
+        run_daemon()
+    else:
+        # Imported lazily: the server module reads the environment and sets
+        # up FastMCP on import, which the other commands don't need.
+        from mcp_memory.server import main as serve
+
+        serve()
+
+
+if __name__ == "__main__":
+    main()
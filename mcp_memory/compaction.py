@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import logging
+import re
+import shutil
+import sqlite3
+import struct
+import time
+from pathlib import Path
+
+from mcp_memory.models import CompactResult
+
+logger = logging.getLogger(__name__)
+
+CHROMA_FILENAME = "chroma.sqlite3"
+DEFAULT_MIN_DELETED = 0.2
+
+_SEGMENT_DIR = re.compile(
+    r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
+)
+# Start of hnswlib's persisted header: format version, level-0 offset,
+# capacity and element count. Deleted elements stay counted until rebuilt.
+_HNSW_HEADER = struct.Struct("<IQQQ")
+_HNSW_VERSION = 1
+
+
+def dir_size(path: Path) -> int:
+    """Bytes taken by every file under ``path``."""
+    total = 0
+    for file in path.rglob("*"):
+        try:
+            if file.is_file():
+                total += file.stat().st_size
+        except OSError:
+            # Removed while we were walking.
+            continue
+    return total
+
+
+def _read_segments(data_dir: Path) -> list[tuple[str, str, str | None]]:
+    """``(segment id, scope, collection name)`` of every Chroma segment."""
+    path = data_dir / CHROMA_FILENAME
+    if not path.exists():
+        return []
+    conn = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True, timeout=5.0)
+    try:
+        rows = conn.execute(
+            "SELECT s.id, s.scope, c.name FROM segments s "
+            "LEFT JOIN collections c ON c.id = s.collection"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [(str(sid), str(scope), name) for sid, scope, name in rows]
+
+
+def vector_segments(data_dir: Path) -> dict[str, Path]:
+    """Directory holding the HNSW index of each collection, by name."""
+    return {
+        name: data_dir / sid
+        for sid, scope, name in _read_segments(data_dir)
+        if scope == "VECTOR" and name is not None
+    }
+
+
+def hnsw_elements(segment: Path) -> int | None:
+    """Entries in the HNSW index persisted in ``segment``, deleted ones
+    included, or None if there is none or its format is unknown."""
+    try:
+        with open(segment / "header.bin", "rb") as f:
+            raw = f.read(_HNSW_HEADER.size)
+    except OSError:
+        return None
+    if len(raw) < _HNSW_HEADER.size:
+        return None
+    version, _, _, elements = _HNSW_HEADER.unpack(raw)
+    return int(elements) if version == _HNSW_VERSION else None
+
+
+def _modified_since(path: Path, since: float) -> bool:
+    try:
+        return any(p.stat().st_mtime >= since for p in (path, *path.iterdir()))
+    except OSError:
+        return True
+
+
+def remove_orphaned_segments(data_dir: Path) -> int:
+    """Delete segment directories Chroma no longer knows about, which it
+    leaves behind when a collection is dropped. Returns how many went.
+
+    A collection created meanwhile may own a directory missing from the
+    first look at Chroma's catalog, so each candidate is checked against a
+    fresh one just before it goes, and any touched since is left alone.
+    """
+    started = time.time()
+    known = {sid for sid, _, _ in _read_segments(data_dir)}
+    candidates = [
+        child
+        for child in data_dir.iterdir()
+        if child.is_dir() and _SEGMENT_DIR.match(child.name) and child.name not in known
+    ]
+    removed = 0
+    for child in candidates:
+        if _modified_since(child, started) or child.name in {
+            sid for sid, _, _ in _read_segments(data_dir)
+        }:
+            continue
+        try:
+            shutil.rmtree(child)
+        except OSError as e:
+            logger.warning("could not remove %s: %s", child, e)
+            continue
+        removed += 1
+    return removed
+
+
+def vacuum(path: Path, timeout: float = 5.0) -> None:
+    """Rebuild the SQLite database at ``path`` without its free pages,
+    waiting up to ``timeout`` seconds for other connections to finish."""
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def format_bytes(n: int) -> str:
+    size = float(n)
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{n} B" if unit == "B" else f"{size:.1f} {unit}"
+
+
+def describe(result: CompactResult) -> str:
+    """Human-readable summary of a compaction."""
+    lines = [
+        f"Compacted in {result.seconds:.2f} s: reclaimed "
+        f"{format_bytes(result.reclaimed)} ({format_bytes(result.bytes_before)} "
+        f"-> {format_bytes(result.bytes_after)})."
+    ]
+    if result.rebuilt:
+        lines.append(
+            f"Rebuilt {len(result.rebuilt)} collection(s): {', '.join(result.rebuilt)}"
+        )
+    else:
+        lines.append("No collection needed rebuilding.")
+    if result.skipped:
+        lines.append(
+            "Skipped, still being written to by another process: "
+            + ", ".join(result.skipped)
+        )
+    if result.orphans:
+        lines.append(
+            f"Removed {result.orphans} index directories of dropped collections."
+        )
+    if result.vacuumed:
+        lines.append(f"Vacuumed {', '.join(result.vacuumed)}.")
+    return "\n".join(lines)
@@ -5,11 +5,73 @@ from dataclasses import dataclass
 from pathlib import Path
 
 
+def _env_int(name: str, default: int, minimum: int) -> int:
+    value = int(os.environ.get(name, str(default)))
+    if value < minimum:
+        raise ValueError(f"{name} must be >= {minimum}, got {value}")
+    return value
+
+
+def _env_float(name: str, default: float, minimum: float, maximum: float) -> float:
+    value = float(os.environ.get(name, str(default)))
+    if not minimum <= value <= maximum:
+        raise ValueError(f"{name} must be {minimum}-{maximum}, got {value}")
+    return value
+
+
+def _env_weights(
+    name: str, default: tuple[float, float, float]
+) -> tuple[float, float, float]:
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    parts = [float(p) for p in raw.split(",")]
+    if len(parts) != 3 or min(parts) < 0:
+        raise ValueError(
+            f"{name} must be three non-negative weights "
+            f"'similarity,importance,recency', got {raw!r}"
+        )
+    return parts[0], parts[1], parts[2]
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off", "")
+
+
 @dataclass(frozen=True)
 class Config:
     data_dir: Path
     default_project: str
     max_results: int
+    query_cache_size: int = 256
+    result_cache_size: int = 256
+    layout: str = "per_project"
+    shard_window: str = "month"
+    worker_threads: int = 4
+    query_concurrency: int = 4
+    route_top: int = 0
+    warmup: bool = True
+    metrics: bool = True
+    metrics_export: str = ""
+    metrics_interval: int = 60
+    embedder: str = "default"
+    embed_batch: int = 32
+    embed_threads: int = 0
+    dedup: bool = True
+    dedup_threshold: float = 0.0
+    embed_cache_size: int = 50_000
+    embed_cache_dtype: str = "float16"
+    rerank: bool = False
+    rerank_weights: tuple[float, float, float] = (0.7, 0.2, 0.1)
+    rerank_half_life_days: float = 30.0
+    rerank_overfetch: int = 3
+    write_behind: bool = False
+    write_behind_delay_ms: int = 50
+    daemon_host: str = "127.0.0.1"
+    daemon_port: int = 7411
 
     @classmethod
     def from_env(cls) -> Config:
@@ -20,13 +82,107 @@ class Config:
 
         default_project = os.environ.get("MCP_MEMORY_DEFAULT_PROJECT", "global")
 
-        max_results_str = os.environ.get("MCP_MEMORY_MAX_RESULTS", "10")
-        max_results = int(max_results_str)
-        if max_results < 1:
-            raise ValueError(f"MCP_MEMORY_MAX_RESULTS must be >= 1, got {max_results}")
+        max_results = _env_int("MCP_MEMORY_MAX_RESULTS", 10, minimum=1)
+        query_cache_size = _env_int("MCP_MEMORY_QUERY_CACHE_SIZE", 256, minimum=0)
+        result_cache_size = _env_int("MCP_MEMORY_RESULT_CACHE_SIZE", 256, minimum=0)
+
+        layout = os.environ.get("MCP_MEMORY_LAYOUT", "per_project")
+        if layout not in ("per_project", "unified", "sharded"):
+            raise ValueError(
+                "MCP_MEMORY_LAYOUT must be 'per_project', 'unified' or 'sharded', "
+                f"got {layout!r}"
+            )
+        shard_window = os.environ.get("MCP_MEMORY_SHARD_WINDOW", "month")
+        if shard_window not in ("month", "year"):
+            raise ValueError(
+                "MCP_MEMORY_SHARD_WINDOW must be 'month' or 'year', "
+                f"got {shard_window!r}"
+            )
+
+        worker_threads = _env_int("MCP_MEMORY_WORKERS", 4, minimum=1)
+        query_concurrency = _env_int("MCP_MEMORY_QUERY_CONCURRENCY", 4, minimum=1)
+        route_top = _env_int("MCP_MEMORY_ROUTE_TOP", 0, minimum=0)
+
+        warmup = _env_bool("MCP_MEMORY_WARMUP", True)
+
+        metrics = _env_bool("MCP_MEMORY_METRICS", True)
+        metrics_export = os.environ.get("MCP_MEMORY_METRICS_EXPORT", "")
+        if metrics_export not in ("", "prometheus", "jsonl"):
+            raise ValueError(
+                "MCP_MEMORY_METRICS_EXPORT must be 'prometheus' or 'jsonl', "
+                f"got {metrics_export!r}"
+            )
+        metrics_interval = _env_int("MCP_MEMORY_METRICS_INTERVAL", 60, minimum=1)
+
+        embedder = os.environ.get("MCP_MEMORY_EMBEDDER", "default")
+        if embedder not in ("default", "onnx-int8", "hash"):
+            raise ValueError(
+                "MCP_MEMORY_EMBEDDER must be 'default', 'onnx-int8' or 'hash', "
+                f"got {embedder!r}"
+            )
+        embed_batch = _env_int("MCP_MEMORY_EMBED_BATCH", 32, minimum=1)
+        embed_threads = _env_int("MCP_MEMORY_EMBED_THREADS", 0, minimum=0)
+
+        embed_cache_size = _env_int("MCP_MEMORY_EMBED_CACHE_SIZE", 50_000, minimum=0)
+        embed_cache_dtype = os.environ.get("MCP_MEMORY_EMBED_CACHE_DTYPE", "float16")
+        if embed_cache_dtype not in ("float16", "float32"):
+            raise ValueError(
+                "MCP_MEMORY_EMBED_CACHE_DTYPE must be 'float16' or 'float32', "
+                f"got {embed_cache_dtype!r}"
+            )
+
+        rerank = _env_bool("MCP_MEMORY_RERANK", False)
+        rerank_weights = _env_weights("MCP_MEMORY_RERANK_WEIGHTS", (0.7, 0.2, 0.1))
+        rerank_half_life_days = _env_float(
+            "MCP_MEMORY_RERANK_HALF_LIFE_DAYS", 30.0, minimum=0.001, maximum=36500
+        )
+        rerank_overfetch = _env_int("MCP_MEMORY_RERANK_OVERFETCH", 3, minimum=1)
+
+        dedup = _env_bool("MCP_MEMORY_DEDUP", True)
+        dedup_threshold = _env_float(
+            "MCP_MEMORY_DEDUP_THRESHOLD", 0.0, minimum=0.0, maximum=1.0
+        )
+
+        write_behind = _env_bool("MCP_MEMORY_WRITE_BEHIND", False)
+        write_behind_delay_ms = _env_int(
+            "MCP_MEMORY_WRITE_BEHIND_DELAY_MS", 50, minimum=0
+        )
+
+        daemon_host = os.environ.get("MCP_MEMORY_DAEMON_HOST", "127.0.0.1")
+        daemon_port = _env_int("MCP_MEMORY_DAEMON_PORT", 7411, minimum=1)
+        if daemon_port > 65535:
+            raise ValueError(
+                f"MCP_MEMORY_DAEMON_PORT must be <= 65535, got {daemon_port}"
+            )
 
         return cls(
             data_dir=data_dir,
             default_project=default_project,
             max_results=max_results,
+            query_cache_size=query_cache_size,
+            result_cache_size=result_cache_size,
+            layout=layout,
+            shard_window=shard_window,
+            worker_threads=worker_threads,
+            query_concurrency=query_concurrency,
+            route_top=route_top,
+            warmup=warmup,
+            metrics=metrics,
+            metrics_export=metrics_export,
+            metrics_interval=metrics_interval,
+            embedder=embedder,
+            embed_batch=embed_batch,
+            embed_threads=embed_threads,
+            dedup=dedup,
+            dedup_threshold=dedup_threshold,
+            embed_cache_size=embed_cache_size,
+            embed_cache_dtype=embed_cache_dtype,
+            rerank=rerank,
+            rerank_weights=rerank_weights,
+            rerank_half_life_days=rerank_half_life_days,
+            rerank_overfetch=rerank_overfetch,
+            write_behind=write_behind,
+            write_behind_delay_ms=write_behind_delay_ms,
+            daemon_host=daemon_host,
+            daemon_port=daemon_port,
         )
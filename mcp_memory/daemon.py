@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import hmac
+import json
+import logging
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from fastmcp.client.transports import StreamableHttpTransport
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from mcp_memory.config import Config
+
+logger = logging.getLogger(__name__)
+
+DAEMON_LOG_FILENAME = "daemon.log"
+DAEMON_TOKEN_FILENAME = "daemon.token"
+MCP_PATH = "/mcp"
+IDENTITY_PATH = "/identity"
+
+
+def daemon_url(config: Config) -> str:
+    """Streamable HTTP endpoint the daemon serves and the proxy forwards to."""
+    return f"http://{config.daemon_host}:{config.daemon_port}{MCP_PATH}"
+
+
+def daemon_token(data_dir: Path) -> str:
+    """The secret the daemon for ``data_dir`` requires of its clients,
+    created on first use in a file only its owner can read."""
+    path = data_dir / DAEMON_TOKEN_FILENAME
+    if not path.exists():
+        data_dir.mkdir(parents=True, exist_ok=True)
+        # mkstemp creates the file 0600; linking it into place publishes the
+        # token whole, and a process losing the race reads the winner's.
+        fd, tmp = tempfile.mkstemp(dir=data_dir, prefix=".daemon-token-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_urlsafe(32))
+            try:
+                os.link(tmp, path)
+            except FileExistsError:
+                pass
+        finally:
+            os.unlink(tmp)
+    return path.read_text().strip()
+
+
+def _auth_headers(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def daemon_transport(config: Config) -> StreamableHttpTransport:
+    """Client transport to the daemon, carrying its token."""
+    return StreamableHttpTransport(
+        daemon_url(config), headers=_auth_headers(daemon_token(config.data_dir))
+    )
+
+
+class TokenAuth:
+    """ASGI middleware turning away HTTP requests without the bearer token."""
+
+    def __init__(self, app: ASGIApp, token: str) -> None:
+        self._app = app
+        self._expected = _auth_headers(token)["Authorization"].encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            supplied = dict(scope["headers"]).get(b"authorization", b"")
+            if not hmac.compare_digest(supplied, self._expected):
+                response = PlainTextResponse("unauthorized", status_code=401)
+                await response(scope, receive, send)
+                return
+        await self._app(scope, receive, send)
+
+
+def serves_data_dir(config: Config, timeout: float = 2.0) -> bool:
+    """True if the daemon address answers with our token and reports our
+    data directory."""
+    request = urllib.request.Request(
+        f"http://{config.daemon_host}:{config.daemon_port}{IDENTITY_PATH}",
+        headers=_auth_headers(daemon_token(config.data_dir)),
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            identity = json.load(response)
+    except (OSError, ValueError):
+        return False
+    return bool(identity.get("data_dir") == str(config.data_dir.resolve()))
+
+
+def _check_daemon(config: Config) -> None:
+    if not serves_data_dir(config):
+        raise RuntimeError(
+            f"{config.daemon_host}:{config.daemon_port} is taken by something "
+            f"other than the daemon for {config.data_dir}, such as one serving "
+            "another data directory; set MCP_MEMORY_DAEMON_PORT to a free port"
+        )
+
+
+def is_listening(host: str, port: int, timeout: float = 0.2) -> bool:
+    """True if something accepts connections on ``host:port``."""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def spawn_daemon(config: Config) -> subprocess.Popen[bytes]:
+    """Start ``mcp-memory daemon`` in its own session, so it outlives the
+    client that launched it. Output goes to ``daemon.log`` in the data dir."""
+    with (config.data_dir / DAEMON_LOG_FILENAME).open("ab") as log:
+        return subprocess.Popen(
+            [sys.executable, "-m", "mcp_memory.cli", "daemon"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+
+def ensure_daemon(config: Config, timeout: float = 30.0) -> None:
+    """Start the daemon unless one is already listening, then wait for it.
+
+    Proxies racing to start it are harmless: only one daemon can bind the
+    port and the others exit, while every proxy waits for whichever won.
+    Whatever ends up listening must prove it serves our data directory.
+    """
+    host, port = config.daemon_host, config.daemon_port
+    if is_listening(host, port):
+        _check_daemon(config)
+        return
+    logger.info("starting daemon on %s:%d", host, port)
+    spawn_daemon(config)
+    deadline = time.monotonic() + timeout
+    while not is_listening(host, port):
+        if time.monotonic() > deadline:
+            raise RuntimeError(
+                f"daemon did not start on {host}:{port} within {timeout:.0f}s; "
+                f"see {config.data_dir / DAEMON_LOG_FILENAME}"
+            )
+        time.sleep(0.1)
+    _check_daemon(config)
+
+
+def run_proxy(config: Config, spawn: bool = True) -> None:
+    """Serve MCP over stdio by forwarding every request to the daemon."""
+    # Imported here so `mcp-memory proxy` stays light: no model, no store.
+    from fastmcp.server import create_proxy
+
+    if spawn:
+        ensure_daemon(config)
+    else:
+        _check_daemon(config)
+    proxy = create_proxy(daemon_transport(config), name="mcp-memory")
+    proxy.run(transport="stdio")
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+CACHE_DIRNAME = "embedding_cache"
+DTYPES = ("float16", "float32")
+# Bumped when the layout changes, so older caches are discarded.
+_FORMAT = "2"
+# Lookups remembered before their recency is written without waiting for
+# the next put_many.
+_TOUCH_BATCH = 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    hash TEXT PRIMARY KEY,
+    slot INTEGER NOT NULL UNIQUE,
+    used INTEGER NOT NULL,
+    digest BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_by_use ON entries (used);
+"""
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _digest(row: npt.NDArray[Any]) -> bytes:
+    return hashlib.blake2b(row.tobytes(), digest_size=8).digest()
+
+
+class EmbeddingCache:
+    """On-disk cache of document embeddings for one embedding model.
+
+    Vectors live in a fixed-size memory-mapped array of ``capacity`` rows
+    (``vectors.bin``); a small SQLite table maps the hash of each text to its
+    row and last use. Once full, the least recently used row is overwritten.
+    Everything here can be recomputed, so a cache written with different
+    settings is simply discarded.
+
+    Server processes sharing a data directory share the cache. Slots are
+    allocated and written inside one immediate transaction. Reads take no
+    lock: each row records a digest of its vector, so a read of a slot
+    another process has just recycled is caught and counted as a miss.
+    Recency is remembered in memory and written with the next put_many.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        capacity: int,
+        dtype: str = "float16",
+    ) -> None:
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {', '.join(DTYPES)}, got {dtype!r}")
+        directory.mkdir(parents=True, exist_ok=True)
+        self.capacity = capacity
+        self.dtype = dtype
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors_path = directory / "vectors.bin"
+        self._conn = sqlite3.connect(
+            directory / "slots.sqlite3", timeout=30.0, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._vectors: np.memmap[Any, np.dtype[Any]] | None = None
+        self._dim: int | None = None
+        self._touched: set[str] = set()
+
+        settings = {"capacity": str(capacity), "dtype": dtype, "format": _FORMAT}
+        stored = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        if any(stored.get(k) != v for k, v in settings.items()):
+            self._reset(settings)
+        elif "dim" in stored and self._file_fits(int(stored["dim"])):
+            self._map(int(stored["dim"]), create=False)
+        else:
+            self._reset(settings)
+
+    @classmethod
+    def for_model(
+        cls, data_dir: Path, model_id: str, capacity: int, dtype: str = "float16"
+    ) -> EmbeddingCache:
+        """The cache for ``model_id`` under ``data_dir``."""
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", model_id)
+        return cls(data_dir / CACHE_DIRNAME / safe, capacity, dtype)
+
+    def _reset(self, settings: dict[str, str]) -> None:
+        with self._conn:
+            self._conn.execute("DROP TABLE entries")
+            self._conn.execute("DELETE FROM meta")
+            self._conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)", settings.items()
+            )
+        self._conn.executescript(_SCHEMA)
+        self._vectors_path.unlink(missing_ok=True)
+        self._vectors = None
+        self._dim = None
+
+    def _file_fits(self, dim: int) -> bool:
+        expected = self.capacity * dim * np.dtype(self.dtype).itemsize
+        try:
+            return self._vectors_path.stat().st_size == expected
+        except FileNotFoundError:
+            return False
+
+    def _map(self, dim: int, create: bool) -> None:
+        self._vectors = np.memmap(
+            self._vectors_path,
+            dtype=self.dtype,
+            mode="w+" if create else "r+",
+            shape=(self.capacity, dim),
+        )
+        self._dim = dim
+
+    def _map_existing(self) -> bool:
+        """Map the vectors another process may have created since we
+        opened the cache."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        if row is None or not self._file_fits(int(row[0])):
+            return False
+        self._map(int(row[0]), create=False)
+        return True
+
+    def _tick(self) -> int:
+        """Next use stamp; shared by all processes, so call it within a
+        write transaction."""
+        row = self._conn.execute("SELECT MAX(used) FROM entries").fetchone()
+        return int(row[0] or 0) + 1
+
+    def _write_touched(self) -> None:
+        """Stamp the entries read since the last call as just used; call it
+        within a write transaction."""
+        if self._touched:
+            stamp = self._tick()
+            self._conn.executemany(
+                "UPDATE entries SET used = ? WHERE hash = ?",
+                [(stamp, h) for h in self._touched],
+            )
+            self._touched.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+
+    def get_many(self, texts: Sequence[str]) -> list[npt.NDArray[np.float32] | None]:
+        """Cached embeddings for ``texts``, with None for each miss."""
+        if not texts:
+            return []
+        hashes = [_text_hash(t) for t in texts]
+        with self._lock:
+            if self._vectors is None and not self._map_existing():
+                self.misses += len(texts)
+                return [None] * len(texts)
+            assert self._vectors is not None
+            unique = list(set(hashes))
+            placeholders = ",".join("?" * len(unique))
+            rows = {
+                h: (slot, digest)
+                for h, slot, digest in self._conn.execute(
+                    f"SELECT hash, slot, digest FROM entries WHERE hash IN "
+                    f"({placeholders})",
+                    unique,
+                ).fetchall()
+            }
+            found: list[npt.NDArray[np.float32] | None] = []
+            for h in hashes:
+                vector: npt.NDArray[np.float32] | None = None
+                if h in rows:
+                    slot, digest = rows[h]
+                    raw = np.array(self._vectors[slot])
+                    # A slot recycled (or being written) since the row was
+                    # read holds another vector; treat it as a miss.
+                    if _digest(raw) == digest:
+                        vector = raw.astype(np.float32)
+                        self._touched.add(h)
+                found.append(vector)
+            if len(self._touched) >= _TOUCH_BATCH:
+                with self._conn:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    self._write_touched()
+            hits = sum(v is not None for v in found)
+            self.hits += hits
+            self.misses += len(found) - hits
+        return found
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Any]) -> None:
+        """Store embeddings, evicting the least recently used if full."""
+        if not texts:
+            return
+        batch = dict(zip((_text_hash(t) for t in texts), vectors))
+        if len(batch) > self.capacity:
+            batch = dict(list(batch.items())[-self.capacity :])
+        placeholders = ",".join("?" * len(batch))
+        with self._lock, self._conn:
+            # One transaction from choosing slots to committing them, so
+            # processes sharing the cache never hand out the same slot.
+            self._conn.execute("BEGIN IMMEDIATE")
+            if self._vectors is None and not self._map_existing():
+                dim = len(next(iter(batch.values())))
+                self._map(dim, create=True)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)",
+                    (str(dim),),
+                )
+            assert self._vectors is not None
+            # Recency first, so entries just read aren't chosen as victims.
+            self._write_touched()
+            known = dict(
+                self._conn.execute(
+                    f"SELECT hash, slot FROM entries WHERE hash IN ({placeholders})",
+                    list(batch),
+                ).fetchall()
+            )
+            new = [h for h in batch if h not in known]
+            used = int(self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+            free = list(range(used, min(self.capacity, used + len(new))))
+            victims: list[tuple[str, int]] = []
+            if len(free) < len(new):
+                victims = self._conn.execute(
+                    "SELECT hash, slot FROM entries WHERE hash NOT IN "
+                    f"({placeholders}) ORDER BY used LIMIT ?",
+                    [*batch, len(new) - len(free)],
+                ).fetchall()
+            slots = free + [slot for _, slot in victims]
+            assignments = {**known, **dict(zip(new, slots))}
+            digests: dict[str, bytes] = {}
+            for h, slot in assignments.items():
+                row = np.asarray(batch[h], dtype=self.dtype)
+                self._vectors[slot] = row
+                digests[h] = _digest(row)
+            # Vectors reach the file before the rows that point at them.
+            self._vectors.flush()
+            stamp = self._tick()
+            self._conn.executemany(
+                "DELETE FROM entries WHERE hash = ?", [(h,) for h, _ in victims]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (hash, slot, used, digest) "
+                "VALUES (?, ?, ?, ?)",
+                [(h, slot, stamp, digests[h]) for h, slot in assignments.items()],
+            )
+
+    def info(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self),
+            "capacity": self.capacity,
+            "dtype": self.dtype,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._touched:
+                with self._conn:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    self._write_touched()
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            self._conn.close()
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+from functools import cached_property
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from chromadb.api.types import (
+    DefaultEmbeddingFunction,
+    Documents,
+    EmbeddingFunction,
+    Embeddings,
+)
+from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+
+logger = logging.getLogger(__name__)
+
+EMBEDDER_DEFAULT = "default"
+EMBEDDER_ONNX_INT8 = "onnx-int8"
+EMBEDDER_HASH = "hash"
+EMBEDDERS = (EMBEDDER_DEFAULT, EMBEDDER_ONNX_INT8, EMBEDDER_HASH)
+
+DEFAULT_EMBED_BATCH = 32
+
+# Model id recorded for collections created before embedders were recorded;
+# they could only have been built with the default MiniLM model.
+LEGACY_MODEL_ID = ONNXMiniLM_L6_V2.MODEL_NAME
+
+_TOKEN = re.compile(r"\w+")
+
+
+class HashEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Deterministic, model-free embeddings for tests and benchmarks.
+
+    Words and their character trigrams are feature-hashed into a fixed-size
+    signed vector and L2-normalized. Texts sharing words land close together,
+    which is enough for repeatable ranking without downloading a model.
+    """
+
+    def __init__(self, dim: int = 384) -> None:
+        if dim < 1:
+            raise ValueError(f"dim must be >= 1, got {dim}")
+        self.dim = dim
+        self.model_id = f"hash-{dim}"
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return [self._embed(text) for text in input]
+
+    def _embed(self, text: str) -> np.ndarray[Any, np.dtype[np.float32]]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _TOKEN.findall(text.lower()):
+            padded = f"#{word}#"
+            features = [word] + [padded[i : i + 3] for i in range(len(padded) - 2)]
+            for feature in features:
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        if not norm:
+            # Text without word characters: any fixed unit vector will do.
+            vector[0] = 1.0
+            return vector
+        vector /= norm
+        return vector
+
+    @staticmethod
+    def name() -> str:
+        return "hash"
+
+    def get_config(self) -> dict[str, Any]:
+        return {"dim": self.dim}
+
+    @staticmethod
+    def build_from_config(config: dict[str, Any]) -> HashEmbeddingFunction:
+        return HashEmbeddingFunction(dim=int(config.get("dim", 384)))
+
+
+class OnnxEmbeddingFunction(ONNXMiniLM_L6_V2):
+    """all-MiniLM-L6-v2 with a configurable batch size and thread cap, and
+    optionally dynamically quantized int8 weights.
+
+    The int8 model is derived from the downloaded float model on first use
+    and cached next to it. It needs the ``onnx`` package for the conversion.
+    Its vectors stay in the same space as the float model's, so both can
+    serve the same collections.
+    """
+
+    QUANTIZED_FILENAME = "model_int8.onnx"
+
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_EMBED_BATCH,
+        threads: int = 0,
+        quantized: bool = False,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        if threads < 0:
+            raise ValueError(f"threads must be >= 0, got {threads}")
+        super().__init__()
+        self.batch_size = batch_size
+        self.threads = threads
+        self.quantized = quantized
+        self.model_id = self.MODEL_NAME
+
+    def _model_path(self) -> str:
+        folder = os.path.join(self.DOWNLOAD_PATH, self.EXTRACTED_FOLDER_NAME)
+        path = os.path.join(folder, "model.onnx")
+        if not self.quantized:
+            return path
+        quantized = os.path.join(folder, self.QUANTIZED_FILENAME)
+        if not os.path.exists(quantized):
+            try:
+                from onnxruntime.quantization import (  # type: ignore[import-untyped]
+                    QuantType,
+                    quantize_dynamic,
+                )
+            except ImportError as e:
+                raise ValueError(
+                    "The onnx-int8 embedder needs the onnx package: "
+                    "pip install 'mcp-memory[int8]'"
+                ) from e
+            logger.info("quantizing %s to int8", path)
+            tmp = quantized + ".tmp"
+            quantize_dynamic(path, tmp, weight_type=QuantType.QInt8)
+            os.replace(tmp, quantized)
+        return quantized
+
+    @cached_property
+    def model(self) -> Any:
+        options = self.ort.SessionOptions()
+        options.log_severity_level = 3
+        options.graph_optimization_level = (
+            self.ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+            options.inter_op_num_threads = 1
+        return self.ort.InferenceSession(
+            self._model_path(),
+            providers=["CPUExecutionProvider"],
+            sess_options=options,
+        )
+
+    def _forward(
+        self, documents: list[str], batch_size: int = DEFAULT_EMBED_BATCH
+    ) -> npt.NDArray[np.float32]:
+        return super()._forward(documents, batch_size=self.batch_size)
+
+
+def make_embedder(
+    name: str = EMBEDDER_DEFAULT,
+    batch_size: int = DEFAULT_EMBED_BATCH,
+    threads: int = 0,
+) -> EmbeddingFunction[Documents]:
+    """Build the embedding function selected by ``MCP_MEMORY_EMBEDDER``."""
+    if name == EMBEDDER_DEFAULT:
+        return OnnxEmbeddingFunction(batch_size=batch_size, threads=threads)
+    if name == EMBEDDER_ONNX_INT8:
+        return OnnxEmbeddingFunction(
+            batch_size=batch_size, threads=threads, quantized=True
+        )
+    if name == EMBEDDER_HASH:
+        return HashEmbeddingFunction()
+    raise ValueError(f"embedder must be one of {', '.join(EMBEDDERS)}, got {name!r}")
+
+
+def model_id(embedding_function: EmbeddingFunction[Documents]) -> str:
+    """Identify the vector space an embedding function produces.
+
+    Collections record this so that vectors from different models are never
+    mixed. Functions that don't declare a ``model_id`` are identified by class.
+    """
+    declared = getattr(embedding_function, "model_id", None)
+    if isinstance(declared, str):
+        return declared
+    if isinstance(embedding_function, (DefaultEmbeddingFunction, ONNXMiniLM_L6_V2)):
+        return LEGACY_MODEL_ID
+    return type(embedding_function).__name__
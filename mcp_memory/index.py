@@ -0,0 +1,472 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+import sqlite3
+import threading
+from collections.abc import Callable, Iterable, Sequence
+from pathlib import Path
+from typing import Any
+
+from mcp_memory.models import Memory, MemoryStats
+from mcp_memory.routing import Summary
+
+INDEX_FILENAME = "index.sqlite3"
+SCHEMA_VERSION = 4
+
+_TABLES = (
+    "meta",
+    "memories",
+    "memory_tags",
+    "scope_stats",
+    "collection_stats",
+    "tag_stats",
+    "importance_stats",
+    "summaries",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memories (
+    id TEXT PRIMARY KEY,
+    scope TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    importance INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS memories_by_time
+    ON memories (timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS memories_by_scope_time
+    ON memories (scope, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS memories_by_collection
+    ON memories (collection);
+CREATE INDEX IF NOT EXISTS memories_by_hash
+    ON memories (scope, content_hash);
+CREATE TABLE IF NOT EXISTS memory_tags (
+    tag TEXT NOT NULL,
+    id TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    PRIMARY KEY (tag, id)
+);
+CREATE INDEX IF NOT EXISTS memory_tags_by_id
+    ON memory_tags (id);
+
+-- Counters kept in step by triggers, so statistics never scan memories.
+CREATE TABLE IF NOT EXISTS scope_stats (
+    scope TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS collection_stats (
+    collection TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tag_stats (
+    scope TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (scope, tag)
+);
+CREATE TABLE IF NOT EXISTS importance_stats (
+    scope TEXT NOT NULL,
+    importance INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (scope, importance)
+);
+
+-- Routing summaries of each collection, see mcp_memory.routing.
+CREATE TABLE IF NOT EXISTS summaries (
+    collection TEXT PRIMARY KEY,
+    built INTEGER NOT NULL,
+    dim INTEGER NOT NULL,
+    sums BLOB NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS memories_insert AFTER INSERT ON memories BEGIN
+    INSERT INTO scope_stats (scope, count) VALUES (NEW.scope, 1)
+        ON CONFLICT (scope) DO UPDATE SET count = count + 1;
+    INSERT INTO collection_stats (collection, count) VALUES (NEW.collection, 1)
+        ON CONFLICT (collection) DO UPDATE SET count = count + 1;
+    INSERT INTO importance_stats (scope, importance, count)
+        VALUES (NEW.scope, NEW.importance, 1)
+        ON CONFLICT (scope, importance) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS memories_delete AFTER DELETE ON memories BEGIN
+    UPDATE scope_stats SET count = count - 1 WHERE scope = OLD.scope;
+    DELETE FROM scope_stats WHERE scope = OLD.scope AND count <= 0;
+    UPDATE collection_stats SET count = count - 1
+        WHERE collection = OLD.collection;
+    DELETE FROM collection_stats
+        WHERE collection = OLD.collection AND count <= 0;
+    UPDATE importance_stats SET count = count - 1
+        WHERE scope = OLD.scope AND importance = OLD.importance;
+    DELETE FROM importance_stats
+        WHERE scope = OLD.scope AND importance = OLD.importance AND count <= 0;
+END;
+CREATE TRIGGER IF NOT EXISTS memory_tags_insert AFTER INSERT ON memory_tags BEGIN
+    INSERT INTO tag_stats (scope, tag, count) VALUES (NEW.scope, NEW.tag, 1)
+        ON CONFLICT (scope, tag) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS memory_tags_delete AFTER DELETE ON memory_tags BEGIN
+    UPDATE tag_stats SET count = count - 1
+        WHERE scope = OLD.scope AND tag = OLD.tag;
+    DELETE FROM tag_stats WHERE scope = OLD.scope AND tag = OLD.tag AND count <= 0;
+END;
+"""
+
+
+def content_hash(content: str) -> str:
+    """Hash of ``content`` ignoring case and runs of whitespace, so restated
+    facts that differ only in formatting collide."""
+    normalized = " ".join(content.split()).casefold()
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def encode_cursor(timestamp: str, memory_id: str) -> str:
+    raw = json.dumps([timestamp, memory_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, memory_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError("invalid cursor") from None
+    if not isinstance(timestamp, str) or not isinstance(memory_id, str):
+        raise ValueError("invalid cursor")
+    return timestamp, memory_id
+
+
+class MemoryIndex:
+    """Timestamp-ordered sidecar index of every stored memory.
+
+    Chroma has no ordered scans, so this SQLite table mirrors the id,
+    timestamp, tags and location (scope and collection) of each memory and
+    is updated alongside every write. ``scope`` is the key a memory is
+    listed under: its normalized project name, in every layout. It also
+    keeps the routing
+    summary of each collection. The index holds no content and can always
+    be rebuilt from Chroma.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            # Derived data: an old or unknown schema is simply rebuilt.
+            self._conn.executescript(
+                "".join(f"DROP TABLE IF EXISTS {t};" for t in _TABLES)
+            )
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        else:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def data_version(self) -> int:
+        """Changes whenever another connection (e.g. another process sharing
+        this data directory) commits to the index; our own commits don't."""
+        with self._lock:
+            return int(self._conn.execute("PRAGMA data_version").fetchone()[0])
+
+    def get_meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        return str(row[0]) if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def delete_meta(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+
+    def add(self, scope: str, collection: str, memories: Iterable[Memory]) -> None:
+        with self._lock, self._conn:
+            self._insert(scope, collection, memories)
+
+    def _insert(self, scope: str, collection: str, memories: Iterable[Memory]) -> None:
+        for m in memories:
+            # Replace as delete + insert so the counter triggers see both.
+            self._delete(m.id)
+            self._conn.execute(
+                "INSERT INTO memories "
+                "(id, scope, collection, timestamp, importance, content_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    m.id,
+                    scope,
+                    collection,
+                    m.timestamp,
+                    m.importance,
+                    content_hash(m.content),
+                ),
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO memory_tags (tag, id, scope) VALUES (?, ?, ?)",
+                [(tag, m.id, scope) for tag in m.tags],
+            )
+
+    def _delete(self, memory_id: str) -> None:
+        self._conn.execute("DELETE FROM memory_tags WHERE id = ?", (memory_id,))
+        self._conn.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
+
+    def remove(self, ids: Sequence[str]) -> None:
+        with self._lock, self._conn:
+            for memory_id in ids:
+                self._delete(memory_id)
+
+    def remove_scope(self, scope: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM memory_tags WHERE scope = ?", (scope,))
+            self._conn.execute("DELETE FROM memories WHERE scope = ?", (scope,))
+
+    def rebuild(self, rows: Iterable[tuple[str, str, Sequence[Memory]]]) -> None:
+        """Replace the whole index with ``(scope, collection, memories)`` rows."""
+        with self._lock, self._conn:
+            for table in _TABLES[1:]:
+                self._conn.execute(f"DELETE FROM {table}")
+            for scope, collection, memories in rows:
+                self._insert(scope, collection, memories)
+
+    def locate(self, ids: Sequence[str]) -> dict[str, str]:
+        """Map each known id to the collection holding it."""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, collection FROM memories WHERE id IN ({placeholders})",
+                list(ids),
+            ).fetchall()
+        return {str(mid): str(name) for mid, name in rows}
+
+    def scopes_of(self, ids: Sequence[str]) -> set[str]:
+        """Scopes the known ``ids`` are listed under."""
+        if not ids:
+            return set()
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT scope FROM memories WHERE id IN ({placeholders})",
+                list(ids),
+            ).fetchall()
+        return {str(scope) for (scope,) in rows}
+
+    def find_hashes(
+        self, scope: str, hashes: Sequence[str]
+    ) -> dict[str, tuple[str, str]]:
+        """Map each content hash already stored under ``scope`` to the
+        ``(id, collection)`` of a memory holding it."""
+        if not hashes:
+            return {}
+        placeholders = ",".join("?" * len(hashes))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT content_hash, id, collection FROM memories "
+                f"WHERE scope = ? AND content_hash IN ({placeholders})",
+                [scope, *hashes],
+            ).fetchall()
+        return {str(h): (str(mid), str(name)) for h, mid, name in rows}
+
+    def collection_counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT collection, count FROM collection_stats"
+            ).fetchall()
+        return {str(name): int(n) for name, n in rows}
+
+    def summaries(self) -> dict[str, Summary]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT collection, built, dim, sums FROM summaries"
+            ).fetchall()
+        return {str(name): Summary.from_blobs(*row) for name, *row in rows}
+
+    def update_summary(
+        self,
+        collection: str,
+        update: Callable[[Summary | None, int], Summary | None],
+    ) -> Summary | None:
+        """Replace the summary of ``collection`` with ``update(current,
+        count)``, or delete it if that returns None.
+
+        Runs in one immediate transaction, so writers in other processes
+        can't interleave and drop each other's changes.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT built, dim, sums FROM summaries WHERE collection = ?",
+                (collection,),
+            ).fetchone()
+            count = self._conn.execute(
+                "SELECT count FROM collection_stats WHERE collection = ?",
+                (collection,),
+            ).fetchone()
+            summary = update(
+                Summary.from_blobs(*row) if row else None, int(count[0]) if count else 0
+            )
+            if summary is None:
+                self._conn.execute(
+                    "DELETE FROM summaries WHERE collection = ?", (collection,)
+                )
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO summaries "
+                    "(collection, built, dim, sums) VALUES (?, ?, ?, ?)",
+                    (collection, summary.built, *summary.to_blobs()),
+                )
+        return summary
+
+    def drop_summary(self, collection: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM summaries WHERE collection = ?", (collection,)
+            )
+
+    @staticmethod
+    def _filter(
+        scope: str | None, tags: Sequence[str] | None
+    ) -> tuple[list[str], list[Any]]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        if scope is not None:
+            clauses.append("m.scope = ?")
+            params.append(scope)
+        for tag in tags or []:
+            clauses.append(
+                "EXISTS (SELECT 1 FROM memory_tags t WHERE t.tag = ? AND t.id = m.id)"
+            )
+            params.append(tag)
+        return clauses, params
+
+    def page(
+        self,
+        scope: str | None = None,
+        tags: Sequence[str] | None = None,
+        limit: int = 20,
+        offset: int = 0,
+        after: tuple[str, str] | None = None,
+    ) -> tuple[list[tuple[str, str]], tuple[str, str] | None]:
+        """Return ``(id, collection)`` pairs, newest first, and the keyset
+        position to continue from (None once the last page is reached).
+
+        ``after`` is the ``(timestamp, id)`` of the last row already seen;
+        when given, ``offset`` is ignored.
+        """
+        clauses, params = self._filter(scope, tags)
+        if after is not None:
+            clauses.append("(m.timestamp, m.id) < (?, ?)")
+            params.extend(after)
+            offset = 0
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (
+            f"SELECT m.id, m.collection, m.timestamp FROM memories m {where} "
+            "ORDER BY m.timestamp DESC, m.id DESC LIMIT ? OFFSET ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, [*params, limit + 1, offset]).fetchall()
+
+        next_after = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_after = (rows[-1][2], rows[-1][0])
+        return [(r[0], r[1]) for r in rows], next_after
+
+    def count(self, scope: str | None = None, tags: Sequence[str] | None = None) -> int:
+        if tags and len(tags) > 1:
+            clauses, params = self._filter(scope, tags)
+            sql = f"SELECT COUNT(*) FROM memories m WHERE {' AND '.join(clauses)}"
+        else:
+            sql, params = self._counter_query(
+                "SUM(count)", scope, tags[0] if tags else None
+            )
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        return int(row[0] or 0)
+
+    def scope_counts(self, tags: Sequence[str] | None = None) -> dict[str, int]:
+        if tags and len(tags) > 1:
+            clauses, params = self._filter(None, tags)
+            sql = (
+                f"SELECT m.scope, COUNT(*) FROM memories m "
+                f"WHERE {' AND '.join(clauses)} GROUP BY m.scope"
+            )
+        else:
+            sql, params = self._counter_query(
+                "scope, count", None, tags[0] if tags else None
+            )
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return {str(scope): int(n) for scope, n in rows}
+
+    @staticmethod
+    def _counter_query(
+        columns: str, scope: str | None, tag: str | None
+    ) -> tuple[str, list[Any]]:
+        table, clauses, params = "scope_stats", [], []
+        if tag is not None:
+            table = "tag_stats"
+            clauses.append("tag = ?")
+            params.append(tag)
+        if scope is not None:
+            clauses.append("scope = ?")
+            params.append(scope)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return f"SELECT {columns} FROM {table}{where}", params
+
+    def stats(self, scope: str | None = None) -> MemoryStats:
+        """Counts per scope and tag, an importance histogram and the time
+        range, read from the trigger-maintained counters."""
+        where, params = ("WHERE scope = ?", [scope]) if scope is not None else ("", [])
+        with self._lock:
+            scopes = self._conn.execute(
+                f"SELECT scope, count FROM scope_stats {where}", params
+            ).fetchall()
+            tags = self._conn.execute(
+                f"SELECT tag, SUM(count) FROM tag_stats {where} GROUP BY tag", params
+            ).fetchall()
+            importance = self._conn.execute(
+                f"SELECT importance, SUM(count) FROM importance_stats {where} "
+                "GROUP BY importance",
+                params,
+            ).fetchall()
+            # One indexed MIN/MAX lookup per scope rather than a table scan.
+            bounds = [
+                self._conn.execute(
+                    "SELECT (SELECT MIN(timestamp) FROM memories WHERE scope = ?), "
+                    "(SELECT MAX(timestamp) FROM memories WHERE scope = ?)",
+                    (name, name),
+                ).fetchone()
+                for name, _ in scopes
+            ]
+
+        oldest = min((b[0] for b in bounds if b[0]), default="")
+        newest = max((b[1] for b in bounds if b[1]), default="")
+        projects = {str(name): int(n) for name, n in scopes}
+        return MemoryStats(
+            total=sum(projects.values()),
+            projects=projects,
+            tags={str(tag): int(n) for tag, n in tags},
+            importance={int(level): int(n) for level, n in importance},
+            oldest=str(oldest),
+            newest=str(newest),
+        )
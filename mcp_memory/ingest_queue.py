@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from collections.abc import Sequence
+from dataclasses import asdict
+from pathlib import Path
+
+from mcp_memory.models import Memory
+
+QUEUE_FILENAME = "ingest_queue.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    project TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    memory TEXT NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS pending_by_hash ON pending (scope, content_hash);
+"""
+
+
+class IngestQueue:
+    """Durable FIFO of memories accepted but not yet written to Chroma.
+
+    Every append is committed with ``synchronous=FULL`` before it returns,
+    so a queued memory survives a crash. Rows leave the queue only when
+    acknowledged after being written, and only if they weren't changed in
+    the meantime; anything else is simply drained again.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0])
+
+    def append(self, rows: Sequence[tuple[str, str, str, Memory]]) -> None:
+        """Queue ``(project, scope, content_hash, memory)`` rows."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO pending (project, scope, content_hash, memory) "
+                "VALUES (?, ?, ?, ?)",
+                [(p, s, h, json.dumps(asdict(m))) for p, s, h, m in rows],
+            )
+
+    def find(self, scope: str, content_hash: str) -> tuple[int, Memory] | None:
+        """The oldest queued memory in ``scope`` with this content hash."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT seq, memory FROM pending "
+                "WHERE scope = ? AND content_hash = ? ORDER BY seq LIMIT 1",
+                (scope, content_hash),
+            ).fetchone()
+        if row is None:
+            return None
+        return int(row[0]), Memory(**json.loads(row[1]))
+
+    def replace(self, seq: int, memory: Memory) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pending SET memory = ?, revision = revision + 1 WHERE seq = ?",
+                (json.dumps(asdict(memory)), seq),
+            )
+
+    def peek(self, limit: int) -> list[tuple[int, int, str, Memory]]:
+        """Up to ``limit`` of the oldest rows as ``(seq, revision, project,
+        memory)``, left in the queue until acknowledged."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, revision, project, memory FROM pending "
+                "ORDER BY seq LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            (int(seq), int(rev), project, Memory(**json.loads(memory)))
+            for seq, rev, project, memory in rows
+        ]
+
+    def ack(self, rows: Sequence[tuple[int, int]]) -> None:
+        """Remove ``(seq, revision)`` rows that are still at that revision."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM pending WHERE seq = ? AND revision = ?", rows
+            )
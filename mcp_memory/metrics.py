@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import AbstractContextManager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from types import TracebackType
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("prometheus", "jsonl")
+PROMETHEUS_FILENAME = "metrics.prom"
+JSONL_FILENAME = "metrics.jsonl"
+
+# Upper bounds in seconds, roughly 2.5x apart, from 100us to 10s.
+BUCKETS: tuple[float, ...] = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+_NULL_SPAN: AbstractContextManager[None] = nullcontext()
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, safe to observe from many threads."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        slot = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[slot] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def state(self) -> tuple[list[int], int, float, float]:
+        """A consistent copy of (bucket counts, count, sum, max)."""
+        with self._lock:
+            return list(self.counts), self.count, self.total, self.max
+
+    def quantile(self, q: float) -> float:
+        """Estimate the ``q`` quantile by interpolating inside its bucket."""
+        return _quantile(self.state(), q)
+
+    def summary(self) -> dict[str, float]:
+        state = self.state()
+        _, count, total, largest = state
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "p50": _quantile(state, 0.50),
+            "p95": _quantile(state, 0.95),
+            "p99": _quantile(state, 0.99),
+            "max": largest,
+        }
+
+
+def _quantile(state: tuple[list[int], int, float, float], q: float) -> float:
+    counts, count, _, largest = state
+    if not count:
+        return 0.0
+    rank = q * count
+    seen = 0
+    for slot, n in enumerate(counts):
+        if n and seen + n >= rank:
+            lower = BUCKETS[slot - 1] if slot else 0.0
+            upper = BUCKETS[slot] if slot < len(BUCKETS) else largest
+            return min(lower + (upper - lower) * (rank - seen) / n, largest)
+        seen += n
+    return largest
+
+
+class _Span:
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+        self._started = 0.0
+
+    def __enter__(self) -> None:
+        self._started = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+class Metrics:
+    """Named latency histograms fed by ``with metrics.span(name):`` blocks.
+
+    When disabled, ``span`` hands back a shared no-op context manager and
+    nothing is recorded, so instrumented code pays for one attribute check.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    def span(self, name: str) -> AbstractContextManager[None]:
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self.histogram(name))
+
+    def observe(self, name: str, seconds: float) -> None:
+        if self.enabled:
+            self.histogram(name).observe(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Summaries for every span seen so far, in seconds, keyed by name."""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        return {name: h.summary() for name, h in histograms}
+
+    def to_prometheus(self) -> str:
+        """Render all histograms in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        lines = [
+            "# HELP mcp_memory_span_seconds Time spent in each operation stage.",
+            "# TYPE mcp_memory_span_seconds histogram",
+        ]
+        for name, h in histograms:
+            counts, count, total, _ = h.state()
+            cumulative = 0
+            for bound, n in zip((*BUCKETS, float("inf")), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f'mcp_memory_span_seconds_bucket{{span="{name}",le="{le}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(f'mcp_memory_span_seconds_sum{{span="{name}"}} {total}')
+            lines.append(f'mcp_memory_span_seconds_count{{span="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Background thread writing ``metrics`` into ``data_dir`` every
+    ``interval`` seconds, as Prometheus text (replaced on every write) or
+    JSONL (one snapshot appended per write)."""
+
+    def __init__(
+        self, metrics: Metrics, data_dir: Path, fmt: str, interval: float
+    ) -> None:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(
+                f"format must be one of {', '.join(EXPORT_FORMATS)}, got {fmt!r}"
+            )
+        self.metrics = metrics
+        self.format = fmt
+        self.interval = interval
+        filename = PROMETHEUS_FILENAME if fmt == "prometheus" else JSONL_FILENAME
+        self.path = data_dir / filename
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def export(self) -> None:
+        if self.format == "prometheus":
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(self.metrics.to_prometheus())
+            os.replace(tmp, self.path)
+        else:
+            record = {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "spans": self.metrics.snapshot(),
+            }
+            with self.path.open("a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.export()
+            except OSError:
+                logger.exception("failed to export metrics to %s", self.path)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._loop, name="mcp-memory-metrics", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and write one final export."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.export()
+        except OSError:
+            logger.exception("failed to export metrics to %s", self.path)
@@ -12,6 +12,9 @@ class Memory:
     source: str = ""
     importance: int = 3
     timestamp: str = ""
+    # Set on the chunks of an ingested file: the id they share and their order
+    parent_id: str = ""
+    chunk: int = 0
 
 
 @dataclass
@@ -19,3 +22,49 @@ class RecallResult:
     memory: Memory
     relevance_score: float
     distance: float
+    # Blended rank score, set only when results were reranked
+    score: float | None = None
+
+
+@dataclass
+class StoreResult:
+    index: int
+    memory: Memory | None = None
+    error: str = ""
+    # "exact" or "similar" when the item was folded into an existing memory
+    reused: str = ""
+
+
+@dataclass
+class IngestResult:
+    parent_id: str
+    source: str
+    chunks: int
+
+
+@dataclass
+class MemoryStats:
+    total: int
+    projects: dict[str, int] = field(default_factory=dict)
+    tags: dict[str, int] = field(default_factory=dict)
+    importance: dict[int, int] = field(default_factory=dict)
+    oldest: str = ""
+    newest: str = ""
+
+
+@dataclass
+class CompactResult:
+    bytes_before: int = 0
+    bytes_after: int = 0
+    seconds: float = 0.0
+    # Collections swapped for a fresh copy, and those another process kept
+    # writing to
+    rebuilt: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    # Segment directories of dropped collections that were removed
+    orphans: int = 0
+    vacuumed: list[str] = field(default_factory=list)
+
+    @property
+    def reclaimed(self) -> int:
+        return max(self.bytes_before - self.bytes_after, 0)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+
+import numpy as np
+
+from mcp_memory.models import RecallResult
+
+
+def _epoch(timestamp: str) -> float:
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return 0.0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+@dataclass(frozen=True)
+class Reranker:
+    """Blends similarity with importance and recency to order recall results.
+
+    Each candidate scores ``similarity * relevance + importance * (i - 1) / 4
+    + recency * 0.5 ** (age / half_life)``, so all three terms are in 0-1.
+    ``overfetch`` is how many candidates per requested result each
+    collection returns, so that important or recent memories just outside
+    the plain top-k can still make it in.
+    """
+
+    similarity: float = 0.7
+    importance: float = 0.2
+    recency: float = 0.1
+    half_life_days: float = 30.0
+    overfetch: int = 3
+
+    def __post_init__(self) -> None:
+        if min(self.similarity, self.importance, self.recency) < 0:
+            raise ValueError("rerank weights must be >= 0")
+        if self.half_life_days <= 0:
+            raise ValueError(f"half_life_days must be > 0, got {self.half_life_days}")
+        if self.overfetch < 1:
+            raise ValueError(f"overfetch must be >= 1, got {self.overfetch}")
+
+    def scores(
+        self, results: list[RecallResult], now: float | None = None
+    ) -> np.ndarray:
+        """Blended score of every result, computed in one vectorized pass."""
+        if now is None:
+            now = datetime.now(timezone.utc).timestamp()
+        relevance = np.fromiter(
+            (r.relevance_score for r in results), dtype=np.float64, count=len(results)
+        )
+        importance = np.fromiter(
+            (r.memory.importance for r in results),
+            dtype=np.float64,
+            count=len(results),
+        )
+        stored = np.fromiter(
+            (_epoch(r.memory.timestamp) for r in results),
+            dtype=np.float64,
+            count=len(results),
+        )
+        age_days = np.maximum(now - stored, 0.0) / 86400.0
+        return (
+            self.similarity * relevance
+            + self.importance * (importance - 1.0) / 4.0
+            + self.recency * np.exp2(-age_days / self.half_life_days)
+        )
+
+    def rerank(
+        self, results: list[RecallResult], k: int, now: float | None = None
+    ) -> list[RecallResult]:
+        """The ``k`` best results by blended score, best first, with
+        ``RecallResult.score`` filled in."""
+        if not results or k < 1:
+            return []
+        scores = self.scores(results, now)
+        top = np.arange(len(results))
+        if len(results) > k:
+            # Partial selection: only the k winners get fully sorted.
+            top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [replace(results[i], score=float(scores[i])) for i in top]
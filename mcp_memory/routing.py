@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+DEFAULT_REPRESENTATIVES = 4
+# Vectors clustered when a summary is (re)built; the rest are only absorbed.
+SAMPLE_SIZE = 4096
+
+_ITERATIONS = 8
+
+
+def normalize(vectors: npt.ArrayLike) -> npt.NDArray[np.float32]:
+    """``vectors`` as rows of unit length; zero rows stay zero."""
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit: npt.NDArray[np.float32] = matrix / norms
+    return unit
+
+
+@dataclass(frozen=True)
+class Summary:
+    """Routing summary of one collection: a few spherical k-means
+    representatives, kept as the running sum of the unit vectors assigned
+    to each so new members can be folded in without re-clustering.
+
+    ``built`` is how many members the last clustering saw; once the
+    collection has grown or shrunk well past that, :meth:`is_stale` asks
+    for a rebuild.
+    """
+
+    sums: npt.NDArray[np.float32]
+    built: int
+
+    @property
+    def centers(self) -> npt.NDArray[np.float32]:
+        return normalize(self.sums)
+
+    def absorb(self, vectors: npt.ArrayLike) -> Summary:
+        """This summary with ``vectors`` added to their nearest
+        representatives."""
+        unit = normalize(vectors)
+        sums = self.sums.copy()
+        np.add.at(sums, np.argmax(unit @ self.centers.T, axis=1), unit)
+        return Summary(sums=sums, built=self.built)
+
+    def is_stale(self, count: int) -> bool:
+        """True once the collection holds half as many members again as when
+        clustered, or half as many, so the representatives may have drifted
+        from what it now holds."""
+        return 2 * count > 3 * self.built or 2 * count < self.built
+
+    def to_blobs(self) -> tuple[int, bytes]:
+        """``(dim, sums)`` for storage."""
+        return int(self.sums.shape[1]), self.sums.astype(np.float32).tobytes()
+
+    @classmethod
+    def from_blobs(cls, built: int, dim: int, sums: bytes) -> Summary:
+        matrix = np.frombuffer(sums, dtype=np.float32).reshape(-1, dim)
+        return cls(sums=matrix, built=built)
+
+
+def summarize(
+    vectors: npt.ArrayLike, representatives: int = DEFAULT_REPRESENTATIVES
+) -> Summary:
+    """Cluster ``vectors`` (at least one) into at most ``representatives``
+    groups."""
+    unit = normalize(vectors)
+    k = min(representatives, len(unit))
+    # Farthest-point seeding: deterministic, and spreads the seeds out.
+    chosen = [int(np.argmax(unit @ unit.mean(axis=0)))]
+    closest = unit @ unit[chosen[0]]
+    while len(chosen) < k:
+        chosen.append(int(np.argmin(closest)))
+        closest = np.maximum(closest, unit @ unit[chosen[-1]])
+    centers = unit[chosen]
+    sums = np.zeros_like(centers)
+    for _ in range(_ITERATIONS):
+        sums = np.zeros_like(centers)
+        np.add.at(sums, np.argmax(unit @ centers.T, axis=1), unit)
+        centers = np.where(np.any(sums, axis=1, keepdims=True), normalize(sums), 0)
+    # Seeds left without members would only attract queries.
+    return Summary(sums=sums[np.any(sums, axis=1)], built=len(unit))
+
+
+def score_summaries(
+    summaries: Sequence[Summary], queries: npt.ArrayLike
+) -> npt.NDArray[np.floating[Any]]:
+    """Relevance (``(1 + cosine) / 2``, as in recall results) of the closest
+    representative of each summary to each query, computed in one pass as
+    a ``(len(summaries), len(queries))`` array."""
+    unit = normalize(queries)
+    if not summaries:
+        return np.empty((0, len(unit)), dtype=np.float32)
+    centers = np.concatenate([s.centers for s in summaries])
+    starts = np.cumsum([0] + [len(s.sums) for s in summaries[:-1]])
+    best = np.maximum.reduceat(centers @ unit.T, starts, axis=0)
+    relevance: npt.NDArray[np.floating[Any]] = (1.0 + best) / 2.0
+    return relevance
@@ -1,18 +1,104 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
 from fastmcp import FastMCP
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 
+from mcp_memory.chunking import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE
+from mcp_memory.compaction import DEFAULT_MIN_DELETED, describe
 from mcp_memory.config import Config
-from mcp_memory.storage import MemoryStore
+from mcp_memory.daemon import IDENTITY_PATH, MCP_PATH, TokenAuth, daemon_token
+from mcp_memory.metrics import Metrics, MetricsExporter
+from mcp_memory.models import RecallResult
+from mcp_memory.storage import REUSED_EXACT, REUSED_SIMILAR, MemoryStore
+
+logger = logging.getLogger(__name__)
+_STARTED = time.monotonic()
+_firsts: set[str] = set()
 
 config = Config.from_env()
-store = MemoryStore(config.data_dir)
+metrics = Metrics(enabled=config.metrics)
+# Cheap to construct: the Chroma client and index open on first use.
+store = MemoryStore.from_config(config, metrics=metrics)
+# Chroma I/O and embedding block, so tools hand them to a bounded pool and
+# keep the event loop free to serve other requests.
+executor = ThreadPoolExecutor(
+    max_workers=config.worker_threads,
+    thread_name_prefix="mcp-memory-worker",
+)
+
+
+def _mark_first(event: str) -> None:
+    """Log how long after startup ``event`` first happened."""
+    if event in _firsts:
+        return
+    _firsts.add(event)
+    elapsed = (time.monotonic() - _STARTED) * 1000
+    logger.info("time to first %s: %.0f ms", event, elapsed)
+
+
+def _warm_up() -> None:
+    try:
+        store.warm_up()
+    except Exception:
+        logger.exception("background warm-up failed")
+
+
+@asynccontextmanager
+async def _lifespan(server: FastMCP[Any]) -> AsyncIterator[None]:
+    if config.warmup:
+        # Runs beside the stdio handshake rather than in front of it.
+        threading.Thread(target=_warm_up, name="mcp-memory-warmup", daemon=True).start()
+    exporter: MetricsExporter | None = None
+    if config.metrics and config.metrics_export:
+        exporter = MetricsExporter(
+            metrics, config.data_dir, config.metrics_export, config.metrics_interval
+        )
+        exporter.start()
+    try:
+        yield
+    finally:
+        if exporter is not None:
+            exporter.stop()
+        if config.write_behind:
+            # Queued memories would survive anyway; this just saves the next
+            # start from draining them.
+            await asyncio.to_thread(store.flush)
+
+
+mcp = FastMCP("mcp-memory", lifespan=_lifespan)
+
+T = TypeVar("T")
 
-mcp = FastMCP("mcp-memory")
+_REUSED = {
+    REUSED_EXACT: "same content already stored",
+    REUSED_SIMILAR: "near-duplicate of a stored memory",
+}
+
+
+async def _run(fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(
+        executor, functools.partial(fn, *args, **kwargs)
+    )
+    _mark_first("response")
+    return result
 
 
 @mcp.tool()
-def remember(
+async def remember(
     content: str,
     project: str | None = None,
     tags: list[str] | None = None,
@@ -35,29 +121,82 @@ def remember(
         return f"Error: importance must be 1-5, got {importance}."
 
     proj = project or config.default_project
-    memory = store.store(
-        content=content,
-        project=proj,
-        tags=tags,
-        source=source,
-        importance=importance,
+    (result,) = await _run(
+        store.store_many,
+        [
+            {
+                "content": content,
+                "project": proj,
+                "tags": tags or [],
+                "source": source,
+                "importance": importance,
+            }
+        ],
     )
+    if result.memory is None:
+        return f"Error: {result.error}"
+    memory = result.memory
 
     tag_str = f" with tags [{', '.join(memory.tags)}]" if memory.tags else ""
+    if result.reused:
+        action = f"Reused existing memory {memory.id} ({_REUSED[result.reused]})"
+    else:
+        action = f"Stored memory {memory.id}"
     return (
-        f"Stored memory {memory.id} in project '{memory.project}'{tag_str}\n"
+        f"{action} in project '{memory.project}'{tag_str}\n"
         f"Importance: {memory.importance}/5\n"
         f"Timestamp: {memory.timestamp}"
     )
 
 
 @mcp.tool()
-def recall(
+async def remember_many(
+    items: list[dict[str, Any]],
+    project: str | None = None,
+) -> str:
+    """Store many memories in one call. Embeddings are computed in batches.
+
+    Args:
+        items: Memories to store. Each item has "content" and optionally
+            "project", "tags", "source" and "importance", as in remember.
+        project: Project for items that don't set one (default: "global").
+    """
+    if not items:
+        return "Error: items cannot be empty."
+
+    results = await _run(
+        store.store_many, items, default_project=project or config.default_project
+    )
+
+    stored: list[str] = []
+    failed: list[str] = []
+    for r in results:
+        if r.memory is not None:
+            reused = f" (reused: {_REUSED[r.reused]})" if r.reused else ""
+            stored.append(
+                f"  [{r.index}] {r.memory.id} in project '{r.memory.project}'{reused}"
+            )
+        else:
+            failed.append(f"  [{r.index}] Error: {r.error}")
+
+    lines: list[str] = [f"Stored {len(stored)} of {len(results)} memories", *stored]
+    if failed:
+        lines.append(f"\n{len(failed)} items failed:")
+        lines.extend(failed)
+
+    return "\n".join(lines)
+
+
+@mcp.tool()
+async def recall(
     query: str,
     project: str | None = None,
     tags: list[str] | None = None,
     n_results: int | None = None,
     min_relevance: float | None = None,
+    rerank: bool | None = None,
+    collapse: bool = False,
+    exhaustive: bool = False,
 ) -> str:
     """Search memories by semantic similarity.
 
@@ -69,43 +208,196 @@ def recall(
         tags: Filter results to memories with these tags.
         n_results: Maximum results to return (default: 10).
         min_relevance: Minimum relevance score 0.0-1.0 to include.
+        rerank: Order by a blend of similarity, importance and recency
+            instead of similarity alone (default: server setting).
+        collapse: Show only the best matching chunk of each ingested file.
+        exhaustive: Search every project even if the server routes global
+            searches to the most promising ones.
     """
     if not query.strip():
         return "Error: query cannot be empty."
 
     n = n_results or config.max_results
-    results = store.recall(
+    results = await _run(
+        store.recall,
         query=query,
         project=project,
         tags=tags,
         n_results=n,
         min_relevance=min_relevance,
+        rerank=config.rerank if rerank is None else rerank,
+        collapse=collapse,
+        exhaustive=exhaustive,
     )
+    _mark_first("recall")
 
     if not results:
         return "No memories found matching your query."
 
-    lines: list[str] = [f"Found {len(results)} matching memories:\n"]
+    with metrics.span("recall.format"):
+        lines: list[str] = [f"Found {len(results)} matching memories:\n"]
+        lines.extend(_format_results(results))
+        return "\n".join(lines)
+
+
+@mcp.tool()
+async def recall_many(
+    queries: list[str],
+    project: str | None = None,
+    tags: list[str] | None = None,
+    n_results: int | None = None,
+    min_relevance: float | None = None,
+    rerank: bool | None = None,
+    dedup: bool = False,
+    collapse: bool = False,
+    exhaustive: bool = False,
+) -> str:
+    """Search memories for several queries in one call, e.g. different angles
+    on the same topic. Cheaper than calling recall once per query.
+
+    Args:
+        queries: Natural language search queries.
+        project: Limit search to a specific project (None = search all).
+        tags: Filter results to memories with these tags.
+        n_results: Maximum results per query (default: 10).
+        min_relevance: Minimum relevance score 0.0-1.0 to include.
+        rerank: Order by a blend of similarity, importance and recency
+            instead of similarity alone (default: server setting).
+        dedup: Show each memory only under the query it matches best.
+        collapse: Show only the best matching chunk of each ingested file.
+        exhaustive: Search every project even if the server routes global
+            searches to the most promising ones.
+    """
+    if not queries:
+        return "Error: queries cannot be empty."
+    if any(not q.strip() for q in queries):
+        return "Error: queries cannot contain empty strings."
+
+    per_query = await _run(
+        store.recall_many,
+        queries,
+        project=project,
+        tags=tags,
+        n_results=n_results or config.max_results,
+        min_relevance=min_relevance,
+        rerank=config.rerank if rerank is None else rerank,
+        dedup=dedup,
+        collapse=collapse,
+        exhaustive=exhaustive,
+    )
+    _mark_first("recall")
+
+    with metrics.span("recall.format"):
+        lines: list[str] = []
+        for query, results in zip(queries, per_query):
+            if lines:
+                lines.append("")
+            lines.append(f"=== {query!r}: {len(results)} matching memories ===")
+            lines.extend(_format_results(results))
+        return "\n".join(lines)
+
+
+def _format_results(results: list[RecallResult]) -> list[str]:
+    lines: list[str] = []
     for i, r in enumerate(results, 1):
         m = r.memory
         tag_str = f"  Tags: {', '.join(m.tags)}\n" if m.tags else ""
         source_str = f"  Source: {m.source}\n" if m.source else ""
+        chunk_str = f"  Chunk: {m.chunk} of {m.parent_id}\n" if m.parent_id else ""
+        score = f"Score: {r.score:.2f}, " if r.score is not None else ""
         lines.append(
-            f"--- [{i}] Relevance: {r.relevance_score:.2f} ---\n"
+            f"--- [{i}] {score}Relevance: {r.relevance_score:.2f} ---\n"
             f"  ID: {m.id}\n"
             f"  Project: {m.project}\n"
             f"  Content: {m.content}\n"
             f"{tag_str}"
             f"{source_str}"
+            f"{chunk_str}"
             f"  Importance: {m.importance}/5\n"
             f"  Stored: {m.timestamp}"
         )
+    return lines
+
+
+@mcp.tool()
+async def ingest_file(
+    path: str,
+    project: str | None = None,
+    tags: list[str] | None = None,
+    importance: int = 3,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> str:
+    """Store a local text file (e.g. a design doc) as overlapping chunks that
+    are recalled individually. The server reads the file itself, so its
+    content doesn't need to be sent in the request.
+
+    Args:
+        path: Path of the file on the machine running the server.
+        project: Project scope for the chunks (default: "global").
+        tags: Optional tags applied to every chunk.
+        importance: Priority 1-5 for every chunk (default: 3).
+        chunk_size: Maximum characters per chunk (default: 1000).
+        chunk_overlap: Characters each chunk repeats from the one before
+            (at most half of it; default: 200).
+    """
+    file = Path(path).expanduser()
+    if not file.is_file():
+        return f"Error: {path} is not a file."
+
+    try:
+        result = await _run(
+            store.ingest_file,
+            file,
+            project=project or config.default_project,
+            tags=tags,
+            importance=importance,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+    except (OSError, ValueError) as e:
+        return f"Error: {e}"
+
+    if result.chunks == 0:
+        return f"Nothing to store: {result.source} is empty."
+    return (
+        f"Stored {result.source} as {result.chunks} chunks "
+        f"in project '{project or config.default_project}'\n"
+        f"Parent ID: {result.parent_id}"
+    )
 
-    return "\n".join(lines)
+
+@mcp.tool()
+async def get_memory(memory_id: str) -> str:
+    """Fetch a single stored memory by its ID.
+
+    Args:
+        memory_id: The ID returned by remember, recall or list_memories.
+    """
+    if not memory_id.strip():
+        return "Error: memory_id cannot be empty."
+
+    m = await _run(store.get, memory_id)
+    if m is None:
+        return f"No memory found with ID {memory_id}."
+
+    tag_str = f"  Tags: {', '.join(m.tags)}\n" if m.tags else ""
+    source_str = f"  Source: {m.source}\n" if m.source else ""
+    chunk_str = f"  Chunk: {m.chunk} of {m.parent_id}\n" if m.parent_id else ""
+    return (
+        f"- {m.id}\n"
+        f"  Content: {m.content}\n"
+        f"  Project: {m.project}\n"
+        f"{tag_str}"
+        f"{source_str}"
+        f"{chunk_str}"
+        f"  Importance: {m.importance}/5\n"
+        f"  Stored: {m.timestamp}"
+    )
 
 
 @mcp.tool()
-def forget(
+async def forget(
     memory_ids: list[str] | None = None,
     project: str | None = None,
     tags: list[str] | None = None,
@@ -121,7 +413,9 @@ def forget(
         return "Error: specify at least one of memory_ids, project, or tags."
 
     try:
-        count, deleted = store.forget(ids=memory_ids, project=project, tags=tags)
+        count, deleted = await _run(
+            store.forget, ids=memory_ids, project=project, tags=tags
+        )
     except ValueError as e:
         return f"Error: {e}"
 
@@ -132,11 +426,12 @@ def forget(
 
 
 @mcp.tool()
-def list_memories(
+async def list_memories(
     project: str | None = None,
     tags: list[str] | None = None,
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
 ) -> str:
     """Browse and list stored memories with optional filtering.
 
@@ -145,51 +440,190 @@ def list_memories(
         tags: Filter to memories with these tags.
         page: Page number for pagination (starts at 1).
         page_size: Number of results per page (default: 20).
+        cursor: Continue after a previous page, using the "Next cursor"
+            value it returned. Takes precedence over page.
     """
     if page < 1:
         return "Error: page must be >= 1."
     if page_size < 1:
         return "Error: page_size must be >= 1."
 
-    memories, total, stats = store.list_memories(
-        project=project,
-        tags=tags,
-        page=page,
-        page_size=page_size,
-    )
+    try:
+        memories, total, stats, next_cursor = await _run(
+            store.list_memories,
+            project=project,
+            tags=tags,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        return f"Error: {e}"
 
     if total == 0:
         return "No memories stored yet."
 
-    start = (page - 1) * page_size + 1
-    end = min(start + len(memories) - 1, total)
+    if cursor:
+        header = f"Showing {len(memories)} of {total} memories (from cursor)\n"
+    else:
+        start = (page - 1) * page_size + 1
+        end = min(start + len(memories) - 1, total)
+        header = f"Showing {start}-{end} of {total} memories (page {page})\n"
 
-    lines: list[str] = [f"Showing {start}-{end} of {total} memories (page {page})\n"]
+    with metrics.span("list.format"):
+        lines: list[str] = [header]
 
-    # Project stats
-    if len(stats) > 1 or (len(stats) == 1 and project is None):
-        stat_parts = [f"{k}: {v}" for k, v in sorted(stats.items())]
-        lines.append(f"Projects: {', '.join(stat_parts)}\n")
+        # Project stats
+        if len(stats) > 1 or (len(stats) == 1 and project is None):
+            stat_parts = [f"{k}: {v}" for k, v in sorted(stats.items())]
+            lines.append(f"Projects: {', '.join(stat_parts)}\n")
 
-    for m in memories:
-        tag_str = f"  Tags: {', '.join(m.tags)}\n" if m.tags else ""
-        source_str = f"  Source: {m.source}\n" if m.source else ""
+        for m in memories:
+            tag_str = f"  Tags: {', '.join(m.tags)}\n" if m.tags else ""
+            source_str = f"  Source: {m.source}\n" if m.source else ""
+            lines.append(
+                f"- {m.id}\n"
+                f"  Content: {m.content}\n"
+                f"  Project: {m.project}\n"
+                f"{tag_str}"
+                f"{source_str}"
+                f"  Importance: {m.importance}/5\n"
+                f"  Stored: {m.timestamp}"
+            )
+
+        if next_cursor:
+            lines.append(f"\nNext cursor: {next_cursor}")
+
+        return "\n".join(lines)
+
+
+@mcp.tool()
+async def memory_stats(project: str | None = None) -> str:
+    """Summarize what is stored: counts per project and tag, an importance
+    histogram and the oldest/newest timestamps.
+
+    Args:
+        project: Limit statistics to a specific project (None = all projects).
+    """
+    stats = await _run(store.stats, project)
+
+    if stats.total == 0:
+        return "No memories stored yet."
+
+    lines: list[str] = [
+        f"{stats.total} memories in {len(stats.projects)} projects\n",
+        "Projects: "
+        + ", ".join(f"{k}: {v}" for k, v in sorted(stats.projects.items())),
+    ]
+    if stats.tags:
+        top = sorted(stats.tags.items(), key=lambda kv: (-kv[1], kv[0]))
+        lines.append("Tags: " + ", ".join(f"{k}: {v}" for k, v in top))
+    lines.append(
+        "Importance: "
+        + ", ".join(
+            f"{level}/5: {stats.importance.get(level, 0)}" for level in range(1, 6)
+        )
+    )
+    lines.append(f"Oldest: {stats.oldest}")
+    lines.append(f"Newest: {stats.newest}")
+
+    return "\n".join(lines)
+
+
+@mcp.tool()
+async def compact(min_deleted: float = DEFAULT_MIN_DELETED) -> str:
+    """Reclaim the disk space of forgotten memories: rebuild collections
+    whose search index is mostly deleted entries (stored embeddings are
+    reused, nothing is re-embedded) and vacuum the databases.
+
+    Args:
+        min_deleted: Rebuild a collection once this share of its index
+            entries (0.0-1.0) is deleted. 0.0 rebuilds any with deletions.
+    """
+    if not 0.0 <= min_deleted <= 1.0:
+        return "Error: min_deleted must be 0.0-1.0."
+
+    result = await _run(store.compact, min_deleted=min_deleted)
+    return describe(result)
+
+
+@mcp.tool()
+async def server_metrics() -> str:
+    """Show where time goes: latency per operation stage (embedding, search,
+    hydration, formatting, ...) since the server started, plus cache hit rates.
+    """
+    if not metrics.enabled:
+        return "Metrics are disabled. Set MCP_MEMORY_METRICS=1 to enable them."
+
+    snapshot = metrics.snapshot()
+    if not snapshot:
+        return "No operations recorded yet."
+
+    width = max(len(name) for name in snapshot)
+    lines: list[str] = ["Latency by stage (ms):"]
+    for name, s in snapshot.items():
         lines.append(
-            f"- {m.id}\n"
-            f"  Content: {m.content}\n"
-            f"  Project: {m.project}\n"
-            f"{tag_str}"
-            f"{source_str}"
-            f"  Importance: {m.importance}/5\n"
-            f"  Stored: {m.timestamp}"
+            f"  {name:<{width}}  count={int(s['count'])}"
+            f"  mean={s['mean'] * 1000:.2f}"
+            f"  p50={s['p50'] * 1000:.2f}"
+            f"  p95={s['p95'] * 1000:.2f}"
+            f"  p99={s['p99'] * 1000:.2f}"
+            f"  max={s['max'] * 1000:.2f}"
         )
 
+    cache = store.query_cache_info()
+    lines.append(
+        f"\nQuery embedding cache: {cache['hits']} hits, {cache['misses']} misses"
+        f" ({cache['hit_rate']:.0%} hit rate)"
+    )
+    results = store.result_cache_info()
+    lines.append(
+        f"Recall result cache: {results['hits']} hits, {results['misses']} misses"
+        f" ({results['hit_rate']:.0%} hit rate),"
+        f" {results['size']}/{results['maxsize']} entries"
+    )
+    embedded = store.embedding_cache_info()
+    if embedded is not None:
+        lines.append(
+            f"Embedding cache: {embedded['hits']} hits, {embedded['misses']} misses"
+            f" ({embedded['hit_rate']:.0%} hit rate),"
+            f" {embedded['size']}/{embedded['capacity']} entries"
+        )
     return "\n".join(lines)
 
 
+def _configure_logging() -> None:
+    logging.basicConfig(format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+    logging.getLogger("mcp_memory").setLevel(logging.INFO)
+
+
 def main() -> None:
+    _configure_logging()
     mcp.run(transport="stdio")
 
 
+def run_daemon() -> None:
+    """Serve all clients from this one process over HTTP on the daemon
+    address, sharing a single model, store and set of caches.
+
+    Every request must carry the token from the data directory, so only
+    users who can read it get in, and proxies check the identity route to
+    make sure the daemon they reached serves their data directory.
+    """
+    _configure_logging()
+
+    @mcp.custom_route(IDENTITY_PATH, methods=["GET"], include_in_schema=False)
+    async def identity(request: Request) -> JSONResponse:
+        return JSONResponse({"data_dir": str(config.data_dir.resolve())})
+
+    mcp.run(
+        transport="http",
+        host=config.daemon_host,
+        port=config.daemon_port,
+        path=MCP_PATH,
+        middleware=[Middleware(TokenAuth, token=daemon_token(config.data_dir))],
+    )
+
+
 if __name__ == "__main__":
     main()
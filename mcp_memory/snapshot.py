@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import uuid
+from collections.abc import Iterator, Sequence
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from types import TracebackType
+from typing import IO
+
+import numpy as np
+import numpy.typing as npt
+
+from mcp_memory.models import Memory
+
+FORMAT_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
+RECORDS_FILENAME = "memories.jsonl"
+VECTORS_FILENAME = "embeddings.f32"
+
+_VECTOR_DTYPE = np.dtype("<f4")
+
+
+class SnapshotWriter:
+    """Appends memories and their embeddings to a new snapshot directory.
+
+    A snapshot holds ``memories.jsonl`` (one memory per line),
+    ``embeddings.f32`` (the matching vectors as a raw little-endian float32
+    array, one row per line) and ``manifest.json``. The manifest is written
+    last, so a directory without one is an unfinished export.
+    """
+
+    def __init__(self, path: Path, model_id: str) -> None:
+        path.mkdir(parents=True, exist_ok=True)
+        if any(path.iterdir()):
+            raise ValueError(f"snapshot directory {path} is not empty")
+        self.path = path
+        self.model_id = model_id
+        self.count = 0
+        self.dim: int | None = None
+        self._records: IO[str] = (path / RECORDS_FILENAME).open("w")
+        self._vectors: IO[bytes] = (path / VECTORS_FILENAME).open("wb")
+
+    def write(self, memories: Sequence[Memory], embeddings: npt.ArrayLike) -> None:
+        if not memories:
+            return
+        vectors = np.asarray(embeddings, dtype=_VECTOR_DTYPE)
+        if vectors.shape[0] != len(memories):
+            raise ValueError("need one embedding per memory")
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"embedding size changed from {self.dim}")
+        for memory in memories:
+            self._records.write(json.dumps(asdict(memory)) + "\n")
+        self._vectors.write(vectors.tobytes())
+        self.count += len(memories)
+
+    def __enter__(self) -> SnapshotWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave no manifest behind: the snapshot is unfinished.
+            self._records.close()
+            self._vectors.close()
+
+    def close(self) -> None:
+        """Finish the snapshot by writing its manifest."""
+        self._records.close()
+        self._vectors.close()
+        manifest = {
+            "format": FORMAT_VERSION,
+            "id": str(uuid.uuid4()),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "model": self.model_id,
+            "count": self.count,
+            "dim": self.dim or 0,
+        }
+        tmp = self.path / (MANIFEST_FILENAME + ".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2) + "\n")
+        tmp.replace(self.path / MANIFEST_FILENAME)
+
+
+class SnapshotReader:
+    """Streams memories and embeddings back out of a finished snapshot."""
+
+    def __init__(self, path: Path) -> None:
+        try:
+            manifest = json.loads((path / MANIFEST_FILENAME).read_text())
+        except FileNotFoundError:
+            raise ValueError(f"{path} is not a finished snapshot") from None
+        if manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"unsupported snapshot format {manifest.get('format')!r}")
+        self.path = path
+        self.id = str(manifest["id"])
+        self.model_id = str(manifest["model"])
+        self.count = int(manifest["count"])
+        self.dim = int(manifest["dim"])
+
+    def batches(
+        self, batch_size: int, start: int = 0
+    ) -> Iterator[tuple[int, list[Memory], npt.NDArray[np.float32]]]:
+        """Yield ``(offset, memories, embeddings)`` batches, skipping the
+        first ``start`` memories. Only one batch is held in memory."""
+        if self.count == 0:
+            return
+        vectors = np.memmap(
+            self.path / VECTORS_FILENAME,
+            dtype=_VECTOR_DTYPE,
+            mode="r",
+            shape=(self.count, self.dim),
+        )
+        with (self.path / RECORDS_FILENAME).open() as records:
+            batch: list[Memory] = []
+            offset = start
+            for line_no, line in enumerate(records):
+                if line_no < start:
+                    continue
+                batch.append(Memory(**json.loads(line)))
+                if len(batch) == batch_size:
+                    yield offset, batch, np.array(vectors[offset : offset + len(batch)])
+                    offset += len(batch)
+                    batch = []
+            if batch:
+                yield offset, batch, np.array(vectors[offset : offset + len(batch)])
@@ -1,20 +1,137 @@
 from __future__ import annotations
 
+import contextlib
+import functools
+import heapq
+import logging
+import sqlite3
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import (
+    Any,
+    Callable,
+    Concatenate,
+    Iterable,
+    Iterator,
+    Mapping,
+    ParamSpec,
+    Sequence,
+    TypeVar,
+)
 
 import chromadb
+import numpy as np
+import numpy.typing as npt
+from chromadb.api import ClientAPI
+from chromadb.api.types import (
+    DefaultEmbeddingFunction,
+    Documents,
+    Embedding,
+    EmbeddingFunction,
+)
+from chromadb.errors import NotFoundError
 
-from mcp_memory.models import Memory, RecallResult
+from mcp_memory.cache import LRUCache
+from mcp_memory.chunking import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE, iter_chunks
+from mcp_memory.compaction import (
+    CHROMA_FILENAME,
+    DEFAULT_MIN_DELETED,
+    dir_size,
+    hnsw_elements,
+    remove_orphaned_segments,
+    vacuum,
+    vector_segments,
+)
+from mcp_memory.config import Config
+from mcp_memory.embedding_cache import EmbeddingCache
+from mcp_memory.embeddings import LEGACY_MODEL_ID, make_embedder, model_id
+from mcp_memory.index import (
+    INDEX_FILENAME,
+    MemoryIndex,
+    content_hash,
+    decode_cursor,
+    encode_cursor,
+)
+from mcp_memory.ingest_queue import QUEUE_FILENAME, IngestQueue
+from mcp_memory.metrics import Metrics
+from mcp_memory.models import (
+    CompactResult,
+    IngestResult,
+    Memory,
+    MemoryStats,
+    RecallResult,
+    StoreResult,
+)
+from mcp_memory.ranking import Reranker
+from mcp_memory.routing import SAMPLE_SIZE, Summary, score_summaries, summarize
+from mcp_memory.snapshot import SnapshotReader, SnapshotWriter
+
+logger = logging.getLogger(__name__)
 
 TAG_PREFIX = "tag_"
+COLLECTION_PREFIX = "memories_"
+SHARD_PREFIX = "shard_"
+UNIFIED_COLLECTION = "memories"
+# Metadata field holding the normalized project name, which the unified
+# layout filters on so projects match as loosely as collection names do.
+SCOPE_FIELD = "scope"
+# A collection being compacted is copied to COMPACT_NEW_PREFIX + name, and
+# the original renamed to COMPACT_OLD_PREFIX + name until it is dropped.
+COMPACT_NEW_PREFIX = "compact.new."
+COMPACT_OLD_PREFIX = "compact.old."
+EMBEDDER_KEY = "embedder"
+
+LAYOUT_PER_PROJECT = "per_project"
+LAYOUT_UNIFIED = "unified"
+LAYOUT_SHARDED = "sharded"
+LAYOUTS = (LAYOUT_PER_PROJECT, LAYOUT_UNIFIED, LAYOUT_SHARDED)
+
+# strftime format of the time window each shard covers, by window name
+SHARD_WINDOWS = {"month": "%Y-%m", "year": "%Y"}
+
+REUSED_EXACT = "exact"
+REUSED_SIMILAR = "similar"
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+_P = ParamSpec("_P")
+
+DEFAULT_QUERY_CACHE_SIZE = 256
+DEFAULT_RESULT_CACHE_SIZE = 256
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_QUERY_CONCURRENCY = 4
+# Candidates fetched per requested result when collapsing chunks by parent
+COLLAPSE_OVERFETCH = 3
+
+_ITEM_FIELDS = frozenset({"content", "project", "tags", "source", "importance"})
+
+
+def _safe_name(project: str) -> str:
+    return project.replace("-", "_").replace(" ", "_").lower()
 
 
 def _collection_name(project: str) -> str:
-    safe = project.replace("-", "_").replace(" ", "_").lower()
-    return f"memories_{safe}"
+    return f"{COLLECTION_PREFIX}{_safe_name(project)}"
+
+
+def _shard_name(project: str, timestamp: str, window_format: str) -> str:
+    """Collection holding ``project``'s memories from the time window that
+    ``timestamp`` falls in, e.g. ``shard_myproject.2025-06``."""
+    try:
+        when = datetime.fromisoformat(timestamp).astimezone(timezone.utc)
+    except ValueError:
+        when = datetime.now(timezone.utc)
+    return f"{SHARD_PREFIX}{_safe_name(project)}.{when.strftime(window_format)}"
+
+
+def _shard_scope(name: str) -> str:
+    """Scope key of the project a shard collection belongs to."""
+    return name[len(SHARD_PREFIX) :].rsplit(".", 1)[0]
 
 
 def _tags_to_metadata(tags: list[str]) -> dict[str, Any]:
@@ -24,6 +141,15 @@ def _tags_to_metadata(tags: list[str]) -> dict[str, Any]:
     return meta
 
 
+def _combine_where(*clauses: dict[str, Any] | None) -> dict[str, Any] | None:
+    present = [c for c in clauses if c]
+    if not present:
+        return None
+    if len(present) == 1:
+        return present[0]
+    return {"$and": present}
+
+
 def _metadata_to_tags(metadata: dict[str, Any]) -> list[str]:
     tags_str = str(metadata.get("tags", ""))
     if not tags_str:
@@ -44,24 +170,1053 @@ def _memory_from_chroma(
         source=str(metadata.get("source", "")),
         importance=int(metadata.get("importance", 3)),
         timestamp=str(metadata.get("timestamp", "")),
+        parent_id=str(metadata.get("parent_id", "")),
+        chunk=int(metadata.get("chunk", 0)),
     )
 
 
+def _new_memory(
+    content: str,
+    project: str,
+    tags: list[str],
+    source: str,
+    importance: int,
+) -> Memory:
+    return Memory(
+        id=str(uuid.uuid4()),
+        content=content,
+        project=project,
+        tags=tags,
+        source=source,
+        importance=importance,
+        timestamp=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+def _memory_to_metadata(memory: Memory) -> dict[str, Any]:
+    metadata: dict[str, Any] = {
+        "project": memory.project,
+        SCOPE_FIELD: _safe_name(memory.project),
+        "source": memory.source,
+        "importance": memory.importance,
+        "timestamp": memory.timestamp,
+    }
+    if memory.parent_id:
+        metadata["parent_id"] = memory.parent_id
+        metadata["chunk"] = memory.chunk
+    metadata.update(_tags_to_metadata(memory.tags))
+    return metadata
+
+
+def _merge_duplicate(existing: Memory, duplicate: Memory) -> Memory:
+    """Fold a restated memory into the one it duplicates: refresh the
+    timestamp, add any new tags and keep the higher importance."""
+    return replace(
+        existing,
+        tags=existing.tags + [t for t in duplicate.tags if t not in existing.tags],
+        importance=max(existing.importance, duplicate.importance),
+        timestamp=max(existing.timestamp, duplicate.timestamp),
+    )
+
+
+def _assign_to_best_query(
+    candidates: list[list[RecallResult]],
+) -> list[list[RecallResult]]:
+    """Keep each memory only in the candidate list where it is most
+    relevant, preferring the earliest list on ties."""
+    best: dict[str, tuple[float, int]] = {}
+    for q, results in enumerate(candidates):
+        for r in results:
+            current = best.get(r.memory.id)
+            if current is None or r.relevance_score > current[0]:
+                best[r.memory.id] = (r.relevance_score, q)
+    return [
+        [r for r in results if best[r.memory.id][1] == q]
+        for q, results in enumerate(candidates)
+    ]
+
+
+def _kth_relevance(
+    candidates: list[RecallResult], k: int, min_relevance: float | None
+) -> float:
+    """Relevance a new candidate has to reach to make the top ``k``."""
+    if len(candidates) < k:
+        return -1.0 if min_relevance is None else min_relevance
+    return heapq.nlargest(k, (r.relevance_score for r in candidates))[-1]
+
+
+def _collapse_by_parent(ranked: list[RecallResult]) -> list[RecallResult]:
+    """Keep only the best ranked chunk of each ingested file."""
+    seen: set[str] = set()
+    kept: list[RecallResult] = []
+    for r in ranked:
+        group = r.memory.parent_id or r.memory.id
+        if group not in seen:
+            seen.add(group)
+            kept.append(r)
+    return kept
+
+
+def _memory_from_item(item: Mapping[str, Any], default_project: str) -> Memory:
+    unknown = set(item) - _ITEM_FIELDS
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+
+    content = item.get("content")
+    if not isinstance(content, str) or not content.strip():
+        raise ValueError("content cannot be empty.")
+
+    project = item.get("project") or default_project
+    if not isinstance(project, str):
+        raise ValueError("project must be a string.")
+
+    tags = item.get("tags") or []
+    if not isinstance(tags, list) or not all(isinstance(t, str) for t in tags):
+        raise ValueError("tags must be a list of strings.")
+
+    source = item.get("source", "")
+    if not isinstance(source, str):
+        raise ValueError("source must be a string.")
+
+    importance = item.get("importance", 3)
+    if isinstance(importance, bool) or not isinstance(importance, int):
+        raise ValueError("importance must be an integer.")
+    if importance < 1 or importance > 5:
+        raise ValueError(f"importance must be 1-5, got {importance}.")
+
+    return _new_memory(content, project, tags, source, importance)
+
+
+def _timed(
+    name: str,
+) -> Callable[
+    [Callable[Concatenate[MemoryStore, _P], _R]],
+    Callable[Concatenate[MemoryStore, _P], _R],
+]:
+    """Record each call of a MemoryStore method under the span ``name``."""
+
+    def decorate(
+        fn: Callable[Concatenate[MemoryStore, _P], _R],
+    ) -> Callable[Concatenate[MemoryStore, _P], _R]:
+        @functools.wraps(fn)
+        def wrapper(self: MemoryStore, /, *args: _P.args, **kwargs: _P.kwargs) -> _R:
+            with self._metrics.span(name):
+                return fn(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+class _Catalog:
+    """In-process registry of collection handles, names, document counts and
+    routing summaries.
+
+    Lets hot paths skip Chroma catalog lookups. Cleared whenever another
+    process is seen writing to the same data directory.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.handles: dict[str, chromadb.Collection] = {}
+        self.names: set[str] | None = None
+        self.counts: dict[str, int] = {}
+        self.summaries: dict[str, Summary] | None = None
+        self.version: int | None = None
+
+    def clear(self) -> None:
+        self.handles.clear()
+        self.names = None
+        self.counts.clear()
+        self.summaries = None
+
+    def forget(self, name: str) -> None:
+        self.handles.pop(name, None)
+        self.counts.pop(name, None)
+        if self.summaries is not None:
+            self.summaries.pop(name, None)
+        if self.names is not None:
+            self.names.discard(name)
+
+
+class _Generations:
+    """Write counters that tell when cached recall results went stale.
+
+    ``total`` moves on every write and each scope remembers the ``total`` of
+    its last write, so a write to one project leaves cached results for
+    other projects valid. Writes that can't be pinned to scopes raise the
+    ``floor`` under every scope instead.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._total = 0
+        self._floor = 0
+        self._scopes: dict[str, int] = {}
+
+    def bump(self, scopes: Iterable[str]) -> None:
+        with self._lock:
+            self._total += 1
+            for scope in scopes:
+                self._scopes[scope] = self._total
+
+    def bump_all(self) -> None:
+        with self._lock:
+            self._total += 1
+            self._floor = self._total
+            self._scopes.clear()
+
+    def token(self, scope: str | None) -> int:
+        """Current generation of ``scope``, or of everything if None."""
+        with self._lock:
+            if scope is None:
+                return self._total
+            return max(self._scopes.get(scope, 0), self._floor)
+
+
 class MemoryStore:
-    def __init__(self, data_dir: Path) -> None:
-        self._client = chromadb.PersistentClient(path=str(data_dir))
+    def __init__(
+        self,
+        data_dir: Path,
+        embedding_function: EmbeddingFunction[Documents] | None = None,
+        query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE,
+        result_cache_size: int = DEFAULT_RESULT_CACHE_SIZE,
+        layout: str = LAYOUT_PER_PROJECT,
+        query_concurrency: int = DEFAULT_QUERY_CONCURRENCY,
+        metrics: Metrics | None = None,
+        dedup: bool = True,
+        dedup_threshold: float = 0.0,
+        embedding_cache_size: int = 0,
+        embedding_cache_dtype: str = "float16",
+        reranker: Reranker | None = None,
+        write_behind: bool = False,
+        write_behind_delay: float = 0.05,
+        shard_window: str = "month",
+        route_top: int = 0,
+    ) -> None:
+        if layout not in LAYOUTS:
+            raise ValueError(
+                f"layout must be one of {', '.join(LAYOUTS)}, got {layout!r}"
+            )
+        if shard_window not in SHARD_WINDOWS:
+            raise ValueError(
+                f"shard_window must be one of {', '.join(SHARD_WINDOWS)}, "
+                f"got {shard_window!r}"
+            )
+        if query_concurrency < 1:
+            raise ValueError(f"query_concurrency must be >= 1, got {query_concurrency}")
+        if route_top < 0:
+            raise ValueError(f"route_top must be >= 0, got {route_top}")
+        if embedding_cache_size < 0:
+            raise ValueError(
+                f"embedding_cache_size must be >= 0, got {embedding_cache_size}"
+            )
+        if not 0.0 <= dedup_threshold <= 1.0:
+            raise ValueError(f"dedup_threshold must be 0-1, got {dedup_threshold}")
+        self._data_dir = data_dir
+        self._layout = layout
+        self._shard_format = SHARD_WINDOWS[shard_window]
+        self._query_concurrency = query_concurrency
+        self._route_top = route_top
+        self._dedup = dedup
+        self._reranker = reranker or Reranker()
+        self._dedup_threshold = dedup_threshold
+        self._query_pool: ThreadPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+        self._embedding_function = embedding_function or DefaultEmbeddingFunction()
+        self._model_id = model_id(self._embedding_function)
+        self._query_cache: LRUCache[str, Embedding] = LRUCache(query_cache_size)
+        # Keyed on the query, the filters and the generation of the scope
+        # searched, so any write makes older entries unreachable.
+        self._result_cache: LRUCache[tuple[Any, ...], list[RecallResult]] = LRUCache(
+            result_cache_size
+        )
+        self._generations = _Generations()
+        self._metrics = metrics or Metrics(enabled=False)
+        # Opened on first use so that constructing a store is free.
+        self._client_handle: ClientAPI | None = None
+        self._index_handle: MemoryIndex | None = None
+        self._open_lock = threading.Lock()
+        self._catalog = _Catalog()
+        self._embedding_cache_size = embedding_cache_size
+        self._embedding_cache_dtype = embedding_cache_dtype
+        self._embedding_cache: EmbeddingCache | None = None
+        self._write_behind = write_behind
+        self._write_behind_delay = write_behind_delay
+        self._queue: IngestQueue | None = None
+        self._enqueue_lock = threading.Lock()
+        # Held by every write to Chroma, so compaction can hold them back.
+        self._write_lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._worker: threading.Thread | None = None
 
-    def _get_collection(self, project: str) -> chromadb.Collection:
-        return self._client.get_or_create_collection(
-            name=_collection_name(project),
-            metadata={"hnsw:space": "cosine"},
+    @classmethod
+    def from_config(
+        cls,
+        config: Config,
+        metrics: Metrics | None = None,
+        layout: str | None = None,
+    ) -> MemoryStore:
+        """The store ``config`` describes, as the server and every CLI
+        command open it. ``layout`` overrides the configured one."""
+        return cls(
+            config.data_dir,
+            embedding_function=make_embedder(
+                config.embedder, config.embed_batch, config.embed_threads
+            ),
+            query_cache_size=config.query_cache_size,
+            result_cache_size=config.result_cache_size,
+            layout=layout or config.layout,
+            shard_window=config.shard_window,
+            query_concurrency=config.query_concurrency,
+            route_top=config.route_top,
+            metrics=metrics or Metrics(enabled=config.metrics),
+            dedup=config.dedup,
+            dedup_threshold=config.dedup_threshold,
+            embedding_cache_size=config.embed_cache_size,
+            embedding_cache_dtype=config.embed_cache_dtype,
+            reranker=Reranker(
+                *config.rerank_weights,
+                half_life_days=config.rerank_half_life_days,
+                overfetch=config.rerank_overfetch,
+            ),
+            write_behind=config.write_behind,
+            write_behind_delay=config.write_behind_delay_ms / 1000,
         )
 
+    def _open(self) -> None:
+        with self._open_lock:
+            if self._index_handle is not None:
+                return
+            started = time.perf_counter()
+            self._client_handle = chromadb.PersistentClient(path=str(self._data_dir))
+            index = MemoryIndex(self._data_dir / INDEX_FILENAME)
+            if self._layout == LAYOUT_UNIFIED and index.get_meta(SCOPE_FIELD) is None:
+                self._add_scope_field()
+                self._rebuild_index(index)
+                index.set_meta(SCOPE_FIELD, "1")
+            elif self._index_is_stale(index):
+                self._rebuild_index(index)
+            self._catalog.version = index.data_version()
+            if self._embedding_cache_size:
+                self._embedding_cache = EmbeddingCache.for_model(
+                    self._data_dir,
+                    self._model_id,
+                    self._embedding_cache_size,
+                    self._embedding_cache_dtype,
+                )
+            self._index_handle = index
+            if self._write_behind:
+                self._queue = IngestQueue(self._data_dir / QUEUE_FILENAME)
+                self._worker = threading.Thread(
+                    target=self._drain_loop, name="mcp-memory-writer", daemon=True
+                )
+                self._worker.start()
+                if len(self._queue):
+                    # Left over from a previous run that didn't get to drain.
+                    self._wake.set()
+            elapsed = time.perf_counter() - started
+            self._metrics.observe("open", elapsed)
+            logger.info("opened store at %s in %.0f ms", self._data_dir, elapsed * 1000)
+
+    @property
+    def _client(self) -> ClientAPI:
+        if self._client_handle is None:
+            self._open()
+        assert self._client_handle is not None
+        return self._client_handle
+
+    @property
+    def _index(self) -> MemoryIndex:
+        if self._index_handle is None:
+            self._open()
+        assert self._index_handle is not None
+        return self._index_handle
+
+    @property
+    def _ingest_queue(self) -> IngestQueue:
+        if self._queue is None:
+            self._open()
+        assert self._queue is not None
+        return self._queue
+
+    def warm_up(self) -> None:
+        """Open the store, load the embedding model and touch every collection,
+        so the first real request doesn't pay for them."""
+        started = time.perf_counter()
+        self._open()
+        self._embedding_function(["warm up"])
+        for collection, _ in self._scopes(None):
+            self._count(collection)
+        logger.info(
+            "warm-up finished in %.0f ms", (time.perf_counter() - started) * 1000
+        )
+
+    def close(self) -> None:
+        """Write out queued memories, then release worker threads and the
+        sidecar index connection."""
+        if self._worker is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._worker.join()
+            self._worker = None
+            self._stopping.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("failed to drain the ingest queue on close")
+        with self._pool_lock:
+            if self._query_pool is not None:
+                self._query_pool.shutdown(wait=True)
+                self._query_pool = None
+        with self._open_lock:
+            if self._index_handle is not None:
+                self._index_handle.close()
+                self._index_handle = None
+            if self._embedding_cache is not None:
+                self._embedding_cache.close()
+                self._embedding_cache = None
+            if self._queue is not None:
+                self._queue.close()
+                self._queue = None
+            self._client_handle = None
+            with self._catalog.lock:
+                self._catalog.clear()
+                self._catalog.version = None
+
+    def _sync_catalog(self) -> None:
+        """Drop cached handles and counts if another process has written to
+        the data directory since we last looked."""
+        version = self._index.data_version()
+        with self._catalog.lock:
+            if version != self._catalog.version:
+                self._catalog.clear()
+                self._catalog.version = version
+                self._generations.bump_all()
+
+    def _handle(self, name: str) -> chromadb.Collection:
+        with self._catalog.lock:
+            collection = self._catalog.handles.get(name)
+        if collection is None:
+            collection = self._client.get_or_create_collection(
+                name=name,
+                metadata={"hnsw:space": "cosine", EMBEDDER_KEY: self._model_id},
+            )
+            self._check_embedder(collection)
+            with self._catalog.lock:
+                self._catalog.handles[name] = collection
+                if self._catalog.names is not None:
+                    self._catalog.names.add(name)
+        return collection
+
+    def _existing_handle(self, name: str) -> chromadb.Collection | None:
+        with self._catalog.lock:
+            collection = self._catalog.handles.get(name)
+            names = self._catalog.names
+        if collection is None:
+            if names is not None and name not in names:
+                return None
+            try:
+                collection = self._client.get_collection(name)
+            except NotFoundError:
+                return None
+            self._check_embedder(collection)
+            with self._catalog.lock:
+                self._catalog.handles[name] = collection
+        return collection
+
+    def _check_embedder(self, collection: chromadb.Collection) -> None:
+        """Refuse to mix vectors from different embedding models."""
+        metadata = collection.metadata or {}
+        recorded = metadata.get(EMBEDDER_KEY, LEGACY_MODEL_ID)
+        if recorded != self._model_id:
+            raise ValueError(
+                f"collection {collection.name!r} was built with the {recorded!r} "
+                f"embedder but {self._model_id!r} is configured; switch back to "
+                "that embedder or re-embed the collection"
+            )
+
+    def _drop_collection(self, name: str) -> None:
+        self._client.delete_collection(name)
+        self._index.drop_summary(name)
+        with self._catalog.lock:
+            self._catalog.forget(name)
+
+    def _count(self, collection: chromadb.Collection) -> int:
+        with self._catalog.lock:
+            count = self._catalog.counts.get(collection.name)
+        if count is None:
+            count = collection.count()
+            with self._catalog.lock:
+                self._catalog.counts[collection.name] = count
+        return count
+
+    def _adjust_count(self, name: str, delta: int) -> None:
+        with self._catalog.lock:
+            if name in self._catalog.counts:
+                self._catalog.counts[name] += delta
+
+    def _on_current(
+        self,
+        collection: chromadb.Collection,
+        fn: Callable[[chromadb.Collection], _R],
+        missing: _R,
+    ) -> _R:
+        """``fn(collection)``, retried once on the collection now holding its
+        name if it was dropped meanwhile (compaction swaps collections for
+        fresh copies), or ``missing`` if there is none."""
+        try:
+            return fn(collection)
+        except NotFoundError:
+            with self._catalog.lock:
+                if self._catalog.handles.get(collection.name) is collection:
+                    del self._catalog.handles[collection.name]
+            current = self._existing_handle(collection.name)
+            return missing if current is None else fn(current)
+
+    def _get_collection(self, project: str) -> chromadb.Collection:
+        return self._handle(_collection_name(project))
+
+    def _get_unified_collection(self) -> chromadb.Collection:
+        return self._handle(UNIFIED_COLLECTION)
+
+    def _target_name(self, project: str, memory: Memory) -> str:
+        """Collection a new ``memory`` in ``project`` is written to."""
+        if self._layout == LAYOUT_UNIFIED:
+            return UNIFIED_COLLECTION
+        if self._layout == LAYOUT_SHARDED:
+            return _shard_name(project, memory.timestamp, self._shard_format)
+        return _collection_name(project)
+
+    def _collection_names(self) -> set[str]:
+        with self._catalog.lock:
+            names = (
+                set(self._catalog.names) if self._catalog.names is not None else None
+            )
+        if names is None:
+            names = {c.name for c in self._client.list_collections()}
+            with self._catalog.lock:
+                self._catalog.names = set(names)
+        return names
+
     def _list_project_names(self) -> list[str]:
-        collections = self._client.list_collections()
-        prefix = "memories_"
-        return [c.name[len(prefix) :] for c in collections if c.name.startswith(prefix)]
+        prefix = COLLECTION_PREFIX
+        names = self._collection_names()
+        return sorted(n[len(prefix) :] for n in names if n.startswith(prefix))
+
+    def _shard_names(self, project: str | None) -> list[str]:
+        """Shard collections of ``project`` (None = all projects), newest
+        window first."""
+        scope = self._scope_key(project) if project else None
+        return sorted(
+            (
+                n
+                for n in self._collection_names()
+                if n.startswith(SHARD_PREFIX)
+                and (scope is None or _shard_scope(n) == scope)
+            ),
+            key=lambda n: n.rsplit(".", 1)[1],
+            reverse=True,
+        )
+
+    def _scopes(
+        self, project: str | None
+    ) -> list[tuple[chromadb.Collection, dict[str, Any] | None]]:
+        """Collections holding ``project`` (None = all projects), each paired
+        with the metadata filter that narrows it to that project."""
+        if self._layout == LAYOUT_UNIFIED:
+            where = {SCOPE_FIELD: _safe_name(project)} if project else None
+            return [(self._get_unified_collection(), where)]
+        if self._layout == LAYOUT_SHARDED:
+            return [(self._handle(n), None) for n in self._shard_names(project)]
+        projects = [project] if project else self._list_project_names()
+        return [(self._get_collection(p), None) for p in projects]
+
+    def _scope_key(self, project: str) -> str:
+        """Key ``project`` is listed under in the sidecar index."""
+        return _safe_name(project)
+
+    def _add_scope_field(self) -> None:
+        """Give unified memories stored before :data:`SCOPE_FIELD` existed
+        their normalized project."""
+        collection = self._get_unified_collection()
+        offset = 0
+        while True:
+            batch = collection.get(
+                limit=DEFAULT_BATCH_SIZE, offset=offset, include=["metadatas"]
+            )
+            ids = batch["ids"]
+            if not ids:
+                break
+            missing = [
+                (mid, dict(meta or {}))
+                for mid, meta in zip(ids, batch["metadatas"] or [])
+                if SCOPE_FIELD not in (meta or {})
+            ]
+            if missing:
+                collection.update(
+                    ids=[mid for mid, _ in missing],
+                    metadatas=[
+                        {
+                            **meta,
+                            SCOPE_FIELD: _safe_name(str(meta.get("project", "global"))),
+                        }
+                        for _, meta in missing
+                    ],
+                )
+            offset += len(ids)
+
+    def _iter_index_rows(self) -> Iterator[tuple[str, str, list[Memory]]]:
+        for collection, _ in self._scopes(None):
+            offset = 0
+            while True:
+                batch = collection.get(
+                    limit=DEFAULT_BATCH_SIZE,
+                    offset=offset,
+                    include=["metadatas", "documents"],
+                )
+                ids = batch["ids"]
+                if not ids:
+                    break
+                documents = batch["documents"] or []
+                metadatas = batch["metadatas"] or []
+                by_scope: dict[str, list[Memory]] = {}
+                for mid, document, meta in zip(ids, documents, metadatas):
+                    memory = _memory_from_chroma(mid, document, dict(meta or {}))
+                    if self._layout == LAYOUT_UNIFIED:
+                        scope = _safe_name(memory.project)
+                    elif self._layout == LAYOUT_SHARDED:
+                        scope = _shard_scope(collection.name)
+                    else:
+                        scope = collection.name[len(COLLECTION_PREFIX) :]
+                    by_scope.setdefault(scope, []).append(memory)
+                for scope, memories in by_scope.items():
+                    yield scope, collection.name, memories
+                offset += len(ids)
+
+    def _index_is_stale(self, index: MemoryIndex) -> bool:
+        """True if the index is missing, built for another layout, or out of
+        step with Chroma (e.g. after a crash between the two writes)."""
+        if index.get_meta("layout") != self._layout:
+            return True
+        indexed = index.collection_counts()
+        actual = {c.name: self._count(c) for c, _ in self._scopes(None)}
+        return {k: v for k, v in actual.items() if v} != indexed
+
+    def _rebuild_index(self, index: MemoryIndex) -> None:
+        index.rebuild(self._iter_index_rows())
+        index.set_meta("layout", self._layout)
+
+    def _embed_queries(self, queries: Sequence[str]) -> list[Embedding]:
+        """Embed queries in one model call, skipping those cached."""
+        with self._metrics.span("recall.embed"):
+            cached = [self._query_cache.get(q) for q in queries]
+            missing = list(
+                dict.fromkeys(q for q, e in zip(queries, cached) if e is None)
+            )
+            if missing:
+                fresh = dict(zip(missing, self._embedding_function(missing)))
+                for q, e in fresh.items():
+                    self._query_cache.put(q, e)
+                cached = [fresh[q] if e is None else e for q, e in zip(queries, cached)]
+        return [e for e in cached if e is not None]
+
+    def query_cache_info(self) -> dict[str, Any]:
+        """Hit/miss statistics for the recall query-embedding cache."""
+        return self._query_cache.info()
+
+    def result_cache_info(self) -> dict[str, Any]:
+        """Hit/miss statistics for the recall result cache."""
+        return self._result_cache.info()
+
+    def _embed_documents(self, documents: list[str]) -> list[Embedding]:
+        """Embed documents, taking what it can from the embedding cache."""
+        cache = self._embedding_cache
+        if cache is None:
+            with self._metrics.span("store.embed"):
+                return list(self._embedding_function(documents))
+
+        cached = cache.get_many(documents)
+        missing = [d for d, v in zip(documents, cached) if v is None]
+        if not missing:
+            return [v for v in cached if v is not None]
+        with self._metrics.span("store.embed"):
+            fresh = list(self._embedding_function(missing))
+        cache.put_many(missing, fresh)
+        computed = iter(fresh)
+        return [v if v is not None else next(computed) for v in cached]
+
+    def embedding_cache_info(self) -> dict[str, Any] | None:
+        """Hit/miss statistics for the on-disk embedding cache, if enabled."""
+        if self._embedding_cache is None:
+            return None
+        return self._embedding_cache.info()
+
+    def _add_memories(
+        self,
+        project: str,
+        memories: list[Memory],
+        embeddings: list[Embedding] | None = None,
+    ) -> None:
+        if embeddings is None:
+            embeddings = self._embed_documents([m.content for m in memories])
+        by_collection: dict[str, list[int]] = {}
+        for i, memory in enumerate(memories):
+            by_collection.setdefault(self._target_name(project, memory), []).append(i)
+        with self._write_lock:
+            for name, rows in by_collection.items():
+                group = [memories[i] for i in rows]
+                with self._metrics.span("store.write"):
+                    self._handle(name).add(
+                        ids=[m.id for m in group],
+                        embeddings=[embeddings[i] for i in rows],
+                        documents=[m.content for m in group],
+                        metadatas=[_memory_to_metadata(m) for m in group],
+                    )
+                self._adjust_count(name, len(group))
+                with self._metrics.span("store.index"):
+                    self._index.add(self._scope_key(project), name, group)
+                    self._absorb(name, [embeddings[i] for i in rows])
+            self._generations.bump([self._scope_key(project)])
+
+    def _absorb(self, name: str, embeddings: npt.ArrayLike) -> None:
+        """Fold vectors just written to collection ``name`` into its routing
+        summary. A collection that was empty gets a fresh summary; one that
+        had none is left for :meth:`_route_summaries` to build."""
+        # Without routing, summaries are left as they are: other processes
+        # may be routing with them, and is_stale() has them rebuilt once
+        # enough writes have passed them by.
+        if self._layout == LAYOUT_UNIFIED or not self._route_top:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if not len(vectors):
+            return
+
+        def update(current: Summary | None, count: int) -> Summary | None:
+            if current is not None:
+                return current.absorb(vectors)
+            if count <= len(vectors):
+                return summarize(vectors)
+            return None
+
+        summary = self._index.update_summary(name, update)
+        self._cache_summary(name, summary)
+
+    def _cache_summary(self, name: str, summary: Summary | None) -> None:
+        with self._catalog.lock:
+            if self._catalog.summaries is None:
+                return
+            if summary is None:
+                self._catalog.summaries.pop(name, None)
+            else:
+                self._catalog.summaries[name] = summary
+
+    def _route_summaries(
+        self, collections: Sequence[chromadb.Collection]
+    ) -> list[Summary | None]:
+        """The routing summary of each collection, building missing and
+        stale ones from the stored embeddings. None means the collection
+        can't be summarized right now (it is empty or being written to)."""
+        with self._catalog.lock:
+            known = self._catalog.summaries
+            if known is not None:
+                known = dict(known)
+        if known is None:
+            known = self._index.summaries()
+            with self._catalog.lock:
+                self._catalog.summaries = dict(known)
+        counts = self._index.collection_counts()
+        summaries: list[Summary | None] = []
+        for collection in collections:
+            count = counts.get(collection.name, 0)
+            summary = known.get(collection.name)
+            if count and (summary is None or summary.is_stale(count)):
+                summary = self._build_summary(collection, count)
+            summaries.append(summary if count else None)
+        return summaries
+
+    def _build_summary(
+        self, collection: chromadb.Collection, count: int
+    ) -> Summary | None:
+        """Cluster a sample of ``collection`` and absorb the rest, reading
+        the stored embeddings so nothing is re-embedded."""
+        summary: Summary | None = None
+        offset = 0
+        with self._metrics.span("recall.summarize"):
+            while True:
+                batch = collection.get(
+                    limit=SAMPLE_SIZE, offset=offset, include=["embeddings"]
+                )
+                if not batch["ids"]:
+                    break
+                vectors = np.asarray(batch["embeddings"], dtype=np.float32)
+                summary = (
+                    summarize(vectors) if summary is None else summary.absorb(vectors)
+                )
+                offset += len(batch["ids"])
+        if summary is None or offset != count:
+            return None
+        built = replace(summary, built=offset)
+
+        def update(current: Summary | None, latest: int) -> Summary | None:
+            # Members written while we were reading could be missing.
+            return built if latest == count else current
+
+        stored = self._index.update_summary(collection.name, update)
+        self._cache_summary(collection.name, stored)
+        return built if stored is built else None
+
+    def _find_similar(
+        self, project: str, embeddings: list[Embedding]
+    ) -> list[tuple[str, str] | None]:
+        """For each embedding, the ``(id, collection)`` of the closest stored
+        memory in ``project`` if it is at least ``dedup_threshold`` similar."""
+        closest: list[tuple[float, str, str] | None] = [None] * len(embeddings)
+        for collection, where in self._scopes(project):
+            if self._count(collection) == 0:
+                continue
+            with self._metrics.span("store.dedup"):
+                result = collection.query(
+                    query_embeddings=embeddings,
+                    n_results=1,
+                    where=where,
+                    include=["distances"],
+                )
+            for i, (ids, distances) in enumerate(
+                zip(result["ids"], result["distances"] or [])
+            ):
+                best = closest[i]
+                if ids and (best is None or distances[0] < best[0]):
+                    closest[i] = (distances[0], ids[0], collection.name)
+        # Cosine distance = 1 - cosine similarity
+        return [
+            (hit[1], hit[2])
+            if hit is not None and 1.0 - hit[0] >= self._dedup_threshold
+            else None
+            for hit in closest
+        ]
+
+    def _store_memories(
+        self, project: str, memories: list[Memory]
+    ) -> list[tuple[Memory, str]]:
+        """Store ``memories`` in ``project``, folding restatements into the
+        memories they duplicate instead of inserting them again.
+
+        Returns, per input, the memory now holding its content and how it was
+        deduplicated: ``""`` (stored as new), :data:`REUSED_EXACT` or
+        :data:`REUSED_SIMILAR`.
+        """
+        if not self._dedup:
+            self._add_memories(project, memories)
+            return [(m, "") for m in memories]
+
+        # Exact duplicates, of stored memories or of earlier items in the
+        # batch, are found by content hash and never reach the model.
+        hashes = [content_hash(m.content) for m in memories]
+        with self._metrics.span("store.dedup"):
+            stored = self._index.find_hashes(self._scope_key(project), hashes)
+            rows = list(set(stored.values()))
+            existing = {m.id: m for m in self._fetch_memories(rows)}
+        location = dict(rows)
+
+        targets: list[str | None] = [None] * len(memories)
+        kinds = [""] * len(memories)
+        leaders: dict[str, int] = {}
+        for i, h in enumerate(hashes):
+            if h in stored and stored[h][0] in existing:
+                targets[i], kinds[i] = stored[h][0], REUSED_EXACT
+            elif h in leaders:
+                kinds[i] = REUSED_EXACT
+            else:
+                leaders[h] = i
 
+        order = list(leaders.values())
+        embeddings = (
+            self._embed_documents([memories[i].content for i in order]) if order else []
+        )
+        if order and self._dedup_threshold:
+            similar = self._find_similar(project, embeddings)
+            hits = [t for t in similar if t is not None]
+            existing.update((m.id, m) for m in self._fetch_memories(hits))
+            location.update(hits)
+            for i, hit in zip(order, similar):
+                if hit is not None and hit[0] in existing:
+                    targets[i], kinds[i] = hit[0], REUSED_SIMILAR
+
+        # Later items in the batch follow the first item with their content.
+        for i, h in enumerate(hashes):
+            leader = leaders.get(h)
+            if leader is not None and leader != i and targets[leader] is not None:
+                targets[i], kinds[i] = targets[leader], REUSED_SIMILAR
+
+        inserted: dict[str, Memory] = {}
+        for i, h in enumerate(hashes):
+            if targets[i] is None:
+                earlier = inserted.get(h)
+                inserted[h] = (
+                    memories[i]
+                    if earlier is None
+                    else _merge_duplicate(earlier, memories[i])
+                )
+        new = [inserted[h] for h in leaders if h in inserted]
+        if new:
+            self._add_memories(
+                project,
+                new,
+                [e for i, e in zip(order, embeddings) if targets[i] is None],
+            )
+
+        updated: dict[str, Memory] = {}
+        for i, target in enumerate(targets):
+            if target is not None:
+                base = updated.get(target, existing[target])
+                updated[target] = _merge_duplicate(base, memories[i])
+        self._update_metadata(project, [(m, location[m.id]) for m in updated.values()])
+
+        return [
+            (updated[t] if t is not None else inserted[h], kind)
+            for t, h, kind in zip(targets, hashes, kinds)
+        ]
+
+    def _accept(self, project: str, memories: list[Memory]) -> list[tuple[Memory, str]]:
+        if self._write_behind:
+            return self._enqueue_memories(project, memories)
+        return self._store_memories(project, memories)
+
+    def _enqueue_memories(
+        self, project: str, memories: list[Memory]
+    ) -> list[tuple[Memory, str]]:
+        """Queue ``memories`` for the background writer instead of storing
+        them now, with the same return value as :meth:`_store_memories`.
+
+        Exact restatements are still folded in right away, so every returned
+        id is final: into stored memories through the model-free exact path,
+        into queued ones by rewriting the queued row. Near-duplicate folding
+        needs embeddings and does not apply to queued memories.
+        """
+        queue = self._ingest_queue
+        scope = self._scope_key(project)
+        hashes = [content_hash(m.content) for m in memories]
+        outcomes: list[tuple[Memory, str] | None] = [None] * len(memories)
+        with self._enqueue_lock:
+            if self._dedup:
+                stored = self._index.find_hashes(scope, hashes)
+                hits = [i for i, h in enumerate(hashes) if h in stored]
+                if hits:
+                    folded = self._store_memories(project, [memories[i] for i in hits])
+                    for i, outcome in zip(hits, folded):
+                        outcomes[i] = outcome
+
+            groups: dict[str, list[int]] = {}
+            for i, h in enumerate(hashes):
+                if outcomes[i] is None:
+                    groups.setdefault(h if self._dedup else str(i), []).append(i)
+            rows: list[tuple[str, str, str, Memory]] = []
+            for members in groups.values():
+                merged = functools.reduce(
+                    _merge_duplicate, (memories[i] for i in members)
+                )
+                h = hashes[members[0]]
+                pending = queue.find(scope, h) if self._dedup else None
+                kind = ""
+                if pending is None:
+                    rows.append((project, scope, h, merged))
+                else:
+                    seq, queued = pending
+                    merged = _merge_duplicate(queued, merged)
+                    queue.replace(seq, merged)
+                    kind = REUSED_EXACT
+                outcomes[members[0]] = (merged, kind)
+                for i in members[1:]:
+                    outcomes[i] = (merged, REUSED_EXACT)
+            queue.append(rows)
+        self._wake.set()
+        return [o for o in outcomes if o is not None]
+
+    def _drain_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            # Give a burst of writes a moment to collect into one batch.
+            if self._stopping.wait(self._write_behind_delay):
+                return
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("background write failed; will retry")
+                if self._stopping.wait(1.0):
+                    return
+                self._wake.set()
+
+    @_timed("flush")
+    def flush(self, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Write every queued memory to Chroma now and return how many were
+        written. Does nothing unless ``write_behind`` is enabled.
+
+        Rows are acknowledged only after being written, so a crash at any
+        point leaves them queued; replaying one that already reached Chroma
+        only merges its metadata into the stored memory.
+        """
+        if not self._write_behind:
+            return 0
+        queue = self._ingest_queue
+        written = 0
+        with self._flush_lock:
+            self._sync_catalog()
+            while rows := queue.peek(batch_size):
+                # Rows already written (before a crash, or re-read after
+                # being rewritten) are merged into what is stored instead.
+                located = self._index.locate([m.id for *_, m in rows])
+                stored = {m.id: m for m in self._fetch_memories(list(located.items()))}
+                new: dict[str, list[Memory]] = {}
+                seen: dict[str, list[tuple[Memory, str]]] = {}
+                for _, _, project, memory in rows:
+                    if memory.id in stored:
+                        merged = _merge_duplicate(stored[memory.id], memory)
+                        seen.setdefault(project, []).append(
+                            (merged, located[memory.id])
+                        )
+                    else:
+                        new.setdefault(project, []).append(memory)
+                for project, group in new.items():
+                    self._add_memories(project, group)
+                for project, pairs in seen.items():
+                    self._update_metadata(project, pairs)
+                # Under the enqueue lock, so a restatement arriving now either
+                # sees the memory in the index or rewrites the queued row.
+                with self._enqueue_lock:
+                    queue.ack([(seq, revision) for seq, revision, _, _ in rows])
+                written += len(rows)
+        return written
+
+    def _flush_pending(self) -> None:
+        """Make queued memories visible to a read by writing them first."""
+        if self._write_behind and len(self._ingest_queue):
+            self.flush()
+
+    def _update_metadata(
+        self, project: str, memories: list[tuple[Memory, str]]
+    ) -> None:
+        """Rewrite the metadata of stored ``(memory, collection)`` pairs,
+        leaving their content and embeddings untouched."""
+        by_collection: dict[str, list[Memory]] = {}
+        for memory, name in memories:
+            by_collection.setdefault(name, []).append(memory)
+        with self._write_lock:
+            for name, group in by_collection.items():
+                with self._metrics.span("store.write"):
+                    self._handle(name).update(
+                        ids=[m.id for m in group],
+                        metadatas=[_memory_to_metadata(m) for m in group],
+                    )
+                with self._metrics.span("store.index"):
+                    self._index.add(self._scope_key(project), name, group)
+            if memories:
+                self._generations.bump([self._scope_key(project)])
+
+    @_timed("store")
     def store(
         self,
         content: str,
@@ -70,35 +1225,128 @@ class MemoryStore:
         source: str = "",
         importance: int = 3,
     ) -> Memory:
-        memory_id = str(uuid.uuid4())
-        timestamp = datetime.now(timezone.utc).isoformat()
-        tags = tags or []
-
-        metadata: dict[str, Any] = {
-            "project": project,
-            "source": source,
-            "importance": importance,
-            "timestamp": timestamp,
-        }
-        metadata.update(_tags_to_metadata(tags))
-
-        collection = self._get_collection(project)
-        collection.add(
-            ids=[memory_id],
-            documents=[content],
-            metadatas=[metadata],
-        )
+        """Store a memory and return it. If it restates a stored memory, that
+        memory is updated and returned instead (see ``dedup``)."""
+        memory = _new_memory(content, project, tags or [], source, importance)
+        self._sync_catalog()
+        return self._accept(project, [memory])[0][0]
 
-        return Memory(
-            id=memory_id,
-            content=content,
-            project=project,
-            tags=tags,
-            source=source,
-            importance=importance,
-            timestamp=timestamp,
-        )
+    @_timed("store_many")
+    def store_many(
+        self,
+        items: Sequence[Mapping[str, Any]],
+        default_project: str = "global",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> list[StoreResult]:
+        """Store many memories with one embedding pass and one add per batch.
+
+        Items are dicts with the same fields as :meth:`store`. Invalid items
+        are reported in their ``StoreResult.error`` and skipped; the rest are
+        grouped by project and written in batches of ``batch_size``. Items
+        folded into an existing memory have ``StoreResult.reused`` set.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
 
+        self._sync_catalog()
+        results = [StoreResult(index=i) for i in range(len(items))]
+        by_project: dict[str, list[tuple[int, Memory]]] = {}
+        for i, item in enumerate(items):
+            try:
+                memory = _memory_from_item(item, default_project)
+            except ValueError as e:
+                results[i].error = str(e)
+                continue
+            by_project.setdefault(memory.project, []).append((i, memory))
+
+        for proj, entries in by_project.items():
+            for start in range(0, len(entries), batch_size):
+                batch = entries[start : start + batch_size]
+                outcomes = self._accept(proj, [m for _, m in batch])
+                for (i, _), (memory, reused) in zip(batch, outcomes):
+                    results[i].memory = memory
+                    results[i].reused = reused
+
+        return results
+
+    def _map_concurrent(
+        self, fn: Callable[[_T], _R], items: Sequence[_T]
+    ) -> Iterable[_R]:
+        """Apply ``fn`` to ``items``, up to ``query_concurrency`` at a time."""
+        if self._query_concurrency == 1 or len(items) < 2:
+            return map(fn, items)
+        with self._pool_lock:
+            if self._query_pool is None:
+                self._query_pool = ThreadPoolExecutor(
+                    max_workers=self._query_concurrency,
+                    thread_name_prefix="mcp-memory-query",
+                )
+        return self._query_pool.map(fn, items)
+
+    def _query_collection(
+        self,
+        collection: chromadb.Collection,
+        query_embeddings: list[Embedding],
+        n_results: int,
+        where: dict[str, Any] | None,
+        min_relevance: float | None,
+    ) -> list[list[RecallResult]]:
+        """Search ``collection`` for all queries in one multi-query call,
+        returning the hits of each query in order."""
+        actual_n = min(n_results, self._count(collection))
+        if actual_n < 1:
+            return [[] for _ in query_embeddings]
+
+        with self._metrics.span("recall.search"):
+            result = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=actual_n,
+                where=where,
+            )
+
+        per_query: list[list[RecallResult]] = []
+        with self._metrics.span("recall.hydrate"):
+            for q in range(len(query_embeddings)):
+                ids = result["ids"][q] if result["ids"] else []
+                documents = result["documents"][q] if result["documents"] else []
+                metadatas = result["metadatas"][q] if result["metadatas"] else []
+                distances = result["distances"][q] if result["distances"] else []
+
+                results: list[RecallResult] = []
+                for i, mid in enumerate(ids):
+                    distance = distances[i]
+                    # Cosine distance: 0 = identical, 2 = opposite
+                    # Convert to 0-1 relevance score
+                    relevance = 1.0 - (distance / 2.0)
+
+                    if min_relevance is not None and relevance < min_relevance:
+                        continue
+
+                    memory = _memory_from_chroma(mid, documents[i], dict(metadatas[i]))
+                    results.append(
+                        RecallResult(
+                            memory=memory,
+                            relevance_score=relevance,
+                            distance=distance,
+                        )
+                    )
+                per_query.append(results)
+        return per_query
+
+    @_timed("get")
+    def get(self, memory_id: str) -> Memory | None:
+        """Fetch a single memory by id, or None if it doesn't exist."""
+        self._flush_pending()
+        self._sync_catalog()
+        with self._metrics.span("get.locate"):
+            name = self._index.locate([memory_id]).get(memory_id)
+        if name is None:
+            return None
+        with self._metrics.span("get.hydrate"):
+            memories = self._fetch_memories([(memory_id, name)])
+        return memories[0] if memories else None
+
+    @_timed("recall")
     def recall(
         self,
         query: str,
@@ -106,55 +1354,216 @@ class MemoryStore:
         tags: list[str] | None = None,
         n_results: int = 10,
         min_relevance: float | None = None,
+        rerank: bool = False,
+        collapse: bool = False,
+        exhaustive: bool = False,
     ) -> list[RecallResult]:
-        projects = [project] if project else self._list_project_names()
-        if not projects:
-            return []
+        """Memories most similar to ``query``, best first.
 
-        all_results: list[RecallResult] = []
+        With ``rerank``, each collection returns ``overfetch`` times as many
+        candidates, which are then ordered by the store's :class:`Reranker`
+        blend of similarity, importance and recency. With ``collapse``, only
+        the best chunk of each ingested file is returned. With
+        ``exhaustive``, every collection is searched even when the store
+        routes queries (see ``route_top``).
 
-        for proj in projects:
-            collection = self._get_collection(proj)
-            if collection.count() == 0:
-                continue
+        Results are cached per query and filters until the next write to
+        the projects searched; see :meth:`result_cache_info`.
+        """
+        self._flush_pending()
+        self._sync_catalog()
+        scope = self._scope_key(project) if project else None
+        key = (
+            " ".join(query.split()),
+            scope,
+            tuple(sorted(set(tags or []))),
+            n_results,
+            min_relevance,
+            rerank,
+            collapse,
+            exhaustive,
+            self._generations.token(scope),
+        )
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        fetch_n = self._fetch_n(n_results, rerank, collapse)
+        (candidates,) = self._search(
+            [query], project, tags, fetch_n, min_relevance, exhaustive
+        )
+        results = self._rank(candidates, n_results, rerank, collapse)
+        self._result_cache.put(key, results)
+        return list(results)
 
-            where = self._build_tag_filter(tags)
-            actual_n = min(n_results, collection.count())
-            if actual_n < 1:
-                continue
+    def _fetch_n(self, n_results: int, rerank: bool, collapse: bool) -> int:
+        """Candidates each collection returns for ``n_results`` results."""
+        fetch_n = n_results
+        if rerank:
+            fetch_n *= self._reranker.overfetch
+        if collapse:
+            fetch_n *= COLLAPSE_OVERFETCH
+        return fetch_n
 
-            result = collection.query(
-                query_texts=[query],
-                n_results=actual_n,
-                where=where,
-            )
+    def _search(
+        self,
+        queries: Sequence[str],
+        project: str | None,
+        tags: list[str] | None,
+        fetch_n: int,
+        min_relevance: float | None,
+        exhaustive: bool = False,
+    ) -> list[list[RecallResult]]:
+        """Up to ``fetch_n`` candidates per collection for each query,
+        unordered. Queries are embedded together and each collection is
+        searched once for all of them.
+
+        With ``route_top`` set and more collections than that, each query
+        first searches the ``route_top`` collections with the closest
+        routing summaries. Any other collection is then only searched if,
+        lifted by the widest gap seen so far between a collection's closest
+        representative and its best match, it could still beat the
+        ``fetch_n``-th candidate (so all of them while there are fewer).
+        ``exhaustive`` searches everything.
+        """
+        scopes = self._scopes(project)
+        if not scopes:
+            return [[] for _ in queries]
 
-            ids = result["ids"][0] if result["ids"] else []
-            documents = result["documents"][0] if result["documents"] else []
-            metadatas = result["metadatas"][0] if result["metadatas"] else []
-            distances = result["distances"][0] if result["distances"] else []
+        # Embed once and reuse the vectors for every project collection.
+        query_embeddings = self._embed_queries(queries)
+        tag_filter = self._build_tag_filter(tags)
 
-            for i, mid in enumerate(ids):
-                distance = distances[i]
-                # Cosine distance: 0 = identical, 2 = opposite
-                # Convert to 0-1 relevance score
-                relevance = 1.0 - (distance / 2.0)
+        def search(
+            scope: tuple[chromadb.Collection, dict[str, Any] | None],
+        ) -> list[list[RecallResult]]:
+            collection, scope_filter = scope
+            return self._on_current(
+                collection,
+                lambda c: self._query_collection(
+                    c,
+                    query_embeddings,
+                    fetch_n,
+                    _combine_where(scope_filter, tag_filter),
+                    min_relevance,
+                ),
+                [[] for _ in query_embeddings],
+            )
 
-                if min_relevance is not None and relevance < min_relevance:
-                    continue
+        candidates: list[list[RecallResult]] = [[] for _ in queries]
 
-                memory = _memory_from_chroma(mid, documents[i], dict(metadatas[i]))
-                all_results.append(
-                    RecallResult(
-                        memory=memory,
-                        relevance_score=relevance,
-                        distance=distance,
-                    )
+        def run(selected: list[int]) -> dict[int, list[list[RecallResult]]]:
+            found = dict(
+                zip(
+                    selected,
+                    self._map_concurrent(search, [scopes[i] for i in selected]),
                 )
+            )
+            for per_query in found.values():
+                for bucket, results in zip(candidates, per_query):
+                    bucket.extend(results)
+            return found
+
+        if (
+            exhaustive
+            or not self._route_top
+            or self._layout == LAYOUT_UNIFIED
+            or len(scopes) <= self._route_top
+        ):
+            run(list(range(len(scopes))))
+            return candidates
+
+        with self._metrics.span("recall.route"):
+            summaries = self._route_summaries([c for c, _ in scopes])
+            known = [i for i, summary in enumerate(summaries) if summary is not None]
+            relevance = score_summaries(
+                [s for s in summaries if s is not None], query_embeddings
+            )
+            # Collections without a summary can't be ruled out.
+            first = set(range(len(scopes))) - set(known)
+            for column in relevance.T:
+                first.update(known[j] for j in np.argsort(-column)[: self._route_top])
+        searched = run(sorted(first))
 
-        all_results.sort(key=lambda r: r.relevance_score, reverse=True)
-        return all_results[:n_results]
+        # How far above its closest representative the best match of a
+        # collection can lie, judging by the collections just searched.
+        position = {i: j for j, i in enumerate(known)}
+        lift = np.zeros(len(queries))
+        for i, per_query in searched.items():
+            if i not in position:
+                continue
+            for q, results in enumerate(per_query):
+                if results:
+                    best = max(r.relevance_score for r in results)
+                    lift[q] = max(lift[q], best - relevance[position[i], q])
+        # Anything else that could still make the top ``fetch_n`` that way.
+        floors = np.array(
+            [_kth_relevance(bucket, fetch_n, min_relevance) for bucket in candidates]
+        )
+        promising = np.flatnonzero(np.any(relevance + lift >= floors, axis=1))
+        rest = [known[j] for j in promising if known[j] not in first]
+        run(rest)
+        logger.debug(
+            "routed recall searched %d of %d collections",
+            len(first) + len(rest),
+            len(scopes),
+        )
+        return candidates
 
+    def _rank(
+        self,
+        candidates: list[RecallResult],
+        n_results: int,
+        rerank: bool,
+        collapse: bool = False,
+    ) -> list[RecallResult]:
+        with self._metrics.span("recall.merge"):
+            # Collapsing drops hits, so it needs the full order to refill.
+            k = len(candidates) if collapse else n_results
+            if rerank:
+                ranked = self._reranker.rerank(candidates, k)
+            else:
+                ranked = heapq.nlargest(k, candidates, key=lambda r: r.relevance_score)
+            if collapse:
+                ranked = _collapse_by_parent(ranked)[:n_results]
+            return ranked
+
+    @_timed("recall_many")
+    def recall_many(
+        self,
+        queries: Sequence[str],
+        project: str | None = None,
+        tags: list[str] | None = None,
+        n_results: int = 10,
+        min_relevance: float | None = None,
+        rerank: bool = False,
+        dedup: bool = False,
+        collapse: bool = False,
+        exhaustive: bool = False,
+    ) -> list[list[RecallResult]]:
+        """:meth:`recall` for several queries at once, one result list per
+        query, at the cost of one embedding pass and one search per
+        collection.
+
+        With ``dedup``, a memory matching several queries is only returned
+        for the one it matches best (the earliest on ties), and each
+        collection returns extra candidates so the other lists can fill up
+        with their next best matches.
+        """
+        if not queries:
+            return []
+        self._flush_pending()
+        self._sync_catalog()
+        fetch_n = self._fetch_n(n_results, rerank, collapse)
+        if dedup:
+            fetch_n *= len(queries)
+        candidates = self._search(
+            queries, project, tags, fetch_n, min_relevance, exhaustive
+        )
+        if dedup:
+            candidates = _assign_to_best_query(candidates)
+        return [self._rank(c, n_results, rerank, collapse) for c in candidates]
+
+    @_timed("forget")
     def forget(
         self,
         ids: list[str] | None = None,
@@ -164,84 +1573,460 @@ class MemoryStore:
         if not ids and not project and not tags:
             raise ValueError("Must specify at least one of: ids, project, tags")
 
-        deleted_ids: list[str] = []
+        self._flush_pending()
+        self._sync_catalog()
+        with self._write_lock:
+            deleted_ids: list[str] = []
+            touched: set[str] = set()
 
-        if ids:
-            # Delete specific IDs -- search all projects
-            for proj in self._list_project_names():
-                collection = self._get_collection(proj)
-                existing = collection.get(ids=ids)
-                found = existing["ids"]
-                if found:
-                    collection.delete(ids=found)
-                    deleted_ids.extend(found)
-
-        elif project and not tags:
-            # Delete entire project
-            col_name = _collection_name(project)
-            try:
-                collection = self._client.get_collection(col_name)
-                all_items = collection.get()
-                deleted_ids.extend(all_items["ids"])
-                self._client.delete_collection(col_name)
-            except Exception:
-                pass
-
-        elif tags:
-            # Delete by tags, optionally scoped to project
-            projects = [project] if project else self._list_project_names()
-            where = self._build_tag_filter(tags)
-            if where:
-                for proj in projects:
-                    collection = self._get_collection(proj)
-                    matching = collection.get(where=where)
+            if ids:
+                # Delete specific IDs -- the index says which collection holds each
+                by_collection: dict[str, list[str]] = {}
+                for mid, name in self._index.locate(ids).items():
+                    by_collection.setdefault(name, []).append(mid)
+                for name, group in by_collection.items():
+                    existing = self._existing_handle(name)
+                    if existing is None:
+                        continue
+                    found = existing.get(ids=group, include=[])["ids"]
+                    if found:
+                        existing.delete(ids=found)
+                        self._adjust_count(name, -len(found))
+                        deleted_ids.extend(found)
+                touched = self._index.scopes_of(ids)
+                self._index.remove(ids)
+
+            elif project and not tags and self._layout != LAYOUT_UNIFIED:
+                # Delete entire project
+                if self._layout == LAYOUT_SHARDED:
+                    col_names = self._shard_names(project)
+                else:
+                    col_names = [_collection_name(project)]
+                for col_name in col_names:
+                    existing = self._existing_handle(col_name)
+                    if existing is not None:
+                        deleted_ids.extend(existing.get(include=[])["ids"])
+                        self._drop_collection(col_name)
+                touched = {self._scope_key(project)}
+                self._index.remove_scope(self._scope_key(project))
+
+            else:
+                # Delete by project and/or tags within the shared scopes
+                tag_filter = self._build_tag_filter(tags)
+                for collection, scope_filter in self._scopes(project):
+                    where = _combine_where(scope_filter, tag_filter)
+                    if not where:
+                        continue
+                    matching = collection.get(where=where, include=[])
                     found = matching["ids"]
                     if found:
                         collection.delete(ids=found)
+                        self._adjust_count(collection.name, -len(found))
+                        touched |= self._index.scopes_of(found)
+                        self._index.remove(found)
                         deleted_ids.extend(found)
 
+            self._generations.bump(touched)
         return len(deleted_ids), deleted_ids
 
+    @_timed("list")
     def list_memories(
         self,
         project: str | None = None,
         tags: list[str] | None = None,
         page: int = 1,
         page_size: int = 20,
-    ) -> tuple[list[Memory], int, dict[str, int]]:
-        projects = [project] if project else self._list_project_names()
-
-        all_memories: list[Memory] = []
-        project_stats: dict[str, int] = {}
+        cursor: str | None = None,
+    ) -> tuple[list[Memory], int, dict[str, int], str | None]:
+        """Return one page of memories, newest first.
 
-        where = self._build_tag_filter(tags)
+        Ordering and paging come from the sidecar index, so only the page
+        itself is read from Chroma. Pass the returned cursor back as
+        ``cursor`` to continue from where a page ended (``page`` is then
+        ignored); it is None on the last page.
+        """
+        self._flush_pending()
+        self._sync_catalog()
+        scope = self._scope_key(project) if project else None
+        after = decode_cursor(cursor) if cursor else None
 
-        for proj in projects:
-            collection = self._get_collection(proj)
-            if where:
-                result = collection.get(where=where)
+        with self._metrics.span("list.index"):
+            rows, next_after = self._index.page(
+                scope=scope,
+                tags=tags,
+                limit=page_size,
+                offset=(page - 1) * page_size,
+                after=after,
+            )
+            total = self._index.count(scope=scope, tags=tags)
+            if project:
+                project_stats = {project: total}
             else:
-                result = collection.get()
+                project_stats = self._index.scope_counts(tags=tags)
+
+        next_cursor = encode_cursor(*next_after) if next_after else None
+        with self._metrics.span("list.hydrate"):
+            memories = self._fetch_memories(rows)
+        return memories, total, project_stats, next_cursor
+
+    @_timed("stats")
+    def stats(self, project: str | None = None) -> MemoryStats:
+        """Counts, tag and importance breakdowns and the stored time range,
+        served from counters the index maintains on every write."""
+        self._flush_pending()
+        return self._index.stats(self._scope_key(project) if project else None)
+
+    def _fetch_memories(self, rows: list[tuple[str, str]]) -> list[Memory]:
+        """Load ``(id, collection)`` rows from Chroma, preserving their order."""
+        by_collection: dict[str, list[str]] = {}
+        for mid, name in rows:
+            by_collection.setdefault(name, []).append(mid)
 
-            ids = result["ids"]
+        found: dict[str, Memory] = {}
+        for name, ids in by_collection.items():
+            collection = self._existing_handle(name)
+            if collection is None:
+                continue
+            result = self._on_current(collection, lambda c: c.get(ids=ids), None)
+            if result is None:
+                continue
             documents = result["documents"] or []
             metadatas = result["metadatas"] or []
+            for i, mid in enumerate(result["ids"]):
+                found[mid] = _memory_from_chroma(mid, documents[i], dict(metadatas[i]))
+
+        return [found[mid] for mid, _ in rows if mid in found]
+
+    def migrate_to_unified(self, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Move every per-project collection into the unified collection.
+
+        Stored embeddings are copied as-is, so nothing is re-embedded. Each
+        source collection is dropped once fully copied; rows are upserted, so
+        an interrupted migration can simply be run again.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+
+        self._sync_catalog()
+        with self._write_lock:
+            target = self._get_unified_collection()
+            moved = 0
+            for proj in self._list_project_names():
+                source = self._get_collection(proj)
+                offset = 0
+                while True:
+                    batch = source.get(
+                        limit=batch_size,
+                        offset=offset,
+                        include=["documents", "metadatas", "embeddings"],
+                    )
+                    if not batch["ids"]:
+                        break
+                    target.upsert(
+                        ids=batch["ids"],
+                        embeddings=batch["embeddings"],
+                        documents=batch["documents"],
+                        # Rows stored before SCOPE_FIELD existed lack it.
+                        metadatas=[
+                            {**(meta or {}), SCOPE_FIELD: proj}
+                            for meta in batch["metadatas"] or []
+                        ],
+                    )
+                    offset += len(batch["ids"])
+                moved += offset
+                self._drop_collection(source.name)
+            with self._catalog.lock:
+                self._catalog.counts.clear()
+            self._rebuild_index(self._index)
+            self._generations.bump_all()
+        return moved
+
+    @_timed("ingest")
+    def ingest_file(
+        self,
+        path: Path,
+        project: str,
+        tags: list[str] | None = None,
+        importance: int = 3,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> IngestResult:
+        """Store a text file as overlapping chunks that share a parent id,
+        with the file path as their source.
+
+        The file is streamed and chunks are embedded and written
+        ``batch_size`` at a time, so memory use does not grow with the file.
+        Chunks skip deduplication: folding one into an unrelated memory
+        would cut it off from the rest of its file.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        if importance < 1 or importance > 5:
+            raise ValueError(f"importance must be 1-5, got {importance}")
+
+        self._flush_pending()
+        self._sync_catalog()
+        source = str(path.resolve())
+        parent_id = str(uuid.uuid4())
+        count = 0
+        batch: list[Memory] = []
+        with path.open(encoding="utf-8", errors="replace") as stream:
+            for text in iter_chunks(stream, chunk_size, chunk_overlap):
+                memory = _new_memory(
+                    text, project, list(tags or []), source, importance
+                )
+                memory.parent_id = parent_id
+                memory.chunk = count
+                batch.append(memory)
+                count += 1
+                if len(batch) == batch_size:
+                    self._add_memories(project, batch)
+                    batch = []
+        if batch:
+            self._add_memories(project, batch)
+        return IngestResult(parent_id=parent_id, source=source, chunks=count)
+
+    def export_snapshot(self, path: Path, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Write every memory with its stored embedding to a new snapshot
+        directory at ``path`` and return how many were written.
+
+        Collections are read ``batch_size`` memories at a time, so memory
+        use stays flat however large the store is.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+
+        self._flush_pending()
+        self._sync_catalog()
+        with SnapshotWriter(path, self._model_id) as writer:
+            for collection, _ in self._scopes(None):
+                offset = 0
+                while True:
+                    batch = collection.get(
+                        limit=batch_size,
+                        offset=offset,
+                        include=["documents", "metadatas", "embeddings"],
+                    )
+                    ids = batch["ids"]
+                    if not ids:
+                        break
+                    documents = batch["documents"] or []
+                    metadatas = batch["metadatas"] or []
+                    embeddings = batch["embeddings"]
+                    assert embeddings is not None
+                    writer.write(
+                        [
+                            _memory_from_chroma(mid, doc, dict(meta or {}))
+                            for mid, doc, meta in zip(ids, documents, metadatas)
+                        ],
+                        embeddings,
+                    )
+                    offset += len(ids)
+        return writer.count
+
+    def import_snapshot(self, path: Path, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Load a snapshot written by :meth:`export_snapshot`, reusing its
+        embeddings so the model is never called.
+
+        Memories keep their ids and are upserted. Progress is recorded after
+        every batch, so running an interrupted import again picks up where
+        it stopped; once finished, it starts from the top again. Returns how
+        many memories this run imported.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+
+        reader = SnapshotReader(path)
+        if reader.count and reader.model_id != self._model_id:
+            raise ValueError(
+                f"snapshot was exported with the {reader.model_id!r} embedder "
+                f"but {self._model_id!r} is configured"
+            )
+
+        # Queued writes land first; replayed after the import, they would
+        # overwrite the imported copies of the same memories.
+        self._flush_pending()
+        self._sync_catalog()
+        progress_key = f"import:{reader.id}"
+        start = int(self._index.get_meta(progress_key) or 0)
+        imported = 0
+        for offset, memories, embeddings in reader.batches(batch_size, start):
+            with self._write_lock:
+                by_target: dict[tuple[str, str], list[int]] = {}
+                for i, memory in enumerate(memories):
+                    target = self._target_name(memory.project, memory)
+                    by_target.setdefault((memory.project, target), []).append(i)
+                for (project, name), rows in by_target.items():
+                    group = [memories[i] for i in rows]
+                    with self._metrics.span("store.write"):
+                        self._handle(name).upsert(
+                            ids=[m.id for m in group],
+                            embeddings=embeddings[rows],
+                            documents=[m.content for m in group],
+                            metadatas=[_memory_to_metadata(m) for m in group],
+                        )
+                    # Upserts may replace rather than add, so recount lazily.
+                    with self._catalog.lock:
+                        self._catalog.counts.pop(name, None)
+                    with self._metrics.span("store.index"):
+                        self._index.add(self._scope_key(project), name, group)
+                        self._absorb(name, embeddings[rows])
+                    self._generations.bump([self._scope_key(project)])
+            self._index.set_meta(progress_key, str(offset + len(memories)))
+            imported += len(memories)
+        # Finished, so importing it again (e.g. to restore forgotten
+        # memories) starts over.
+        self._index.delete_meta(progress_key)
+        return imported
+
+    @_timed("compact")
+    def compact(
+        self,
+        min_deleted: float = DEFAULT_MIN_DELETED,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> CompactResult:
+        """Give back the disk space forgotten memories still take up.
+
+        Chroma only marks deleted vectors in a collection's HNSW index and
+        never removes the index files of dropped collections. This rebuilds
+        every collection whose index holds at least ``min_deleted`` deleted
+        entries (as a share of all its entries) by copying its rows,
+        embeddings included, into a fresh collection that then takes its
+        place. It also removes the orphaned index directories and vacuums
+        Chroma's SQLite database and the sidecar index.
 
-            project_stats[proj] = len(ids)
+        Runs online. Reads carry on throughout, and writes are only held
+        back while a collection that was written to during its copy is
+        copied again and swapped in. An interrupted compaction is finished
+        or rolled back by the next one.
+        """
+        if not 0.0 <= min_deleted <= 1.0:
+            raise ValueError(f"min_deleted must be 0-1, got {min_deleted}")
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
 
-            for i, mid in enumerate(ids):
-                memory = _memory_from_chroma(mid, documents[i], dict(metadatas[i]))
-                all_memories.append(memory)
+        self._flush_pending()
+        self._sync_catalog()
+        started = time.perf_counter()
+        result = CompactResult(bytes_before=dir_size(self._data_dir))
+        self._recover_compaction()
+
+        segments = vector_segments(self._data_dir)
+        for name in sorted(self._collection_names()):
+            segment = segments.get(name)
+            entries = hnsw_elements(segment) if segment is not None else None
+            if not entries:
+                continue
+            # The header is only rewritten every so many writes, so this can
+            # undercount deletions but never overcount them.
+            deleted = entries - self._client.get_collection(name).count()
+            if deleted <= 0 or deleted < min_deleted * entries:
+                continue
+            if self._rebuild_collection(name, batch_size):
+                result.rebuilt.append(name)
+            else:
+                result.skipped.append(name)
 
-        # Sort by timestamp descending (newest first)
-        all_memories.sort(key=lambda m: m.timestamp, reverse=True)
+        # Our own writes may create segment directories; hold them back.
+        with self._write_lock:
+            result.orphans = remove_orphaned_segments(self._data_dir)
+        for path in (self._data_dir / CHROMA_FILENAME, self._data_dir / INDEX_FILENAME):
+            try:
+                vacuum(path)
+            except sqlite3.OperationalError as e:
+                logger.warning("could not vacuum %s: %s", path.name, e)
+            else:
+                result.vacuumed.append(path.name)
+        result.bytes_after = dir_size(self._data_dir)
+        result.seconds = time.perf_counter() - started
+        logger.info(
+            "compacted %s: %d bytes reclaimed in %.0f ms",
+            self._data_dir,
+            result.reclaimed,
+            result.seconds * 1000,
+        )
+        return result
+
+    def _write_marks(self) -> tuple[int, int]:
+        """Changes whenever this or another process writes."""
+        return self._generations.token(None), self._index.data_version()
+
+    def _rebuild_collection(self, name: str, batch_size: int) -> bool:
+        """Swap collection ``name`` for a fresh copy of itself. Returns False
+        if another process kept writing to it."""
+        copy = COMPACT_NEW_PREFIX + name
+        # Copy without holding back writes first; if any landed meanwhile,
+        # copy again while holding them back.
+        for lock in (contextlib.nullcontext(), self._write_lock):
+            with lock:
+                before = self._write_marks()
+                self._copy_collection(name, copy, batch_size)
+                with self._write_lock:
+                    if self._write_marks() == before:
+                        self._swap_collection(name, copy)
+                        return True
+                self._client.delete_collection(copy)
+        return False
+
+    def _copy_collection(self, name: str, copy: str, batch_size: int) -> None:
+        source = self._client.get_collection(name)
+        with contextlib.suppress(NotFoundError):
+            self._client.delete_collection(copy)
+        target = self._client.create_collection(copy, metadata=source.metadata)
+        offset = 0
+        while True:
+            batch = source.get(
+                limit=batch_size,
+                offset=offset,
+                include=["documents", "metadatas", "embeddings"],
+            )
+            if not batch["ids"]:
+                break
+            target.add(
+                ids=batch["ids"],
+                embeddings=batch["embeddings"],
+                documents=batch["documents"],
+                metadatas=batch["metadatas"],
+            )
+            offset += len(batch["ids"])
 
-        total = len(all_memories)
-        start = (page - 1) * page_size
-        end = start + page_size
-        page_memories = all_memories[start:end]
+    def _swap_collection(self, name: str, copy: str) -> None:
+        # Renamed rather than dropped first, so the name never goes missing.
+        # A search still holding the old handle fails once it is deleted
+        # and is retried on the copy (see _on_current).
+        retired = COMPACT_OLD_PREFIX + name
+        self._client.get_collection(name).modify(name=retired)
+        self._client.get_collection(copy).modify(name=name)
+        with self._catalog.lock:
+            self._catalog.handles.pop(name, None)
+        self._client.delete_collection(retired)
+        # Tells other processes to drop their handles to the old collection.
+        self._index.set_meta("compacted", datetime.now(timezone.utc).isoformat())
 
-        return page_memories, total, project_stats
+    def _recover_compaction(self) -> None:
+        """Finish or undo a compaction that was interrupted: a complete copy
+        takes the place of an original already renamed away, and anything
+        else left over is dropped."""
+        names = {c.name for c in self._client.list_collections()}
+        restored = False
+        for prefix in (COMPACT_NEW_PREFIX, COMPACT_OLD_PREFIX):
+            for leftover in sorted(n for n in names if n.startswith(prefix)):
+                original = leftover[len(prefix) :]
+                if original in names:
+                    self._client.delete_collection(leftover)
+                else:
+                    self._client.get_collection(leftover).modify(name=original)
+                    names.add(original)
+                    restored = True
+                names.discard(leftover)
+        with self._catalog.lock:
+            self._catalog.clear()
+        # Opening the store while the collection was renamed away will have
+        # dropped its rows from the index.
+        if restored and self._index_is_stale(self._index):
+            self._rebuild_index(self._index)
+            self._generations.bump_all()
 
     @staticmethod
     def _build_tag_filter(
@@ -4,7 +4,7 @@ from pathlib import Path
 
 import pytest
 
-from mcp_memory.storage import MemoryStore
+from mcp_memory.storage import LAYOUT_UNIFIED, MemoryStore
 
 
 @pytest.fixture()
@@ -20,7 +20,11 @@ def store(data_dir: Path) -> MemoryStore:
 
 
 @pytest.fixture()
-def populated_store(store: MemoryStore) -> MemoryStore:
+def unified_store(data_dir: Path) -> MemoryStore:
+    return MemoryStore(data_dir, layout=LAYOUT_UNIFIED)
+
+
+def _populate(store: MemoryStore) -> MemoryStore:
     store.store("Python is great for scripting", project="dev", tags=["python", "lang"])
     store.store("Rust is fast and safe", project="dev", tags=["rust", "lang"])
     store.store(
@@ -31,3 +35,13 @@ def populated_store(store: MemoryStore) -> MemoryStore:
     )
     store.store("Always write tests before shipping", project="dev", tags=["testing"])
     return store
+
+
+@pytest.fixture()
+def populated_store(store: MemoryStore) -> MemoryStore:
+    return _populate(store)
+
+
+@pytest.fixture()
+def populated_unified_store(unified_store: MemoryStore) -> MemoryStore:
+    return _populate(unified_store)
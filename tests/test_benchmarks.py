@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks import compact
+from benchmarks.common import summarize
+from benchmarks.corpus import generate_corpus, project_names
+from benchmarks.run import main
+
+
+class TestCorpus:
+    def test_same_seed_same_corpus(self) -> None:
+        assert generate_corpus(50, 5, seed=1) == generate_corpus(50, 5, seed=1)
+        assert generate_corpus(50, 5, seed=1) != generate_corpus(50, 5, seed=2)
+
+    def test_spreads_over_projects(self) -> None:
+        items = generate_corpus(500, 10, seed=0)
+        assert len(items) == 500
+        assert {i["project"] for i in items} == set(project_names(10))
+        assert all(1 <= i["importance"] <= 5 for i in items)
+
+
+class TestRunner:
+    def test_summarize(self) -> None:
+        s = summarize([0.001, 0.002, 0.003, 0.004], items=40)
+        assert s["count"] == 4
+        assert s["p50_ms"] == 2.5
+        assert s["ops_per_sec"] == 400.0
+        assert s["items_per_sec"] == 4000.0
+
+    def test_writes_report(self, tmp_path: Path) -> None:
+        out = tmp_path / "bench.json"
+        main(["--sizes", "30", "--projects", "3", "--ops", "3", "--output", str(out)])
+        report = json.loads(out.read_text())
+        assert report["meta"]["embedding"] == "hash"
+        (run,) = report["runs"]
+        assert (run["size"], run["projects"]) == (30, 3)
+        for name in ("store_many", "recall_global", "forget_id", "tool_recall"):
+            assert run["operations"][name]["count"] > 0
+            assert run["operations"][name]["p99_ms"] >= 0
+
+
+class TestCompactBenchmark:
+    def test_quantize_and_scan(self) -> None:
+        vectors = np.random.default_rng(0).standard_normal((300, 16))
+        full, _ = compact.quantize(vectors, "float32")
+        for mode in ("float16", "int8"):
+            rows, scales = compact.quantize(vectors, mode)
+            assert rows.dtype == np.dtype(mode)
+            top = compact.scan(rows, scales, full[7], 5)
+            assert top[0] == 7 and len(top) == 5
+        assert compact.bytes_per_vector(384, "int8") == 388
+
+    def test_recall_at_k(self) -> None:
+        assert compact.recall_at_k([["a", "b"], []], [["b", "c"], ["d"]]) == 0.5
+        assert compact.recall_at_k([], []) == 1.0
+
+    def test_writes_report(self, tmp_path: Path) -> None:
+        out = tmp_path / "compact.json"
+        compact.main(
+            ["--sizes", "60", "--queries", "5", "--k", "3", "--output", str(out)]
+        )
+        (run,) = json.loads(out.read_text())["runs"]
+        assert set(run["modes"]) == {"float32", "float16", "int8"}
+        int8 = run["modes"]["int8"]
+        assert int8["saved_ratio"] > 0.7
+        assert 0.0 <= int8["recall_at_k"] <= 1.0
+        assert int8["scan"]["count"] == 5
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+
+from mcp_memory.chunking import iter_chunks
+
+
+def _chunks(text: str, size: int, overlap: int) -> list[str]:
+    return list(iter_chunks(io.StringIO(text), size, overlap))
+
+
+class TestIterChunks:
+    def test_short_text_is_one_chunk(self) -> None:
+        assert _chunks("  hello world \n", 100, 10) == ["hello world"]
+
+    def test_blank_text_has_no_chunks(self) -> None:
+        assert _chunks("", 100, 10) == []
+        assert _chunks(" \n\n  ", 100, 10) == []
+
+    def test_chunks_are_bounded_and_cover_text(self) -> None:
+        words = [f"word{i}" for i in range(500)]
+        chunks = _chunks(" ".join(words), 120, 30)
+        assert len(chunks) > 1
+        assert all(len(c) <= 120 for c in chunks)
+        # Every word survives whole in some chunk.
+        seen = {w for c in chunks for w in c.split()}
+        assert seen == set(words)
+
+    def test_consecutive_chunks_overlap(self) -> None:
+        text = " ".join(f"w{i}" for i in range(200))
+        chunks = _chunks(text, 100, 40)
+        for before, after in zip(chunks, chunks[1:]):
+            assert after.split()[0] in before.split()
+
+    def test_no_overlap(self) -> None:
+        text = " ".join(f"w{i}" for i in range(200))
+        chunks = _chunks(text, 100, 0)
+        assert " ".join(chunks).split() == text.split()
+
+    def test_large_overlap_still_moves_on(self) -> None:
+        text = " ".join(f"word{i}" for i in range(15000))
+        for size, overlap in ((300, 200), (1000, 700), (100, 99)):
+            chunks = _chunks(text, size, overlap)
+            # Each chunk starts at least half a chunk after the last.
+            assert len(chunks) <= 2 * len(text) / (size // 2) + 1
+            seen = {w for c in chunks for w in c.split()}
+            assert seen == set(text.split())
+
+    def test_prefers_paragraph_breaks(self) -> None:
+        text = "first paragraph here.\n\nsecond one, a bit longer than that."
+        chunks = _chunks(text, 40, 0)
+        assert chunks[0] == "first paragraph here."
+
+    def test_unbroken_text_is_cut_at_size(self) -> None:
+        chunks = _chunks("x" * 250, 100, 0)
+        assert chunks == ["x" * 100, "x" * 100, "x" * 50]
+
+    def test_invalid_arguments(self) -> None:
+        with pytest.raises(ValueError, match="size"):
+            _chunks("text", 0, 0)
+        with pytest.raises(ValueError, match="overlap"):
+            _chunks("text", 10, 10)
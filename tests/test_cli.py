@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mcp_memory.cli import main
+from mcp_memory.storage import LAYOUT_UNIFIED, MemoryStore
+
+
+def test_migrate_command(
+    data_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(data_dir))
+    monkeypatch.delenv("MCP_MEMORY_LAYOUT", raising=False)
+    store = MemoryStore(data_dir)
+    store.store("first", project="a")
+    store.store("second", project="b")
+
+    with patch.object(
+        MemoryStore, "close", autospec=True, side_effect=MemoryStore.close
+    ) as close:
+        main(["migrate"])
+    close.assert_called_once()
+    out = capsys.readouterr().out
+    assert "Migrated 2 memories" in out
+    assert "MCP_MEMORY_LAYOUT=unified" in out
+
+    _, total, stats, _ = MemoryStore(data_dir, layout=LAYOUT_UNIFIED).list_memories()
+    assert total == 2
+    assert stats == {"a": 1, "b": 1}
+
+
+def test_export_import_commands(
+    data_dir: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(data_dir))
+    monkeypatch.delenv("MCP_MEMORY_LAYOUT", raising=False)
+    store = MemoryStore(data_dir)
+    store.store("first", project="a")
+    store.store("second", project="b")
+    store.close()
+
+    snapshot = tmp_path / "snapshot"
+    main(["export", str(snapshot)])
+    assert f"Exported 2 memories to {snapshot}" in capsys.readouterr().out
+
+    target = tmp_path / "target"
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(target))
+    main(["import", str(snapshot), "--batch-size", "1"])
+    assert f"Imported 2 memories from {snapshot}" in capsys.readouterr().out
+    assert MemoryStore(target).stats().total == 2
+
+
+def test_compact_command(
+    data_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(data_dir))
+    monkeypatch.delenv("MCP_MEMORY_LAYOUT", raising=False)
+    store = MemoryStore(data_dir)
+    store.store("kept", project="a")
+    store.store("dropped", project="b")
+    store.forget(project="b")
+    store.close()
+
+    main(["compact", "--min-deleted", "0.5"])
+    out = capsys.readouterr().out
+    assert "reclaimed" in out
+    assert "Vacuumed chroma.sqlite3" in out
+    assert MemoryStore(data_dir).stats().total == 1
+
+    with pytest.raises(SystemExit):
+        main(["compact", "--min-deleted", "2"])
+
+
+def test_commands_apply_full_config(
+    data_dir: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(data_dir))
+    monkeypatch.delenv("MCP_MEMORY_LAYOUT", raising=False)
+    monkeypatch.setenv("MCP_MEMORY_ROUTE_TOP", "2")
+    monkeypatch.setenv("MCP_MEMORY_WRITE_BEHIND", "1")
+    monkeypatch.setenv("MCP_MEMORY_DEDUP", "0")
+    MemoryStore(data_dir).store("first", project="a")
+
+    for command in (
+        ["compact"],
+        ["export", str(tmp_path / "snapshot")],
+        ["import", str(tmp_path / "snapshot")],
+        ["migrate"],
+    ):
+        with patch.object(
+            MemoryStore, "close", autospec=True, side_effect=MemoryStore.close
+        ) as close:
+            main(command)
+        store = close.call_args.args[0]
+        assert store._route_top == 2
+        assert store._write_behind
+        assert not store._dedup
+    capsys.readouterr()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import uuid
+from pathlib import Path
+from unittest.mock import patch
+
+from mcp_memory import compaction
+from mcp_memory.compaction import (
+    _HNSW_HEADER,
+    CHROMA_FILENAME,
+    describe,
+    dir_size,
+    format_bytes,
+    hnsw_elements,
+    remove_orphaned_segments,
+)
+from mcp_memory.models import CompactResult
+
+
+def test_dir_size(tmp_path: Path) -> None:
+    (tmp_path / "a").write_bytes(b"x" * 10)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b").write_bytes(b"x" * 5)
+    assert dir_size(tmp_path) == 15
+
+
+def test_hnsw_elements(tmp_path: Path) -> None:
+    assert hnsw_elements(tmp_path) is None
+    header = tmp_path / "header.bin"
+    header.write_bytes(_HNSW_HEADER.pack(1, 0, 2000, 1234) + b"rest")
+    assert hnsw_elements(tmp_path) == 1234
+    # Unknown format versions and truncated files are not guessed at.
+    header.write_bytes(_HNSW_HEADER.pack(2, 0, 2000, 1234))
+    assert hnsw_elements(tmp_path) is None
+    header.write_bytes(b"\x01\x00")
+    assert hnsw_elements(tmp_path) is None
+
+
+def _segment_dir(data_dir: Path, age: float = 60.0) -> Path:
+    segment = data_dir / str(uuid.uuid4())
+    segment.mkdir()
+    (segment / "header.bin").write_bytes(b"x")
+    past = segment.stat().st_mtime - age
+    for path in (segment / "header.bin", segment):
+        os.utime(path, (past, past))
+    return segment
+
+
+def _register(data_dir: Path, *segments: Path) -> None:
+    conn = sqlite3.connect(data_dir / CHROMA_FILENAME)
+    with conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS collections (id TEXT, name TEXT)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS segments (id TEXT, scope TEXT, collection TEXT)"
+        )
+        for segment in segments:
+            conn.execute(
+                "INSERT INTO segments VALUES (?, 'VECTOR', 'c')", (segment.name,)
+            )
+    conn.close()
+
+
+class TestRemoveOrphanedSegments:
+    def test_removes_only_unknown_segments(self, tmp_path: Path) -> None:
+        live, orphan = _segment_dir(tmp_path), _segment_dir(tmp_path)
+        (tmp_path / "not-a-segment").mkdir()
+        _register(tmp_path, live)
+        assert remove_orphaned_segments(tmp_path) == 1
+        assert live.exists() and not orphan.exists()
+        assert (tmp_path / "not-a-segment").exists()
+
+    def test_keeps_segment_registered_meanwhile(self, tmp_path: Path) -> None:
+        segment = _segment_dir(tmp_path)
+        _register(tmp_path)
+        read = compaction._read_segments
+        calls = 0
+
+        def register_after_first_read(
+            data_dir: Path,
+        ) -> list[tuple[str, str, str | None]]:
+            nonlocal calls
+            calls += 1
+            if calls == 2:
+                _register(tmp_path, segment)
+            return read(data_dir)
+
+        with patch.object(compaction, "_read_segments", register_after_first_read):
+            assert remove_orphaned_segments(tmp_path) == 0
+        assert segment.exists()
+
+    def test_keeps_recently_written_segment(self, tmp_path: Path) -> None:
+        segment = _segment_dir(tmp_path, age=-5.0)
+        _register(tmp_path)
+        assert remove_orphaned_segments(tmp_path) == 0
+        assert segment.exists()
+
+
+def test_format_bytes() -> None:
+    assert format_bytes(512) == "512 B"
+    assert format_bytes(2048) == "2.0 KB"
+    assert format_bytes(3 * 1024**3) == "3.0 GB"
+
+
+def test_describe() -> None:
+    result = CompactResult(
+        bytes_before=10 * 1024**2,
+        bytes_after=2 * 1024**2,
+        seconds=1.5,
+        rebuilt=["memories_a"],
+        orphans=2,
+        vacuumed=["chroma.sqlite3"],
+    )
+    text = describe(result)
+    assert "reclaimed 8.0 MB (10.0 MB -> 2.0 MB)" in text
+    assert "Rebuilt 1 collection(s): memories_a" in text
+    assert "Removed 2 index directories" in text
+    assert "Skipped" not in text
+    assert "No collection needed rebuilding." in describe(CompactResult())
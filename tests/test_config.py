@@ -46,3 +46,236 @@ def test_negative_max_results(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -
 
     with pytest.raises(ValueError, match="must be >= 1"):
         Config.from_env()
+
+
+def test_query_cache_size(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_QUERY_CACHE_SIZE", raising=False)
+    assert Config.from_env().query_cache_size == 256
+
+    monkeypatch.setenv("MCP_MEMORY_QUERY_CACHE_SIZE", "0")
+    assert Config.from_env().query_cache_size == 0
+
+    monkeypatch.setenv("MCP_MEMORY_QUERY_CACHE_SIZE", "-1")
+    with pytest.raises(ValueError, match="must be >= 0"):
+        Config.from_env()
+
+
+def test_result_cache_size(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_RESULT_CACHE_SIZE", raising=False)
+    assert Config.from_env().result_cache_size == 256
+
+    monkeypatch.setenv("MCP_MEMORY_RESULT_CACHE_SIZE", "0")
+    assert Config.from_env().result_cache_size == 0
+
+
+def test_layout(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_LAYOUT", raising=False)
+    assert Config.from_env().layout == "per_project"
+
+    monkeypatch.setenv("MCP_MEMORY_LAYOUT", "unified")
+    assert Config.from_env().layout == "unified"
+
+    monkeypatch.setenv("MCP_MEMORY_LAYOUT", "sharded")
+    assert Config.from_env().layout == "sharded"
+
+    monkeypatch.setenv("MCP_MEMORY_LAYOUT", "striped")
+    with pytest.raises(ValueError, match="MCP_MEMORY_LAYOUT"):
+        Config.from_env()
+
+
+def test_shard_window(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_SHARD_WINDOW", raising=False)
+    assert Config.from_env().shard_window == "month"
+
+    monkeypatch.setenv("MCP_MEMORY_SHARD_WINDOW", "year")
+    assert Config.from_env().shard_window == "year"
+
+    monkeypatch.setenv("MCP_MEMORY_SHARD_WINDOW", "week")
+    with pytest.raises(ValueError, match="MCP_MEMORY_SHARD_WINDOW"):
+        Config.from_env()
+
+
+def test_route_top(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_ROUTE_TOP", raising=False)
+    assert Config.from_env().route_top == 0
+
+    monkeypatch.setenv("MCP_MEMORY_ROUTE_TOP", "3")
+    assert Config.from_env().route_top == 3
+
+    monkeypatch.setenv("MCP_MEMORY_ROUTE_TOP", "-1")
+    with pytest.raises(ValueError, match="MCP_MEMORY_ROUTE_TOP must be >= 0"):
+        Config.from_env()
+
+
+def test_concurrency_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_WORKERS", raising=False)
+    monkeypatch.delenv("MCP_MEMORY_QUERY_CONCURRENCY", raising=False)
+    cfg = Config.from_env()
+    assert cfg.worker_threads == 4
+    assert cfg.query_concurrency == 4
+
+    monkeypatch.setenv("MCP_MEMORY_WORKERS", "8")
+    monkeypatch.setenv("MCP_MEMORY_QUERY_CONCURRENCY", "2")
+    cfg = Config.from_env()
+    assert cfg.worker_threads == 8
+    assert cfg.query_concurrency == 2
+
+    monkeypatch.setenv("MCP_MEMORY_QUERY_CONCURRENCY", "0")
+    with pytest.raises(ValueError, match="MCP_MEMORY_QUERY_CONCURRENCY must be >= 1"):
+        Config.from_env()
+
+
+def test_warmup(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_WARMUP", raising=False)
+    assert Config.from_env().warmup is True
+
+    monkeypatch.setenv("MCP_MEMORY_WARMUP", "0")
+    assert Config.from_env().warmup is False
+
+    monkeypatch.setenv("MCP_MEMORY_WARMUP", "true")
+    assert Config.from_env().warmup is True
+
+
+def test_metrics_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_METRICS", raising=False)
+    monkeypatch.delenv("MCP_MEMORY_METRICS_EXPORT", raising=False)
+    monkeypatch.delenv("MCP_MEMORY_METRICS_INTERVAL", raising=False)
+    cfg = Config.from_env()
+    assert cfg.metrics is True
+    assert cfg.metrics_export == ""
+    assert cfg.metrics_interval == 60
+
+    monkeypatch.setenv("MCP_MEMORY_METRICS", "off")
+    monkeypatch.setenv("MCP_MEMORY_METRICS_EXPORT", "jsonl")
+    monkeypatch.setenv("MCP_MEMORY_METRICS_INTERVAL", "5")
+    cfg = Config.from_env()
+    assert cfg.metrics is False
+    assert cfg.metrics_export == "jsonl"
+    assert cfg.metrics_interval == 5
+
+    monkeypatch.setenv("MCP_MEMORY_METRICS_EXPORT", "statsd")
+    with pytest.raises(ValueError, match="MCP_MEMORY_METRICS_EXPORT"):
+        Config.from_env()
+
+
+def test_embedder_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_EMBEDDER", raising=False)
+    monkeypatch.delenv("MCP_MEMORY_EMBED_BATCH", raising=False)
+    monkeypatch.delenv("MCP_MEMORY_EMBED_THREADS", raising=False)
+    cfg = Config.from_env()
+    assert (cfg.embedder, cfg.embed_batch, cfg.embed_threads) == ("default", 32, 0)
+
+    monkeypatch.setenv("MCP_MEMORY_EMBEDDER", "onnx-int8")
+    monkeypatch.setenv("MCP_MEMORY_EMBED_BATCH", "8")
+    monkeypatch.setenv("MCP_MEMORY_EMBED_THREADS", "2")
+    cfg = Config.from_env()
+    assert (cfg.embedder, cfg.embed_batch, cfg.embed_threads) == ("onnx-int8", 8, 2)
+
+    monkeypatch.setenv("MCP_MEMORY_EMBEDDER", "word2vec")
+    with pytest.raises(ValueError, match="MCP_MEMORY_EMBEDDER"):
+        Config.from_env()
+
+    monkeypatch.setenv("MCP_MEMORY_EMBEDDER", "hash")
+    monkeypatch.setenv("MCP_MEMORY_EMBED_BATCH", "0")
+    with pytest.raises(ValueError, match="MCP_MEMORY_EMBED_BATCH must be >= 1"):
+        Config.from_env()
+
+
+def test_dedup_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_DEDUP", raising=False)
+    monkeypatch.delenv("MCP_MEMORY_DEDUP_THRESHOLD", raising=False)
+    cfg = Config.from_env()
+    assert cfg.dedup is True
+    assert cfg.dedup_threshold == 0.0
+
+    monkeypatch.setenv("MCP_MEMORY_DEDUP", "0")
+    monkeypatch.setenv("MCP_MEMORY_DEDUP_THRESHOLD", "0.95")
+    cfg = Config.from_env()
+    assert cfg.dedup is False
+    assert cfg.dedup_threshold == 0.95
+
+    monkeypatch.setenv("MCP_MEMORY_DEDUP_THRESHOLD", "1.5")
+    with pytest.raises(ValueError, match="MCP_MEMORY_DEDUP_THRESHOLD must be"):
+        Config.from_env()
+
+
+def test_embed_cache_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_EMBED_CACHE_SIZE", raising=False)
+    monkeypatch.delenv("MCP_MEMORY_EMBED_CACHE_DTYPE", raising=False)
+    cfg = Config.from_env()
+    assert (cfg.embed_cache_size, cfg.embed_cache_dtype) == (50_000, "float16")
+
+    monkeypatch.setenv("MCP_MEMORY_EMBED_CACHE_SIZE", "0")
+    monkeypatch.setenv("MCP_MEMORY_EMBED_CACHE_DTYPE", "float32")
+    cfg = Config.from_env()
+    assert (cfg.embed_cache_size, cfg.embed_cache_dtype) == (0, "float32")
+
+    monkeypatch.setenv("MCP_MEMORY_EMBED_CACHE_DTYPE", "int4")
+    with pytest.raises(ValueError, match="MCP_MEMORY_EMBED_CACHE_DTYPE"):
+        Config.from_env()
+
+
+def test_rerank_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    for name in ("", "_WEIGHTS", "_HALF_LIFE_DAYS", "_OVERFETCH"):
+        monkeypatch.delenv(f"MCP_MEMORY_RERANK{name}", raising=False)
+    cfg = Config.from_env()
+    assert cfg.rerank is False
+    assert cfg.rerank_weights == (0.7, 0.2, 0.1)
+    assert cfg.rerank_half_life_days == 30.0
+    assert cfg.rerank_overfetch == 3
+
+    monkeypatch.setenv("MCP_MEMORY_RERANK", "1")
+    monkeypatch.setenv("MCP_MEMORY_RERANK_WEIGHTS", "0.5,0.25,0.25")
+    monkeypatch.setenv("MCP_MEMORY_RERANK_HALF_LIFE_DAYS", "7")
+    monkeypatch.setenv("MCP_MEMORY_RERANK_OVERFETCH", "5")
+    cfg = Config.from_env()
+    assert cfg.rerank is True
+    assert cfg.rerank_weights == (0.5, 0.25, 0.25)
+    assert cfg.rerank_half_life_days == 7.0
+    assert cfg.rerank_overfetch == 5
+
+    monkeypatch.setenv("MCP_MEMORY_RERANK_WEIGHTS", "1,2")
+    with pytest.raises(ValueError, match="MCP_MEMORY_RERANK_WEIGHTS"):
+        Config.from_env()
+
+
+def test_daemon_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_DAEMON_HOST", raising=False)
+    monkeypatch.delenv("MCP_MEMORY_DAEMON_PORT", raising=False)
+    cfg = Config.from_env()
+    assert (cfg.daemon_host, cfg.daemon_port) == ("127.0.0.1", 7411)
+
+    monkeypatch.setenv("MCP_MEMORY_DAEMON_HOST", "localhost")
+    monkeypatch.setenv("MCP_MEMORY_DAEMON_PORT", "9000")
+    cfg = Config.from_env()
+    assert (cfg.daemon_host, cfg.daemon_port) == ("localhost", 9000)
+
+    monkeypatch.setenv("MCP_MEMORY_DAEMON_PORT", "70000")
+    with pytest.raises(ValueError, match="MCP_MEMORY_DAEMON_PORT"):
+        Config.from_env()
+
+
+def test_write_behind_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_MEMORY_WRITE_BEHIND", raising=False)
+    monkeypatch.delenv("MCP_MEMORY_WRITE_BEHIND_DELAY_MS", raising=False)
+    cfg = Config.from_env()
+    assert (cfg.write_behind, cfg.write_behind_delay_ms) == (False, 50)
+
+    monkeypatch.setenv("MCP_MEMORY_WRITE_BEHIND", "1")
+    monkeypatch.setenv("MCP_MEMORY_WRITE_BEHIND_DELAY_MS", "0")
+    cfg = Config.from_env()
+    assert (cfg.write_behind, cfg.write_behind_delay_ms) == (True, 0)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import socket
+import stat
+import subprocess
+import urllib.error
+import urllib.request
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from fastmcp import Client
+from fastmcp.server import create_proxy
+
+from mcp_memory import daemon as daemon_module
+from mcp_memory.config import Config
+from mcp_memory.daemon import (
+    DAEMON_TOKEN_FILENAME,
+    daemon_token,
+    daemon_transport,
+    daemon_url,
+    ensure_daemon,
+    is_listening,
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+def _config(data_dir: Path, port: int) -> Config:
+    return Config(
+        data_dir=data_dir,
+        default_project="global",
+        max_results=10,
+        daemon_port=port,
+    )
+
+
+def test_daemon_url(data_dir: Path) -> None:
+    assert daemon_url(_config(data_dir, 9000)) == "http://127.0.0.1:9000/mcp"
+
+
+def test_is_listening() -> None:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        s.listen()
+        port = s.getsockname()[1]
+        assert is_listening("127.0.0.1", port)
+    assert not is_listening("127.0.0.1", port)
+
+
+def test_daemon_token(data_dir: Path) -> None:
+    token = daemon_token(data_dir)
+    assert daemon_token(data_dir) == token
+    mode = (data_dir / DAEMON_TOKEN_FILENAME).stat().st_mode
+    assert stat.S_IMODE(mode) == 0o600
+    assert daemon_token(data_dir / "other") != token
+    assert sorted(p.name for p in data_dir.iterdir()) == [
+        DAEMON_TOKEN_FILENAME,
+        "other",
+    ]
+
+
+@pytest.fixture()
+def daemon(
+    data_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[tuple[Config, list[subprocess.Popen[bytes]]]]:
+    port = _free_port()
+    monkeypatch.setenv("MCP_MEMORY_DATA_DIR", str(data_dir))
+    monkeypatch.setenv("MCP_MEMORY_DAEMON_PORT", str(port))
+    # The daemon is a separate process: use the model-free embedder there.
+    monkeypatch.setenv("MCP_MEMORY_EMBEDDER", "hash")
+    monkeypatch.setenv("MCP_MEMORY_WARMUP", "0")
+
+    spawned: list[subprocess.Popen[bytes]] = []
+    original = daemon_module.spawn_daemon
+
+    def spawn(config: Config) -> subprocess.Popen[bytes]:
+        process = original(config)
+        spawned.append(process)
+        return process
+
+    monkeypatch.setattr(daemon_module, "spawn_daemon", spawn)
+    try:
+        yield _config(data_dir, port), spawned
+    finally:
+        for process in spawned:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+async def test_clients_share_one_daemon(
+    daemon: tuple[Config, list[subprocess.Popen[bytes]]],
+) -> None:
+    config, spawned = daemon
+    ensure_daemon(config)
+    ensure_daemon(config)
+    assert len(spawned) == 1
+
+    async with Client(daemon_transport(config)) as first:
+        await first.call_tool("remember", {"content": "shared daemon memory"})
+
+    # A second client, through the stdio proxy's forwarding server, sees it.
+    async with Client(create_proxy(daemon_transport(config))) as second:
+        result = await second.call_tool("recall", {"query": "shared daemon"})
+    assert "shared daemon memory" in result.content[0].text  # type: ignore[union-attr]
+
+
+def test_requires_token(
+    daemon: tuple[Config, list[subprocess.Popen[bytes]]],
+) -> None:
+    config, _ = daemon
+    ensure_daemon(config)
+    for headers in ({}, {"Authorization": "Bearer wrong"}):
+        request = urllib.request.Request(
+            daemon_url(config), data=b"{}", headers=headers, method="POST"
+        )
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(request, timeout=5)
+        assert excinfo.value.code == 401
+
+
+def test_refuses_daemon_for_another_data_dir(
+    daemon: tuple[Config, list[subprocess.Popen[bytes]]], tmp_path: Path
+) -> None:
+    config, spawned = daemon
+    ensure_daemon(config)
+    other = _config(tmp_path / "other", config.daemon_port)
+    with pytest.raises(RuntimeError, match="MCP_MEMORY_DAEMON_PORT"):
+        ensure_daemon(other)
+    assert len(spawned) == 1
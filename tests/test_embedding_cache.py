@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import multiprocessing
+import sqlite3
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from mcp_memory.embedding_cache import CACHE_DIRNAME, EmbeddingCache
+
+
+def _vec(seed: int, dim: int = 8) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+def _text_vec(text: str) -> np.ndarray:
+    return _vec(zlib.crc32(text.encode()))
+
+
+def _hammer(directory: Path, worker: int) -> int:
+    """Interleave writes and reads of a small shared cache; returns how many
+    reads came back with another text's vector."""
+    cache = EmbeddingCache(directory, capacity=32, dtype="float32")
+    wrong = 0
+    for round_ in range(40):
+        texts = [f"{worker}-{round_}-{i}" for i in range(8)] + [f"shared-{round_}"]
+        cache.put_many(texts, [_text_vec(t) for t in texts])
+        recent = [f"{w}-{round_}-{i}" for w in range(2) for i in range(8)]
+        for text, vec in zip(recent, cache.get_many(recent)):
+            if vec is not None and not np.array_equal(vec, _text_vec(text)):
+                wrong += 1
+    cache.close()
+    return wrong
+
+
+class TestEmbeddingCache:
+    def test_round_trip(self, tmp_path: Path) -> None:
+        cache = EmbeddingCache(tmp_path, capacity=10, dtype="float32")
+        cache.put_many(["a", "b"], [_vec(1), _vec(2)])
+        a, missing, b = cache.get_many(["a", "zzz", "b"])
+        assert missing is None
+        assert a is not None and np.array_equal(a, _vec(1))
+        assert b is not None and np.array_equal(b, _vec(2))
+        assert cache.info()["hits"] == 2
+        assert cache.info()["misses"] == 1
+
+    def test_float16(self, tmp_path: Path) -> None:
+        cache = EmbeddingCache(tmp_path, capacity=10)
+        cache.put_many(["a"], [_vec(1)])
+        (a,) = cache.get_many(["a"])
+        assert a is not None and a.dtype == np.float32
+        assert np.allclose(a, _vec(1), atol=1e-2)
+
+    def test_persists(self, tmp_path: Path) -> None:
+        cache = EmbeddingCache(tmp_path, capacity=10)
+        cache.put_many(["a"], [_vec(1)])
+        cache.close()
+
+        reopened = EmbeddingCache(tmp_path, capacity=10)
+        assert len(reopened) == 1
+        assert reopened.get_many(["a"])[0] is not None
+
+    def test_settings_change_discards(self, tmp_path: Path) -> None:
+        cache = EmbeddingCache(tmp_path, capacity=10)
+        cache.put_many(["a"], [_vec(1)])
+        cache.close()
+
+        reopened = EmbeddingCache(tmp_path, capacity=20)
+        assert len(reopened) == 0
+        assert reopened.get_many(["a"]) == [None]
+
+    def test_evicts_least_recently_used(self, tmp_path: Path) -> None:
+        cache = EmbeddingCache(tmp_path, capacity=2, dtype="float32")
+        cache.put_many(["a"], [_vec(1)])
+        cache.put_many(["b"], [_vec(2)])
+        cache.get_many(["a"])
+        cache.put_many(["c"], [_vec(3)])
+
+        assert len(cache) == 2
+        a, b, c = cache.get_many(["a", "b", "c"])
+        assert b is None
+        assert a is not None and np.array_equal(a, _vec(1))
+        assert c is not None and np.array_equal(c, _vec(3))
+
+    def test_reads_while_another_writer_holds_the_lock(self, tmp_path: Path) -> None:
+        cache = EmbeddingCache(tmp_path, capacity=4, dtype="float32")
+        cache.put_many(["a"], [_vec(1)])
+        other = sqlite3.connect(tmp_path / "slots.sqlite3")
+        other.execute("BEGIN IMMEDIATE")
+        try:
+            (a,) = cache.get_many(["a"])
+        finally:
+            other.rollback()
+            other.close()
+        assert a is not None and np.array_equal(a, _vec(1))
+
+    def test_recycled_slot_is_a_miss(self, tmp_path: Path) -> None:
+        cache = EmbeddingCache(tmp_path, capacity=4, dtype="float32")
+        cache.put_many(["a"], [_vec(1)])
+        # Another process reusing the slot rewrites it before its row.
+        vectors = np.memmap(tmp_path / "vectors.bin", dtype="float32", mode="r+")
+        vectors[:8] = _vec(2)
+        vectors.flush()
+        del vectors
+
+        assert cache.get_many(["a"]) == [None]
+
+    def test_per_model_directories(self, tmp_path: Path) -> None:
+        cache = EmbeddingCache.for_model(tmp_path, "hash-384", capacity=4)
+        cache.put_many(["a"], [_vec(1)])
+        assert (tmp_path / CACHE_DIRNAME / "hash-384" / "vectors.bin").exists()
+
+    def test_invalid_settings(self, tmp_path: Path) -> None:
+        with pytest.raises(ValueError, match="capacity"):
+            EmbeddingCache(tmp_path, capacity=0)
+        with pytest.raises(ValueError, match="dtype"):
+            EmbeddingCache(tmp_path, capacity=1, dtype="int8")
+
+    def test_shared_between_processes(self, tmp_path: Path) -> None:
+        # Every stdio client runs its own server on the same data directory.
+        with multiprocessing.get_context("fork").Pool(2) as pool:
+            wrong = pool.starmap(_hammer, [(tmp_path, 0), (tmp_path, 1)])
+        assert wrong == [0, 0]
+
+        cache = EmbeddingCache(tmp_path, capacity=32, dtype="float32")
+        texts = [f"{w}-39-{i}" for w in range(2) for i in range(8)]
+        for text, vec in zip(texts, cache.get_many(texts)):
+            assert vec is None or np.array_equal(vec, _text_vec(text))
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from chromadb.api.types import DefaultEmbeddingFunction
+
+from mcp_memory.embeddings import (
+    LEGACY_MODEL_ID,
+    HashEmbeddingFunction,
+    OnnxEmbeddingFunction,
+    make_embedder,
+    model_id,
+)
+from mcp_memory.storage import MemoryStore
+
+
+class TestHashEmbeddingFunction:
+    def test_deterministic(self) -> None:
+        a = HashEmbeddingFunction()(["postgres index migration"])
+        b = HashEmbeddingFunction()(["postgres index migration"])
+        assert np.array_equal(a[0], b[0])
+
+    def test_unit_length(self) -> None:
+        for vector in HashEmbeddingFunction(dim=64)(["hello world", "", "!!!"]):
+            assert len(vector) == 64
+            assert np.isclose(np.linalg.norm(vector), 1.0)
+
+    def test_shared_words_score_higher(self) -> None:
+        query, near, far = HashEmbeddingFunction()(
+            ["postgres schema migration", "run the postgres migration", "css layout"]
+        )
+        assert np.dot(query, near) > np.dot(query, far)
+
+    def test_ranks_recall(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir, embedding_function=HashEmbeddingFunction())
+        store.store("Use PostgreSQL for relational data", project="infra")
+        store.store("React components render state", project="web")
+        results = store.recall("postgresql relational", n_results=1)
+        assert results[0].memory.project == "infra"
+
+
+class TestMakeEmbedder:
+    def test_providers(self) -> None:
+        default = make_embedder("default", batch_size=8, threads=2)
+        assert isinstance(default, OnnxEmbeddingFunction)
+        assert (default.batch_size, default.threads, default.quantized) == (8, 2, False)
+
+        int8 = make_embedder("onnx-int8")
+        assert isinstance(int8, OnnxEmbeddingFunction)
+        assert int8.quantized
+
+        assert isinstance(make_embedder("hash"), HashEmbeddingFunction)
+
+    def test_unknown(self) -> None:
+        with pytest.raises(ValueError, match="embedder must be one of"):
+            make_embedder("word2vec")
+
+    def test_invalid_batch(self) -> None:
+        with pytest.raises(ValueError, match="batch_size must be >= 1"):
+            OnnxEmbeddingFunction(batch_size=0)
+
+
+class TestModelId:
+    def test_onnx_variants_share_a_space(self) -> None:
+        assert model_id(make_embedder("default")) == LEGACY_MODEL_ID
+        assert model_id(make_embedder("onnx-int8")) == LEGACY_MODEL_ID
+        assert model_id(DefaultEmbeddingFunction()) == LEGACY_MODEL_ID
+
+    def test_hash(self) -> None:
+        assert model_id(HashEmbeddingFunction(dim=16)) == "hash-16"
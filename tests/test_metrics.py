@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from mcp_memory.metrics import (
+    JSONL_FILENAME,
+    PROMETHEUS_FILENAME,
+    Histogram,
+    Metrics,
+    MetricsExporter,
+)
+from mcp_memory.storage import MemoryStore
+
+
+class TestHistogram:
+    def test_summary(self) -> None:
+        h = Histogram()
+        for seconds in (0.001, 0.002, 0.003, 0.004, 0.2):
+            h.observe(seconds)
+        s = h.summary()
+        assert s["count"] == 5
+        assert s["sum"] == pytest.approx(0.21)
+        assert s["max"] == 0.2
+        assert 0.001 <= s["p50"] <= 0.005
+        assert 0.1 <= s["p99"] <= 0.2
+
+    def test_empty(self) -> None:
+        assert Histogram().summary()["p95"] == 0.0
+
+
+class TestMetrics:
+    def test_span_records(self) -> None:
+        metrics = Metrics()
+        with metrics.span("recall"):
+            pass
+        with metrics.span("recall"):
+            pass
+        assert metrics.snapshot()["recall"]["count"] == 2
+
+    def test_span_records_on_error(self) -> None:
+        metrics = Metrics()
+        with pytest.raises(RuntimeError):
+            with metrics.span("store"):
+                raise RuntimeError
+        assert metrics.snapshot()["store"]["count"] == 1
+
+    def test_disabled_records_nothing(self) -> None:
+        metrics = Metrics(enabled=False)
+        with metrics.span("recall"):
+            pass
+        metrics.observe("open", 1.0)
+        assert metrics.snapshot() == {}
+
+    def test_prometheus(self) -> None:
+        metrics = Metrics()
+        metrics.observe("recall.search", 0.003)
+        text = metrics.to_prometheus()
+        assert "# TYPE mcp_memory_span_seconds histogram" in text
+        bucket = 'mcp_memory_span_seconds_bucket{span="recall.search"'
+        assert f'{bucket},le="0.001"}} 0' in text
+        assert f'{bucket},le="+Inf"}} 1' in text
+        assert 'mcp_memory_span_seconds_count{span="recall.search"} 1' in text
+
+
+class TestExporter:
+    def test_prometheus_file(self, tmp_path: Path) -> None:
+        metrics = Metrics()
+        metrics.observe("store", 0.01)
+        exporter = MetricsExporter(metrics, tmp_path, "prometheus", interval=60)
+        exporter.start()
+        exporter.stop()
+        assert 'span="store"' in (tmp_path / PROMETHEUS_FILENAME).read_text()
+
+    def test_jsonl_appends(self, tmp_path: Path) -> None:
+        metrics = Metrics()
+        metrics.observe("store", 0.01)
+        exporter = MetricsExporter(metrics, tmp_path, "jsonl", interval=60)
+        exporter.export()
+        exporter.export()
+        lines = (tmp_path / JSONL_FILENAME).read_text().splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[0])["spans"]["store"]["count"] == 1
+
+    def test_rejects_unknown_format(self, tmp_path: Path) -> None:
+        with pytest.raises(ValueError, match="format"):
+            MetricsExporter(Metrics(), tmp_path, "statsd", interval=60)
+
+
+class TestStoreSpans:
+    def test_recall_stages(self, data_dir: Path) -> None:
+        metrics = Metrics()
+        store = MemoryStore(data_dir, metrics=metrics)
+        store.store("Use PostgreSQL for relational data", project="infra")
+        store.recall("database")
+        store.list_memories()
+        spans = metrics.snapshot()
+        for name in (
+            "open",
+            "store",
+            "store.embed",
+            "store.write",
+            "store.index",
+            "recall",
+            "recall.embed",
+            "recall.search",
+            "recall.hydrate",
+            "recall.merge",
+            "list",
+            "list.index",
+            "list.hydrate",
+        ):
+            assert spans[name]["count"] >= 1, name
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from mcp_memory.models import Memory, RecallResult
+from mcp_memory.ranking import Reranker
+
+NOW = datetime(2026, 1, 31, tzinfo=timezone.utc)
+
+
+def _result(
+    mid: str, relevance: float, importance: int = 3, age_days: float = 0.0
+) -> RecallResult:
+    timestamp = (NOW - timedelta(days=age_days)).isoformat()
+    memory = Memory(
+        id=mid, content=mid, project="p", importance=importance, timestamp=timestamp
+    )
+    return RecallResult(memory=memory, relevance_score=relevance, distance=0.0)
+
+
+class TestReranker:
+    def test_scores(self) -> None:
+        ranker = Reranker(
+            similarity=1.0, importance=1.0, recency=1.0, half_life_days=10
+        )
+        scores = ranker.scores(
+            [_result("a", 0.5, importance=5), _result("b", 0.5, age_days=10)],
+            now=NOW.timestamp(),
+        )
+        assert scores[0] == pytest.approx(0.5 + 1.0 + 1.0)
+        assert scores[1] == pytest.approx(0.5 + 0.5 + 0.5)
+
+    def test_similarity_only_keeps_relevance_order(self) -> None:
+        ranker = Reranker(similarity=1.0, importance=0.0, recency=0.0)
+        results = [_result("low", 0.2), _result("high", 0.9), _result("mid", 0.5)]
+        ranked = ranker.rerank(results, k=2, now=NOW.timestamp())
+        assert [r.memory.id for r in ranked] == ["high", "mid"]
+        assert ranked[0].score == pytest.approx(0.9)
+
+    def test_importance_and_recency_promote(self) -> None:
+        ranker = Reranker()
+        results = [
+            _result("similar-but-stale", 0.80, importance=1, age_days=365),
+            _result("important-recent", 0.75, importance=5),
+        ]
+        ranked = ranker.rerank(results, k=1, now=NOW.timestamp())
+        assert [r.memory.id for r in ranked] == ["important-recent"]
+
+    def test_k_larger_than_results(self) -> None:
+        ranked = Reranker().rerank([_result("a", 0.5)], k=10, now=NOW.timestamp())
+        assert len(ranked) == 1
+        assert Reranker().rerank([], k=3) == []
+
+    def test_unparseable_timestamp_counts_as_old(self) -> None:
+        result = _result("a", 0.5)
+        result.memory.timestamp = ""
+        ranker = Reranker(similarity=0.0, importance=0.0, recency=1.0)
+        assert ranker.scores([result], now=NOW.timestamp())[0] == pytest.approx(0.0)
+
+    def test_invalid(self) -> None:
+        with pytest.raises(ValueError, match="weights"):
+            Reranker(importance=-1.0)
+        with pytest.raises(ValueError, match="overfetch"):
+            Reranker(overfetch=0)
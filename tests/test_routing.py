@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from mcp_memory.routing import Summary, score_summaries, summarize
+
+
+def _blob(center: list[float], n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.asarray(center) + rng.normal(scale=0.05, size=(n, len(center)))
+
+
+class TestSummarize:
+    def test_finds_separate_groups(self) -> None:
+        vectors = np.concatenate(
+            [_blob([1, 0, 0], 20, seed=0), _blob([0, 1, 0], 20, seed=1)]
+        )
+        summary = summarize(vectors, representatives=2)
+        assert summary.built == 40
+        centers = sorted(summary.centers.round(1).tolist())
+        assert centers == [[0.0, 1.0, 0.0], [1.0, 0.0, 0.0]]
+
+    def test_fewer_vectors_than_representatives(self) -> None:
+        summary = summarize([[1.0, 0.0], [1.0, 0.0]], representatives=4)
+        assert len(summary.sums) == 1
+        assert summary.built == 2
+
+    def test_absorb_moves_nearest_representative(self) -> None:
+        summary = summarize([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+        grown = summary.absorb([[1.0, 1.0, 0.0]])
+        assert grown.built == summary.built
+        (moved,) = [c for c in grown.centers.tolist() if c[1] > 0]
+        assert moved[0] > moved[1] > 0
+        assert grown.centers.tolist().count([0.0, 0.0, 1.0]) == 1
+
+    def test_staleness(self) -> None:
+        summary = Summary(sums=np.ones((1, 2), dtype=np.float32), built=10)
+        assert not summary.is_stale(10)
+        assert not summary.is_stale(15)
+        assert summary.is_stale(16)
+        assert summary.is_stale(4)
+
+    def test_blob_round_trip(self) -> None:
+        summary = summarize(np.random.default_rng(0).normal(size=(50, 8)))
+        restored = Summary.from_blobs(summary.built, *summary.to_blobs())
+        assert restored.built == summary.built
+        assert np.array_equal(restored.sums, summary.sums)
+
+
+class TestScore:
+    def test_scores_every_summary_for_every_query(self) -> None:
+        near_x = summarize(_blob([1, 0, 0], 10, seed=0))
+        near_y = summarize(_blob([0, 1, 0], 10, seed=1))
+        relevance = score_summaries([near_x, near_y], [[1, 0, 0], [0, 2, 0]])
+        assert relevance.shape == (2, 2)
+        assert relevance[0, 0] > relevance[1, 0]
+        assert relevance[1, 1] > relevance[0, 1]
+        assert relevance[0, 0] == pytest.approx(1.0, abs=0.01)
+        assert relevance[1, 0] == pytest.approx(0.5, abs=0.05)
+
+    def test_no_summaries(self) -> None:
+        assert score_summaries([], [[1.0, 0.0]]).shape == (0, 1)
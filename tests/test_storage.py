@@ -1,8 +1,44 @@
 from __future__ import annotations
 
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
 import pytest
+from chromadb import Collection
+from chromadb.api.types import DefaultEmbeddingFunction, Documents, Embeddings
+from chromadb.errors import NotFoundError
+
+from mcp_memory.compaction import hnsw_elements, vector_segments
+from mcp_memory.embeddings import HashEmbeddingFunction
+from mcp_memory.index import INDEX_FILENAME, MemoryIndex
+from mcp_memory.models import Memory
+from mcp_memory.ranking import Reranker
+from mcp_memory.storage import (
+    COMPACT_NEW_PREFIX,
+    COMPACT_OLD_PREFIX,
+    LAYOUT_PER_PROJECT,
+    LAYOUT_SHARDED,
+    LAYOUT_UNIFIED,
+    REUSED_EXACT,
+    SCOPE_FIELD,
+    UNIFIED_COLLECTION,
+    MemoryStore,
+)
+
+
+class CountingEmbeddingFunction(DefaultEmbeddingFunction):
+    """Default embedder that records how many texts it has embedded."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: list[list[str]] = []
 
-from mcp_memory.storage import MemoryStore
+    def __call__(self, input: Documents) -> Embeddings:
+        self.calls.append(list(input))
+        return super().__call__(input)
 
 
 class TestStore:
@@ -22,6 +58,63 @@ class TestStore:
         assert m.importance == 5
 
 
+class TestStoreMany:
+    def test_store_many_groups_by_project(self, data_dir: Path) -> None:
+        ef = CountingEmbeddingFunction()
+        store = MemoryStore(data_dir, embedding_function=ef)
+        results = store.store_many(
+            [
+                {"content": "a1", "project": "a"},
+                {"content": "b1", "project": "b"},
+                {"content": "a2", "project": "a"},
+            ]
+        )
+        assert [r.error for r in results] == ["", "", ""]
+        assert [r.memory.project for r in results if r.memory] == ["a", "b", "a"]
+        assert sorted(ef.calls) == [["a1", "a2"], ["b1"]]
+
+        _, total, stats, _ = store.list_memories()
+        assert total == 3
+        assert stats == {"a": 2, "b": 1}
+
+    def test_store_many_batches(self, data_dir: Path) -> None:
+        ef = CountingEmbeddingFunction()
+        store = MemoryStore(data_dir, embedding_function=ef)
+        items = [{"content": f"item {i}"} for i in range(5)]
+        store.store_many(items, batch_size=2)
+        assert [len(c) for c in ef.calls] == [2, 2, 1]
+
+    def test_store_many_default_project(self, store: MemoryStore) -> None:
+        results = store.store_many([{"content": "x"}], default_project="bulk")
+        assert results[0].memory is not None
+        assert results[0].memory.project == "bulk"
+
+    def test_store_many_reports_invalid_items(self, store: MemoryStore) -> None:
+        results = store.store_many(
+            [
+                {"content": "ok", "tags": ["t"], "importance": 5},
+                {"content": ""},
+                {"content": "x", "importance": 0},
+                {"content": "x", "tags": "not-a-list"},
+                {"content": "x", "colour": "blue"},
+            ]
+        )
+        assert results[0].memory is not None
+        assert results[0].memory.tags == ["t"]
+        assert all(r.memory is None for r in results[1:])
+        assert "content cannot be empty" in results[1].error
+        assert "importance must be 1-5" in results[2].error
+        assert "tags must be a list" in results[3].error
+        assert "unknown fields: colour" in results[4].error
+
+        _, total, _, _ = store.list_memories()
+        assert total == 1
+
+    def test_store_many_invalid_batch_size(self, store: MemoryStore) -> None:
+        with pytest.raises(ValueError, match="batch_size"):
+            store.store_many([{"content": "x"}], batch_size=0)
+
+
 class TestRecall:
     def test_semantic_search(self, populated_store: MemoryStore) -> None:
         results = populated_store.recall("programming languages", n_results=3)
@@ -67,6 +160,549 @@ class TestRecall:
         assert len(results) <= 2
 
 
+class TestRecallConcurrency:
+    def test_concurrent_matches_sequential(self, data_dir: Path) -> None:
+        sequential = MemoryStore(data_dir, query_concurrency=1)
+        for proj in ("a", "b", "c", "d", "e"):
+            sequential.store(f"facts about project {proj}", project=proj)
+        concurrent = MemoryStore(data_dir, query_concurrency=3)
+
+        expected = [r.memory.id for r in sequential.recall("facts", n_results=5)]
+        actual = [r.memory.id for r in concurrent.recall("facts", n_results=5)]
+        assert actual == expected
+        concurrent.close()
+
+    def test_invalid_concurrency(self, data_dir: Path) -> None:
+        with pytest.raises(ValueError, match="query_concurrency"):
+            MemoryStore(data_dir, query_concurrency=0)
+
+
+class TestQueryEmbeddingCache:
+    def test_cross_project_recall_embeds_once(self, data_dir: Path) -> None:
+        ef = CountingEmbeddingFunction()
+        store = MemoryStore(data_dir, embedding_function=ef)
+        for proj in ("a", "b", "c"):
+            store.store(f"notes about {proj}", project=proj)
+        ef.calls.clear()
+
+        results = store.recall("notes")
+        assert len(results) == 3
+        assert ef.calls == [["notes"]]
+
+    def test_repeated_recall_hits_cache(self, data_dir: Path) -> None:
+        ef = CountingEmbeddingFunction()
+        # Without the result cache, so every recall reaches the embedding step.
+        store = MemoryStore(data_dir, embedding_function=ef, result_cache_size=0)
+        store.store("cached query target", project="global")
+        ef.calls.clear()
+
+        store.recall("target")
+        store.recall("target")
+        store.recall("target")
+        assert ef.calls == [["target"]]
+
+        info = store.query_cache_info()
+        assert info["hits"] == 2
+        assert info["misses"] == 1
+        assert info["hit_rate"] == pytest.approx(2 / 3)
+
+    def test_cache_is_bounded(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir, query_cache_size=2)
+        store.store("something", project="global")
+        for q in ("one", "two", "three"):
+            store.recall(q)
+        assert store.query_cache_info()["size"] == 2
+
+
+class TestRecallMany:
+    QUERIES = ["programming languages", "databases", "testing"]
+
+    def test_matches_single_recalls(self, populated_store: MemoryStore) -> None:
+        many = populated_store.recall_many(self.QUERIES, n_results=3)
+        single = [populated_store.recall(q, n_results=3) for q in self.QUERIES]
+        assert [[r.memory.id for r in rs] for rs in many] == [
+            [r.memory.id for r in rs] for rs in single
+        ]
+
+    def test_one_embedding_pass_and_one_search_per_collection(
+        self, data_dir: Path
+    ) -> None:
+        ef = CountingEmbeddingFunction()
+        store = MemoryStore(data_dir, embedding_function=ef)
+        for proj in ("a", "b", "c"):
+            store.store(f"notes about {proj}", project=proj)
+        ef.calls.clear()
+
+        original_query = Collection.query
+        batch_sizes: list[int] = []
+
+        def query(self: Collection, *args: Any, **kwargs: Any) -> Any:
+            batch_sizes.append(len(kwargs["query_embeddings"]))
+            return original_query(self, *args, **kwargs)
+
+        with patch.object(Collection, "query", query):
+            results = store.recall_many(["a", "b", "c", "d"])
+        assert ef.calls == [["a", "b", "c", "d"]]
+        assert batch_sizes == [4, 4, 4]
+        assert [len(r) for r in results] == [3, 3, 3, 3]
+
+    def test_dedup_across_queries(self, populated_store: MemoryStore) -> None:
+        lists = populated_store.recall_many(self.QUERIES, n_results=5, dedup=True)
+        ids = [r.memory.id for rs in lists for r in rs]
+        assert len(ids) == len(set(ids)) == 5
+        plain = populated_store.recall_many(self.QUERIES, n_results=5)
+        assert sum(len(rs) for rs in plain) == 15
+        # Each memory stays with the query it matched best.
+        for q, rs in enumerate(lists):
+            for r in rs:
+                scores = [
+                    next(
+                        p.relevance_score
+                        for p in plain[i]
+                        if p.memory.id == r.memory.id
+                    )
+                    for i in range(len(self.QUERIES))
+                ]
+                assert max(scores) == r.relevance_score == scores[q]
+
+    def test_filters_and_rerank(self, populated_store: MemoryStore) -> None:
+        lists = populated_store.recall_many(
+            ["languages", "databases"], project="dev", tags=["lang"], rerank=True
+        )
+        for rs in lists:
+            assert {r.memory.project for r in rs} == {"dev"}
+            assert all("lang" in r.memory.tags and r.score is not None for r in rs)
+
+    def test_empty(self, store: MemoryStore) -> None:
+        assert store.recall_many([]) == []
+        assert store.recall_many(["anything"]) == [[]]
+
+
+class TestRecallResultCache:
+    def test_repeated_recall_skips_search(self, populated_store: MemoryStore) -> None:
+        first = populated_store.recall("fast languages", project="dev")
+        with patch.object(Collection, "query") as query:
+            again = populated_store.recall("  fast   languages ", project="dev")
+        query.assert_not_called()
+        assert again == first
+        info = populated_store.result_cache_info()
+        assert (info["hits"], info["misses"]) == (1, 1)
+
+    def test_filters_are_part_of_the_key(self, populated_store: MemoryStore) -> None:
+        populated_store.recall("languages", project="dev")
+        populated_store.recall("languages", project="dev", tags=["rust"])
+        populated_store.recall("languages", project="dev", n_results=1)
+        populated_store.recall("languages")
+        assert populated_store.result_cache_info()["hits"] == 0
+
+    def test_store_invalidates_its_project_only(
+        self, populated_store: MemoryStore
+    ) -> None:
+        populated_store.recall("databases", project="infra")
+        populated_store.recall("databases", project="ai")
+        populated_store.recall("databases")
+
+        populated_store.store("Redis is a fast cache database", project="infra")
+        results = populated_store.recall("databases", project="infra")
+        assert "Redis is a fast cache database" in [r.memory.content for r in results]
+        populated_store.recall("databases", project="ai")
+        populated_store.recall("databases")
+        # Only the untouched project's entry was still valid.
+        assert populated_store.result_cache_info()["hits"] == 1
+
+    def test_forget_invalidates(self, populated_store: MemoryStore) -> None:
+        results = populated_store.recall("PostgreSQL", project="infra")
+        populated_store.forget(ids=[results[0].memory.id])
+        assert populated_store.recall("PostgreSQL", project="infra") == []
+
+        populated_store.recall("embeddings")
+        populated_store.forget(tags=["ml"])
+        contents = [r.memory.content for r in populated_store.recall("embeddings")]
+        assert "ChromaDB is good for embeddings" not in contents
+
+    def test_other_process_write_invalidates(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir)
+        store.store("first", project="p")
+        assert len(store.recall("first", project="p")) == 1
+
+        MemoryStore(data_dir).store("second", project="p")
+        assert len(store.recall("first", project="p")) == 2
+
+    def test_disabled(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir, result_cache_size=0)
+        store.store("x", project="p")
+        store.recall("x")
+        store.recall("x")
+        assert store.result_cache_info()["hits"] == 0
+
+
+class TestRecallRouting:
+    TOPICS = {
+        "db": "postgres index vacuum replica schema",
+        "ui": "react component render hook layout",
+        "ops": "kubernetes cluster deploy helm ingress",
+    }
+
+    @pytest.fixture()
+    def routed_store(self, data_dir: Path) -> MemoryStore:
+        store = MemoryStore(
+            data_dir,
+            embedding_function=HashEmbeddingFunction(),
+            result_cache_size=0,
+            route_top=1,
+        )
+        for topic, words in self.TOPICS.items():
+            for copy in ("a", "b"):
+                store.store_many(
+                    [
+                        {"content": f"{words} note {i}", "project": f"{topic}_{copy}"}
+                        for i in range(5)
+                    ]
+                )
+        return store
+
+    def _searched(self, store: MemoryStore, query: str, **kwargs: Any) -> list[str]:
+        original_query = Collection.query
+        searched: list[str] = []
+
+        def query_(self: Collection, *args: Any, **kw: Any) -> Any:
+            searched.append(self.name)
+            return original_query(self, *args, **kw)
+
+        with patch.object(Collection, "query", query_):
+            store.recall(query, **kwargs)
+        return sorted(searched)
+
+    def test_skips_unrelated_projects(self, routed_store: MemoryStore) -> None:
+        searched = self._searched(routed_store, "postgres vacuum", n_results=3)
+        assert searched == ["memories_db_a", "memories_db_b"]
+        routed = routed_store.recall("postgres vacuum", n_results=3)
+        full = routed_store.recall("postgres vacuum", n_results=3, exhaustive=True)
+        assert [r.memory.id for r in routed] == [r.memory.id for r in full]
+
+    def test_exhaustive_searches_everything(self, routed_store: MemoryStore) -> None:
+        searched = self._searched(routed_store, "postgres vacuum", exhaustive=True)
+        assert len(searched) == 6
+
+    def test_fills_n_results_from_other_projects(
+        self, routed_store: MemoryStore
+    ) -> None:
+        assert len(routed_store.recall("postgres vacuum", n_results=30)) == 30
+
+    def test_project_recall_is_not_routed(self, routed_store: MemoryStore) -> None:
+        searched = self._searched(routed_store, "react hook", project="db_a")
+        assert searched == ["memories_db_a"]
+
+    def test_summaries_follow_writes(self, routed_store: MemoryStore) -> None:
+        summaries = routed_store._index.summaries()
+        assert sorted(summaries) == sorted(
+            f"memories_{t}_{c}" for t in self.TOPICS for c in "ab"
+        )
+        assert summaries["memories_db_a"].built == 5
+
+        # A new topic in an existing project is found straight away.
+        routed_store.store("terraform dns certificate registry", project="db_a")
+        results = routed_store.recall("terraform dns certificate", n_results=1)
+        assert results[0].memory.project == "db_a"
+
+        # Forgetting most of a project re-clusters what is left.
+        ids = [m.id for m in routed_store.list_memories(project="ui_a")[0]]
+        routed_store.forget(ids=ids[:4])
+        routed_store.recall("react hook")
+        assert routed_store._index.summaries()["memories_ui_a"].built == 1
+
+        routed_store.forget(project="ops_a")
+        assert "memories_ops_a" not in routed_store._index.summaries()
+
+    def test_summaries_persist(self, routed_store: MemoryStore, data_dir: Path) -> None:
+        routed_store.close()
+        reopened = MemoryStore(
+            data_dir, embedding_function=HashEmbeddingFunction(), route_top=1
+        )
+        with patch.object(
+            MemoryStore, "_build_summary", side_effect=AssertionError
+        ) as build:
+            assert reopened.recall("react hook")[0].memory.project.startswith("ui")
+        build.assert_not_called()
+
+    def test_builds_missing_summaries(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir, embedding_function=HashEmbeddingFunction())
+        for topic, words in self.TOPICS.items():
+            store.store(words, project=topic)
+        store._index.rebuild(store._iter_index_rows())
+        assert store._index.summaries() == {}
+        routed = MemoryStore(
+            data_dir, embedding_function=HashEmbeddingFunction(), route_top=1
+        )
+        assert routed.recall("react hook", n_results=1)[0].memory.project == "ui"
+        assert len(routed._index.summaries()) == 3
+
+    def test_summaries_left_alone_without_routing(
+        self, routed_store: MemoryStore, data_dir: Path
+    ) -> None:
+        before = routed_store._index.summaries()
+        routed_store.close()
+        plain = MemoryStore(data_dir, embedding_function=HashEmbeddingFunction())
+        with patch.object(
+            MemoryIndex, "update_summary", side_effect=AssertionError
+        ) as update:
+            for i in range(3):
+                plain.store(f"terraform dns certificate {i}", project="db_a")
+        update.assert_not_called()
+        # Other processes may still route with them.
+        after = plain._index.summaries()
+        assert sorted(after) == sorted(before)
+        assert after["memories_db_a"].built == 5
+        plain.close()
+        # Once routing is back on, summaries the writes made stale are
+        # rebuilt.
+        routed = MemoryStore(
+            data_dir, embedding_function=HashEmbeddingFunction(), route_top=1
+        )
+        results = routed.recall("terraform dns certificate", n_results=1)
+        assert results[0].memory.project == "db_a"
+        assert routed._index.summaries()["memories_db_a"].built == 8
+
+    def test_invalid_route_top(self, data_dir: Path) -> None:
+        with pytest.raises(ValueError, match="route_top"):
+            MemoryStore(data_dir, route_top=-1)
+
+
+class TestUnifiedLayout:
+    def test_invalid_layout(self, data_dir: Path) -> None:
+        with pytest.raises(ValueError, match="layout must be one of"):
+            MemoryStore(data_dir, layout="striped")
+
+    def test_global_recall_is_single_query(self, data_dir: Path) -> None:
+        ef = CountingEmbeddingFunction()
+        store = MemoryStore(data_dir, embedding_function=ef, layout=LAYOUT_UNIFIED)
+        for proj in ("a", "b", "c"):
+            store.store(f"notes about {proj}", project=proj)
+
+        results = store.recall("notes")
+        assert {r.memory.project for r in results} == {"a", "b", "c"}
+        names = [c.name for c in store._client.list_collections()]
+        assert names == [UNIFIED_COLLECTION]
+
+    def test_recall_project_filter(self, populated_unified_store: MemoryStore) -> None:
+        results = populated_unified_store.recall("database", project="infra")
+        assert len(results) == 1
+        assert results[0].memory.project == "infra"
+
+    def test_recall_project_and_tags(
+        self, populated_unified_store: MemoryStore
+    ) -> None:
+        results = populated_unified_store.recall(
+            "language", project="dev", tags=["lang"]
+        )
+        assert len(results) == 2
+        assert all(r.memory.project == "dev" for r in results)
+
+    def test_list_and_stats(self, populated_unified_store: MemoryStore) -> None:
+        memories, total, stats, _ = populated_unified_store.list_memories()
+        assert total == 5
+        assert stats == {"dev": 3, "infra": 1, "ai": 1}
+
+        memories, total, _, _ = populated_unified_store.list_memories(project="dev")
+        assert total == 3
+        assert all(m.project == "dev" for m in memories)
+
+    def test_forget_by_project(self, populated_unified_store: MemoryStore) -> None:
+        count, _ = populated_unified_store.forget(project="dev")
+        assert count == 3
+        _, total, _, _ = populated_unified_store.list_memories()
+        assert total == 2
+
+    def test_forget_by_tags_in_project(
+        self, populated_unified_store: MemoryStore
+    ) -> None:
+        count, _ = populated_unified_store.forget(project="ai", tags=["database"])
+        assert count == 1
+
+    def test_forget_by_id(self, unified_store: MemoryStore) -> None:
+        m = unified_store.store("to delete", project="global")
+        count, deleted = unified_store.forget(ids=[m.id, "missing"])
+        assert (count, deleted) == (1, [m.id])
+
+
+class TestProjectNameParity:
+    @pytest.mark.parametrize("layout", [LAYOUT_PER_PROJECT, LAYOUT_UNIFIED])
+    def test_project_names_match_loosely(self, data_dir: Path, layout: str) -> None:
+        store = MemoryStore(data_dir, layout=layout)
+        m = store.store("spelled differently", project="My-Proj")
+        store.store("elsewhere", project="other")
+        for spelling in ("My-Proj", "my_proj", "my proj", "my-proj"):
+            results = store.recall("spelled", project=spelling)
+            assert [r.memory.id for r in results] == [m.id]
+            _, total, _, _ = store.list_memories(project=spelling)
+            assert total == 1
+            assert store.stats(spelling).total == 1
+        assert store.forget(project="my proj") == (1, [m.id])
+
+    def test_migration_keeps_matches(self, data_dir: Path) -> None:
+        MemoryStore(data_dir).store("spelled differently", project="My-Proj")
+        MemoryStore(data_dir).migrate_to_unified()
+        unified = MemoryStore(data_dir, layout=LAYOUT_UNIFIED)
+        assert len(unified.recall("spelled", project="my proj")) == 1
+
+    def test_unified_rows_without_scope_are_backfilled(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir, layout=LAYOUT_UNIFIED)
+        store._get_unified_collection().add(
+            ids=["old"],
+            embeddings=[[0.1] * 384],
+            documents=["stored by an older version"],
+            metadatas=[{"project": "My-Proj", "timestamp": "2020-01-01T00:00:00"}],
+        )
+        store._index.delete_meta(SCOPE_FIELD)
+        store.close()
+
+        reopened = MemoryStore(data_dir, layout=LAYOUT_UNIFIED)
+        _, total, _, _ = reopened.list_memories(project="my-proj")
+        assert total == 1
+        assert reopened.stats().projects == {"my_proj": 1}
+        assert reopened.forget(project="my_proj") == (1, ["old"])
+
+
+class TestShardedLayout:
+    MONTHS = ["2025-01", "2025-02", "2025-03"]
+
+    @pytest.fixture()
+    def sharded_store(self, data_dir: Path) -> MemoryStore:
+        store = MemoryStore(data_dir, layout=LAYOUT_SHARDED)
+        for i, month in enumerate(self.MONTHS):
+            store._add_memories(
+                "dev",
+                [
+                    Memory(
+                        id=f"dev-{i}",
+                        content=f"release notes for {month}",
+                        project="dev",
+                        tags=["release"] if i else [],
+                        timestamp=f"{month}-15T12:00:00+00:00",
+                    )
+                ],
+            )
+        store.store("Use PostgreSQL for relational data", project="infra")
+        return store
+
+    def _shards(self, store: MemoryStore) -> list[str]:
+        return sorted(c.name for c in store._client.list_collections())
+
+    def test_one_shard_per_month(self, sharded_store: MemoryStore) -> None:
+        shards = self._shards(sharded_store)
+        assert [s for s in shards if "dev" in s] == [
+            f"shard_dev.{m}" for m in self.MONTHS
+        ]
+        assert len([s for s in shards if "infra" in s]) == 1
+
+    def test_year_window(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir, layout=LAYOUT_SHARDED, shard_window="year")
+        store.store("x", project="p")
+        (name,) = self._shards(store)
+        assert name == f"shard_p.{datetime.now(timezone.utc):%Y}"
+        with pytest.raises(ValueError, match="shard_window"):
+            MemoryStore(data_dir, layout=LAYOUT_SHARDED, shard_window="week")
+
+    def test_recall_searches_every_shard(self, sharded_store: MemoryStore) -> None:
+        original_query = Collection.query
+        searched: list[str] = []
+
+        def query(self: Collection, *args: Any, **kwargs: Any) -> Any:
+            searched.append(self.name)
+            return original_query(self, *args, **kwargs)
+
+        with patch.object(Collection, "query", query):
+            results = sharded_store.recall("release notes", project="dev")
+        assert sorted(searched) == [f"shard_dev.{m}" for m in self.MONTHS]
+        assert sorted(r.memory.id for r in results) == ["dev-0", "dev-1", "dev-2"]
+        scores = [r.relevance_score for r in results]
+        assert scores == sorted(scores, reverse=True)
+
+        everything = sharded_store.recall("release notes")
+        assert len(everything) == 4
+
+    def test_matches_per_project_layout(
+        self, sharded_store: MemoryStore, tmp_path: Path
+    ) -> None:
+        plain = MemoryStore(tmp_path / "plain")
+        for memory in sharded_store.list_memories(page_size=10)[0]:
+            plain._add_memories(memory.project, [memory])
+        for query in ("release notes for 2025-02", "database"):
+            assert [r.memory.id for r in sharded_store.recall(query)] == [
+                r.memory.id for r in plain.recall(query)
+            ]
+
+    def test_list_get_and_stats(self, sharded_store: MemoryStore) -> None:
+        memories, total, stats, _ = sharded_store.list_memories(project="dev")
+        assert total == 3
+        assert [m.id for m in memories] == ["dev-2", "dev-1", "dev-0"]
+        assert stats == {"dev": 3}
+        assert sharded_store.get("dev-0") is not None
+        assert sharded_store.stats().total == 4
+
+    def test_forget(self, sharded_store: MemoryStore) -> None:
+        assert sharded_store.forget(project="dev", tags=["release"])[0] == 2
+        assert sharded_store.forget(ids=["dev-0"])[0] == 1
+        sharded_store._add_memories(
+            "dev",
+            [Memory(id="again", content="x", project="dev", timestamp="2025-04-01")],
+        )
+        assert sharded_store.forget(project="dev") == (1, ["again"])
+        assert not [s for s in self._shards(sharded_store) if "dev" in s]
+        assert sharded_store.stats().total == 1
+
+    def test_restatement_in_older_shard(self, sharded_store: MemoryStore) -> None:
+        again = sharded_store.store("Release notes for 2025-01", project="dev")
+        assert again.id == "dev-0"
+        assert sharded_store.stats().total == 4
+
+    def test_import_keeps_windows(
+        self, sharded_store: MemoryStore, tmp_path: Path
+    ) -> None:
+        sharded_store.export_snapshot(tmp_path / "snap")
+        target = MemoryStore(tmp_path / "target", layout=LAYOUT_SHARDED)
+        assert target.import_snapshot(tmp_path / "snap") == 4
+        assert self._shards(target) == self._shards(sharded_store)
+
+    def test_index_rebuild(self, sharded_store: MemoryStore, data_dir: Path) -> None:
+        sharded_store.close()
+        (data_dir / INDEX_FILENAME).unlink()
+        reopened = MemoryStore(data_dir, layout=LAYOUT_SHARDED)
+        assert reopened.list_memories(project="dev")[1] == 3
+
+
+class TestMigrateToUnified:
+    def test_migrate_moves_memories_without_reembedding(self, data_dir: Path) -> None:
+        ef = CountingEmbeddingFunction()
+        store = MemoryStore(data_dir, embedding_function=ef)
+        _populate_for_migration(store)
+        ef.calls.clear()
+
+        moved = store.migrate_to_unified(batch_size=2)
+        assert moved == 5
+        assert ef.calls == []
+
+        unified = MemoryStore(data_dir, layout=LAYOUT_UNIFIED)
+        names = [c.name for c in unified._client.list_collections()]
+        assert names == [UNIFIED_COLLECTION]
+        _, total, stats, _ = unified.list_memories()
+        assert total == 5
+        assert stats == {"dev": 3, "infra": 1, "ai": 1}
+        results = unified.recall("database", project="infra")
+        assert results[0].memory.content == "Use PostgreSQL for relational data"
+
+    def test_migrate_empty(self, store: MemoryStore) -> None:
+        assert store.migrate_to_unified() == 0
+
+
+def _populate_for_migration(store: MemoryStore) -> None:
+    store.store("Python is great for scripting", project="dev", tags=["python"])
+    store.store("Rust is fast and safe", project="dev", tags=["rust"])
+    store.store("Always write tests before shipping", project="dev")
+    store.store("Use PostgreSQL for relational data", project="infra")
+    store.store("ChromaDB is good for embeddings", project="ai")
+
+
 class TestForget:
     def test_forget_by_id(self, store: MemoryStore) -> None:
         m = store.store("to delete", project="global")
@@ -89,6 +725,18 @@ class TestForget:
         with pytest.raises(ValueError, match="Must specify"):
             store.forget()
 
+    def test_forget_by_id_touches_one_collection(
+        self, populated_store: MemoryStore
+    ) -> None:
+        target = populated_store.store("short-lived", project="infra")
+        with patch.object(
+            Collection, "get", autospec=True, side_effect=Collection.get
+        ) as get:
+            count, deleted = populated_store.forget(ids=[target.id])
+        assert (count, deleted) == (1, [target.id])
+        assert {call.args[0].name for call in get.call_args_list} == {"memories_infra"}
+        assert populated_store.get(target.id) is None
+
     def test_forget_nonexistent(self, store: MemoryStore) -> None:
         count, deleted = store.forget(ids=["nonexistent-id"])
         assert count == 0
@@ -100,24 +748,24 @@ class TestForget:
 
 class TestListMemories:
     def test_list_all(self, populated_store: MemoryStore) -> None:
-        memories, total, stats = populated_store.list_memories()
+        memories, total, stats, _ = populated_store.list_memories()
         assert total == 5
         assert len(memories) == 5
 
     def test_list_by_project(self, populated_store: MemoryStore) -> None:
-        memories, total, stats = populated_store.list_memories(project="dev")
+        memories, total, stats, _ = populated_store.list_memories(project="dev")
         assert total == 3
         assert all(m.project == "dev" for m in memories)
 
     def test_list_by_tags(self, populated_store: MemoryStore) -> None:
-        memories, total, stats = populated_store.list_memories(tags=["lang"])
+        memories, total, stats, _ = populated_store.list_memories(tags=["lang"])
         assert total == 2
         assert all("lang" in m.tags for m in memories)
 
     def test_list_pagination(self, populated_store: MemoryStore) -> None:
-        page1, total, _ = populated_store.list_memories(page=1, page_size=2)
-        page2, _, _ = populated_store.list_memories(page=2, page_size=2)
-        page3, _, _ = populated_store.list_memories(page=3, page_size=2)
+        page1, total, _, _ = populated_store.list_memories(page=1, page_size=2)
+        page2, _, _, _ = populated_store.list_memories(page=2, page_size=2)
+        page3, _, _, _ = populated_store.list_memories(page=3, page_size=2)
 
         assert total == 5
         assert len(page1) == 2
@@ -129,13 +777,13 @@ class TestListMemories:
         assert len(all_ids) == len(set(all_ids))
 
     def test_list_project_stats(self, populated_store: MemoryStore) -> None:
-        _, _, stats = populated_store.list_memories()
+        _, _, stats, _ = populated_store.list_memories()
         assert stats["dev"] == 3
         assert stats["infra"] == 1
         assert stats["ai"] == 1
 
     def test_list_empty(self, store: MemoryStore) -> None:
-        memories, total, stats = store.list_memories()
+        memories, total, stats, _ = store.list_memories()
         assert total == 0
         assert memories == []
 
@@ -143,6 +791,830 @@ class TestListMemories:
         store.store("first", project="global")
         store.store("second", project="global")
         store.store("third", project="global")
-        memories, _, _ = store.list_memories()
+        memories, _, _, _ = store.list_memories()
         timestamps = [m.timestamp for m in memories]
         assert timestamps == sorted(timestamps, reverse=True)
+
+
+class TestListCursor:
+    def test_cursor_walks_all_pages(self, populated_store: MemoryStore) -> None:
+        expected, _, _, _ = populated_store.list_memories(page_size=10)
+
+        seen: list[str] = []
+        cursor = None
+        while True:
+            page, total, _, cursor = populated_store.list_memories(
+                page_size=2, cursor=cursor
+            )
+            assert total == 5
+            seen.extend(m.id for m in page)
+            if cursor is None:
+                break
+        assert seen == [m.id for m in expected]
+
+    def test_page_returns_cursor_for_next_page(
+        self, populated_store: MemoryStore
+    ) -> None:
+        _, _, _, cursor = populated_store.list_memories(page=1, page_size=2)
+        page2, _, _, _ = populated_store.list_memories(page=2, page_size=2)
+        from_cursor, _, _, _ = populated_store.list_memories(page_size=2, cursor=cursor)
+        assert [m.id for m in from_cursor] == [m.id for m in page2]
+
+    def test_last_page_has_no_cursor(self, populated_store: MemoryStore) -> None:
+        _, _, _, cursor = populated_store.list_memories(page_size=5)
+        assert cursor is None
+
+    def test_cursor_with_filters(self, populated_store: MemoryStore) -> None:
+        page, total, _, cursor = populated_store.list_memories(
+            project="dev", tags=["lang"], page_size=1
+        )
+        assert total == 2
+        rest, _, _, end = populated_store.list_memories(
+            project="dev", tags=["lang"], page_size=1, cursor=cursor
+        )
+        assert end is None
+        assert {m.content for m in page + rest} == {
+            "Python is great for scripting",
+            "Rust is fast and safe",
+        }
+
+    def test_invalid_cursor(self, populated_store: MemoryStore) -> None:
+        with pytest.raises(ValueError, match="invalid cursor"):
+            populated_store.list_memories(cursor="not-a-cursor")
+
+    def test_index_rebuilt_when_missing(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir)
+        store.store("survives rebuild", project="a", tags=["x"])
+        store.store("also survives", project="b")
+        store.close()
+        for path in data_dir.glob(f"{INDEX_FILENAME}*"):
+            path.unlink()
+
+        reopened = MemoryStore(data_dir)
+        memories, total, stats, _ = reopened.list_memories()
+        assert total == 2
+        assert stats == {"a": 1, "b": 1}
+        _, tagged, _, _ = reopened.list_memories(tags=["x"])
+        assert tagged == 1
+
+    def test_index_follows_forget(self, populated_store: MemoryStore) -> None:
+        populated_store.forget(tags=["database"])
+        _, total, stats, _ = populated_store.list_memories()
+        assert total == 3
+        assert stats == {"dev": 3}
+
+
+class TestGet:
+    def test_get_existing(self, populated_store: MemoryStore) -> None:
+        m = populated_store.store("fetch me", project="dev", tags=["x"])
+        fetched = populated_store.get(m.id)
+        assert fetched == m
+
+    def test_get_missing(self, store: MemoryStore) -> None:
+        assert store.get("nonexistent-id") is None
+
+    def test_get_unified(self, unified_store: MemoryStore) -> None:
+        m = unified_store.store("fetch me", project="p")
+        assert unified_store.get(m.id) == m
+
+
+class TestIndexStaleness:
+    def test_rebuilds_when_out_of_step(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir)
+        kept = store.store("kept", project="a")
+        # Simulate a crash between the Chroma write and the index write.
+        store._get_collection("a").add(
+            ids=["orphan"],
+            embeddings=[[0.1] * 384],
+            documents=["written but never indexed"],
+            metadatas=[{"project": "a", "timestamp": "2020-01-01T00:00:00"}],
+        )
+        store._index.remove([kept.id])
+        store.close()
+
+        reopened = MemoryStore(data_dir)
+        assert reopened.get(kept.id) == kept
+        orphan = reopened.get("orphan")
+        assert orphan is not None
+        assert orphan.content == "written but never indexed"
+        count, _ = reopened.forget(ids=["orphan"])
+        assert count == 1
+
+
+class TestLazyOpen:
+    def test_construction_opens_nothing(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir)
+        assert store._client_handle is None
+        assert store._index_handle is None
+        assert not (data_dir / INDEX_FILENAME).exists()
+
+    def test_opens_on_first_use(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir)
+        assert store.recall("anything") == []
+        assert store._index_handle is not None
+
+    def test_warm_up_loads_model_and_opens(self, data_dir: Path) -> None:
+        MemoryStore(data_dir).store("existing", project="a")
+        ef = CountingEmbeddingFunction()
+        store = MemoryStore(data_dir, embedding_function=ef)
+        store.warm_up()
+        assert store._index_handle is not None
+        assert len(ef.calls) == 1
+
+
+class TestCatalogCache:
+    def test_hot_paths_skip_catalog_lookups(self, populated_store: MemoryStore) -> None:
+        populated_store.recall("warm the caches")
+        client = populated_store._client
+        with (
+            patch.object(client, "list_collections") as list_collections,
+            patch.object(client, "get_or_create_collection") as get_or_create,
+            patch.object(client, "get_collection") as get_collection,
+            patch.object(Collection, "count") as count,
+        ):
+            populated_store.recall("database")
+            populated_store.store("another", project="dev")
+            populated_store.list_memories()
+        list_collections.assert_not_called()
+        get_or_create.assert_not_called()
+        get_collection.assert_not_called()
+        count.assert_not_called()
+
+    def test_counts_follow_writes(self, store: MemoryStore) -> None:
+        a = store.store("one", project="p")
+        store.recall("prime the count cache", project="p")
+        store.store("two", project="p")
+        collection = store._get_collection("p")
+        assert store._count(collection) == 2
+        store.forget(ids=[a.id])
+        assert store._count(collection) == 1
+        assert len(store.recall("one", project="p", n_results=5)) == 1
+
+    def test_new_and_deleted_projects_are_tracked(self, store: MemoryStore) -> None:
+        store.recall("prime the project list")
+        store.store("x", project="fresh")
+        assert "fresh" in store._list_project_names()
+        store.forget(project="fresh")
+        assert "fresh" not in store._list_project_names()
+        assert store.recall("x") == []
+
+    def test_other_process_writes_invalidate(self, data_dir: Path) -> None:
+        ours = MemoryStore(data_dir)
+        ours.store("ours", project="a")
+        assert len(ours.recall("anything")) == 1
+
+        theirs = MemoryStore(data_dir)
+        theirs.store("theirs", project="b")
+        theirs.store("more", project="a")
+
+        results = ours.recall("anything", n_results=10)
+        assert {r.memory.content for r in results} == {"ours", "theirs", "more"}
+
+        theirs.forget(project="b")
+        results = ours.recall("anything", n_results=10)
+        assert {r.memory.content for r in results} == {"ours", "more"}
+
+
+class TestStats:
+    def test_stats_all(self, populated_store: MemoryStore) -> None:
+        populated_store.store("urgent", project="infra", importance=5)
+        stats = populated_store.stats()
+        assert stats.total == 6
+        assert stats.projects == {"dev": 3, "infra": 2, "ai": 1}
+        assert stats.tags == {
+            "python": 1,
+            "rust": 1,
+            "lang": 2,
+            "database": 2,
+            "ml": 1,
+            "testing": 1,
+        }
+        assert stats.importance == {3: 5, 5: 1}
+        assert stats.oldest < stats.newest
+
+    def test_stats_project(self, populated_store: MemoryStore) -> None:
+        stats = populated_store.stats(project="dev")
+        assert stats.total == 3
+        assert stats.projects == {"dev": 3}
+        assert stats.tags == {"python": 1, "rust": 1, "lang": 2, "testing": 1}
+
+    def test_stats_follow_forget(self, populated_store: MemoryStore) -> None:
+        populated_store.forget(tags=["lang"])
+        populated_store.forget(project="ai")
+        stats = populated_store.stats()
+        assert stats.projects == {"dev": 1, "infra": 1}
+        assert stats.tags == {"database": 1, "testing": 1}
+        assert stats.importance == {3: 2}
+
+    def test_stats_empty(self, store: MemoryStore) -> None:
+        stats = store.stats()
+        assert stats.total == 0
+        assert stats.projects == {}
+        assert (stats.oldest, stats.newest) == ("", "")
+
+    def test_stats_survive_rebuild(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir)
+        store.store("a", project="p", tags=["t"], importance=4)
+        store.close()
+        for path in data_dir.glob(f"{INDEX_FILENAME}*"):
+            path.unlink()
+        stats = MemoryStore(data_dir).stats()
+        assert stats.projects == {"p": 1}
+        assert stats.tags == {"t": 1}
+        assert stats.importance == {4: 1}
+
+    def test_list_memories_uses_counters(self, populated_store: MemoryStore) -> None:
+        _, total, stats, _ = populated_store.list_memories(tags=["database"])
+        assert total == 2
+        assert stats == {"infra": 1, "ai": 1}
+        _, total, _, _ = populated_store.list_memories(tags=["database", "ml"])
+        assert total == 1
+
+
+class TestEmbedderMismatch:
+    def test_collection_records_embedder(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir, embedding_function=HashEmbeddingFunction())
+        store.store("hashed", project="p")
+        collection = store._client.get_collection("memories_p")
+        assert collection.metadata["embedder"] == "hash-384"
+
+    def test_mismatch_is_rejected(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir, embedding_function=HashEmbeddingFunction())
+        store.store("hashed", project="p")
+        store.close()
+
+        other = MemoryStore(data_dir)
+        with pytest.raises(ValueError, match="built with the 'hash-384' embedder"):
+            other.recall("hashed")
+        with pytest.raises(ValueError, match="embedder"):
+            other.store("more", project="p")
+
+    def test_legacy_collection_is_default(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir)
+        store._client.create_collection(
+            "memories_old", metadata={"hnsw:space": "cosine"}
+        )
+        store.store("still works", project="old")
+        assert store.recall("works")[0].memory.content == "still works"
+
+        hashed = MemoryStore(data_dir, embedding_function=HashEmbeddingFunction())
+        with pytest.raises(ValueError, match="embedder"):
+            hashed.recall("works")
+
+
+class TestDedup:
+    def test_exact_duplicate_reuses_memory(self, data_dir: Path) -> None:
+        ef = CountingEmbeddingFunction()
+        store = MemoryStore(data_dir, embedding_function=ef)
+        first = store.store("Use uv for installs", project="p", tags=["a"])
+        again = store.store(
+            "  use UV for   installs ", project="p", tags=["b"], importance=5
+        )
+        assert again.id == first.id
+        assert again.content == "Use uv for installs"
+        assert again.tags == ["a", "b"]
+        assert again.importance == 5
+        assert again.timestamp >= first.timestamp
+        assert len(ef.calls) == 1
+
+        (stored,), total, _, _ = store.list_memories()
+        assert total == 1
+        assert stored.tags == ["a", "b"]
+        assert store.stats().tags == {"a": 1, "b": 1}
+
+    def test_other_project_is_not_a_duplicate(self, store: MemoryStore) -> None:
+        a = store.store("same text", project="one")
+        b = store.store("same text", project="two")
+        assert a.id != b.id
+
+    def test_store_many_reports_reuse(self, store: MemoryStore) -> None:
+        store.store("already here", project="p")
+        results = store.store_many(
+            [
+                {"content": "already here", "project": "p"},
+                {"content": "new fact", "project": "p"},
+                {"content": "New fact", "project": "p", "tags": ["x"]},
+            ]
+        )
+        assert [r.reused for r in results] == ["exact", "", "exact"]
+        assert results[1].memory == results[2].memory
+        assert results[1].memory is not None
+        assert results[1].memory.tags == ["x"]
+        assert store.list_memories(project="p")[1] == 2
+
+    def test_dedup_disabled(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir, dedup=False)
+        a = store.store("same text", project="p")
+        b = store.store("same text", project="p")
+        assert a.id != b.id
+
+    def test_unified_layout(self, unified_store: MemoryStore) -> None:
+        a = unified_store.store("shared fact", project="p")
+        assert unified_store.store("shared fact", project="p").id == a.id
+        assert unified_store.store("shared fact", project="q").id != a.id
+
+    def test_near_duplicate(self, data_dir: Path) -> None:
+        store = MemoryStore(
+            data_dir, embedding_function=HashEmbeddingFunction(), dedup_threshold=0.9
+        )
+        a = store.store("We deploy the API with Kubernetes and Helm", project="p")
+        (result,) = store.store_many(
+            [
+                {
+                    "content": "we deploy the api with kubernetes and helm charts",
+                    "project": "p",
+                    "importance": 4,
+                }
+            ]
+        )
+        assert result.reused == "similar"
+        assert result.memory is not None
+        assert result.memory.id == a.id
+        assert result.memory.importance == 4
+
+        other = store.store("React components render state", project="p")
+        assert other.id != a.id
+
+    def test_invalid_threshold(self, data_dir: Path) -> None:
+        with pytest.raises(ValueError, match="dedup_threshold must be 0-1"):
+            MemoryStore(data_dir, dedup_threshold=1.5)
+
+
+class TestEmbeddingCache:
+    def test_restore_skips_model(self, data_dir: Path) -> None:
+        ef = CountingEmbeddingFunction()
+        store = MemoryStore(data_dir, embedding_function=ef, embedding_cache_size=100)
+        m = store.store("cache me", project="p")
+        store.forget(ids=[m.id])
+        store.store_many([{"content": "cache me"}, {"content": "fresh"}])
+        assert ef.calls == [["cache me"], ["fresh"]]
+        info = store.embedding_cache_info()
+        assert info is not None
+        assert (info["hits"], info["size"]) == (1, 2)
+
+    def test_survives_restart(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir, embedding_cache_size=100)
+        m = store.store("cache me", project="p")
+        store.forget(ids=[m.id])
+        store.close()
+
+        ef = CountingEmbeddingFunction()
+        reopened = MemoryStore(
+            data_dir, embedding_function=ef, embedding_cache_size=100
+        )
+        reopened.store("cache me", project="p")
+        assert ef.calls == []
+        assert reopened.recall("cache me")[0].memory.content == "cache me"
+
+    def test_disabled_by_default(self, store: MemoryStore) -> None:
+        store.store("x", project="p")
+        assert store.embedding_cache_info() is None
+
+
+class TestRerank:
+    def test_rerank_promotes_important(self, data_dir: Path) -> None:
+        store = MemoryStore(
+            data_dir,
+            embedding_function=HashEmbeddingFunction(),
+            reranker=Reranker(similarity=0.1, importance=0.9, recency=0.0),
+        )
+        store.store("deploy with helm charts", project="p", importance=1)
+        store.store("deploy notes", project="p", importance=5)
+
+        plain = store.recall("deploy with helm charts", n_results=1)
+        assert plain[0].memory.content == "deploy with helm charts"
+        assert plain[0].score is None
+
+        reranked = store.recall("deploy with helm charts", n_results=1, rerank=True)
+        assert reranked[0].memory.content == "deploy notes"
+        assert reranked[0].score is not None
+
+    def test_overfetch_reaches_past_top_k(self, data_dir: Path) -> None:
+        ef = HashEmbeddingFunction()
+        store = MemoryStore(
+            data_dir,
+            embedding_function=ef,
+            reranker=Reranker(similarity=0.0, importance=1.0, recency=0.0, overfetch=4),
+        )
+        for i in range(3):
+            store.store(f"kubernetes cluster note {i}", project="p", importance=1)
+        store.store("kubernetes", project="p", importance=5)
+        results = store.recall("kubernetes cluster note 0", n_results=1, rerank=True)
+        assert results[0].memory.importance == 5
+
+
+class TestSnapshot:
+    def test_round_trip_without_model(
+        self, populated_store: MemoryStore, tmp_path: Path
+    ) -> None:
+        snapshot = tmp_path / "snapshot"
+        assert populated_store.export_snapshot(snapshot, batch_size=2) == 5
+
+        ef = CountingEmbeddingFunction()
+        target = MemoryStore(tmp_path / "target", embedding_function=ef)
+        assert target.import_snapshot(snapshot, batch_size=2) == 5
+        assert ef.calls == []
+
+        original, _, _, _ = populated_store.list_memories()
+        restored, total, stats, _ = target.list_memories()
+        assert total == 5
+        assert stats == {"dev": 3, "infra": 1, "ai": 1}
+        assert restored == original
+        results = target.recall("Rust is fast and safe", n_results=1)
+        assert results[0].memory.content == "Rust is fast and safe"
+
+    def test_into_unified_layout(
+        self, populated_store: MemoryStore, tmp_path: Path
+    ) -> None:
+        snapshot = tmp_path / "snapshot"
+        populated_store.export_snapshot(snapshot)
+        target = MemoryStore(tmp_path / "target", layout=LAYOUT_UNIFIED)
+        target.import_snapshot(snapshot)
+        assert target.stats(project="dev").total == 3
+        assert target.recall("PostgreSQL", project="infra")[0].memory.project == (
+            "infra"
+        )
+
+    def test_import_resumes(self, populated_store: MemoryStore, tmp_path: Path) -> None:
+        snapshot = tmp_path / "snapshot"
+        populated_store.export_snapshot(snapshot)
+        target = MemoryStore(tmp_path / "target")
+
+        calls = 0
+        original_upsert = Collection.upsert
+
+        def failing_upsert(self: Collection, *args: object, **kwargs: object) -> None:
+            nonlocal calls
+            calls += 1
+            if calls > 2:
+                raise RuntimeError("interrupted")
+            original_upsert(self, *args, **kwargs)  # type: ignore[arg-type]
+
+        with patch.object(Collection, "upsert", failing_upsert):
+            with pytest.raises(RuntimeError):
+                target.import_snapshot(snapshot, batch_size=2)
+
+        # Only the first batch (one upsert per project) was recorded as done.
+        assert target.import_snapshot(snapshot, batch_size=2) == 3
+        assert target.stats().total == 5
+
+    def test_reimport_restores_forgotten(
+        self, populated_store: MemoryStore, tmp_path: Path
+    ) -> None:
+        snapshot = tmp_path / "snapshot"
+        populated_store.export_snapshot(snapshot)
+        target = MemoryStore(tmp_path / "target")
+        assert target.import_snapshot(snapshot, batch_size=2) == 5
+
+        target.forget(project="dev")
+        assert target.stats().total == 2
+        assert target.import_snapshot(snapshot, batch_size=2) == 5
+        assert target.stats().projects == {"dev": 3, "infra": 1, "ai": 1}
+
+    def test_rejects_other_embedder(
+        self, populated_store: MemoryStore, tmp_path: Path
+    ) -> None:
+        snapshot = tmp_path / "snapshot"
+        populated_store.export_snapshot(snapshot)
+        target = MemoryStore(
+            tmp_path / "target", embedding_function=HashEmbeddingFunction()
+        )
+        with pytest.raises(ValueError, match="embedder"):
+            target.import_snapshot(snapshot)
+
+    def test_unfinished_snapshot(self, store: MemoryStore, tmp_path: Path) -> None:
+        unfinished = tmp_path / "snapshot"
+        unfinished.mkdir()
+        with pytest.raises(ValueError, match="not a finished snapshot"):
+            store.import_snapshot(unfinished)
+
+    def test_refuses_non_empty_directory(
+        self, populated_store: MemoryStore, tmp_path: Path
+    ) -> None:
+        (tmp_path / "snapshot").mkdir()
+        (tmp_path / "snapshot" / "other").write_text("x")
+        with pytest.raises(ValueError, match="not empty"):
+            populated_store.export_snapshot(tmp_path / "snapshot")
+
+
+class TestCompact:
+    @pytest.fixture()
+    def fragmented(self, data_dir: Path) -> tuple[MemoryStore, list[str]]:
+        """1200 memories, enough for Chroma to persist its index, with all
+        but 200 of them forgotten. Returns the store and the kept IDs."""
+        store = MemoryStore(data_dir, embedding_function=HashEmbeddingFunction())
+        ids = [
+            r.memory.id
+            for r in store.store_many(
+                [
+                    {"content": f"note {i} on topic {i % 37}", "project": "p"}
+                    for i in range(1200)
+                ]
+            )
+        ]
+        store.forget(ids=ids[200:])
+        return store, ids[:200]
+
+    def _elements(self, data_dir: Path) -> int | None:
+        return hnsw_elements(vector_segments(data_dir)["memories_p"])
+
+    def test_rebuilds_without_reembedding(
+        self, fragmented: tuple[MemoryStore, list[str]], data_dir: Path
+    ) -> None:
+        store, kept = fragmented
+        assert self._elements(data_dir) == 1200
+        with patch.object(
+            HashEmbeddingFunction, "__call__", side_effect=AssertionError
+        ):
+            result = store.compact()
+        assert result.rebuilt == ["memories_p"]
+        assert result.skipped == []
+        assert result.bytes_after < result.bytes_before
+        assert result.reclaimed == result.bytes_before - result.bytes_after
+        assert result.vacuumed == ["chroma.sqlite3", INDEX_FILENAME]
+        # The old index is gone; the new one holds only live entries.
+        assert (self._elements(data_dir) or 0) <= 200
+
+        _, total, stats, _ = store.list_memories()
+        assert (total, stats) == (200, {"p": 200})
+        assert store.get(kept[7]) is not None
+        assert store.recall("note 7 on topic 7", n_results=1)[0].memory.id == kept[7]
+        # Other stores on the same directory notice the swap.
+        other = MemoryStore(data_dir, embedding_function=HashEmbeddingFunction())
+        assert other.get(kept[0]) is not None
+
+    def test_reads_holding_the_old_handle_retry(
+        self, fragmented: tuple[MemoryStore, list[str]]
+    ) -> None:
+        store, kept = fragmented
+        old = store._handle("memories_p")
+        store.compact()
+        with pytest.raises(NotFoundError):
+            old.count()
+        # As if a search looked its handle up just before the swap.
+        with store._catalog.lock:
+            store._catalog.handles["memories_p"] = old
+        assert store.recall("note 7 on topic 7", n_results=1)[0].memory.id == kept[7]
+        with store._catalog.lock:
+            store._catalog.handles["memories_p"] = old
+        assert store.get(kept[0]) is not None
+
+    def test_threshold(
+        self, fragmented: tuple[MemoryStore, list[str]], data_dir: Path
+    ) -> None:
+        store, _ = fragmented
+        assert store.compact(min_deleted=0.9).rebuilt == []
+        assert self._elements(data_dir) == 1200
+
+    def test_removes_segments_of_dropped_collections(
+        self, fragmented: tuple[MemoryStore, list[str]], data_dir: Path
+    ) -> None:
+        store, _ = fragmented
+        store.compact()
+        store.store("short-lived", project="q")
+        store.forget(project="q")
+        result = store.compact()
+        assert result.rebuilt == []
+        assert result.orphans == 1
+        segments = {d for d in data_dir.iterdir() if d.is_dir()}
+        assert segments == set(vector_segments(data_dir).values())
+
+    def test_invalid_arguments(self, store: MemoryStore) -> None:
+        with pytest.raises(ValueError, match="min_deleted"):
+            store.compact(min_deleted=1.5)
+        with pytest.raises(ValueError, match="batch_size"):
+            store.compact(batch_size=0)
+
+    def test_recopies_when_written_during_copy(
+        self, fragmented: tuple[MemoryStore, list[str]]
+    ) -> None:
+        store, _ = fragmented
+        copy = store._copy_collection
+        calls: list[str] = []
+
+        def copy_then_write(name: str, target: str, batch_size: int) -> None:
+            copy(name, target, batch_size)
+            if not calls:
+                store.store("written mid-copy", project="p")
+            calls.append(name)
+
+        with patch.object(store, "_copy_collection", side_effect=copy_then_write):
+            result = store.compact()
+        assert result.rebuilt == ["memories_p"]
+        assert calls == ["memories_p", "memories_p"]
+        assert store.recall("written mid-copy", n_results=1)[0].memory.content == (
+            "written mid-copy"
+        )
+        assert store.stats().total == 201
+
+    def test_skips_collection_written_by_another_process(
+        self, fragmented: tuple[MemoryStore, list[str]]
+    ) -> None:
+        store, _ = fragmented
+        marks = iter(range(100))
+        with patch.object(store, "_write_marks", side_effect=lambda: next(marks)):
+            result = store.compact()
+        assert result.rebuilt == []
+        assert result.skipped == ["memories_p"]
+        assert store.stats().total == 200
+        assert not any(
+            c.name.startswith(COMPACT_NEW_PREFIX)
+            for c in store._client.list_collections()
+        )
+
+    def test_recovers_interrupted_compaction(
+        self, fragmented: tuple[MemoryStore, list[str]], data_dir: Path
+    ) -> None:
+        store, kept = fragmented
+        # Crash after the copy was made and the original renamed away.
+        store._copy_collection("memories_p", COMPACT_NEW_PREFIX + "memories_p", 100)
+        store._client.get_collection("memories_p").modify(
+            name=COMPACT_OLD_PREFIX + "memories_p"
+        )
+        store.close()
+
+        store = MemoryStore(data_dir, embedding_function=HashEmbeddingFunction())
+        store.compact()
+        names = {c.name for c in store._client.list_collections()}
+        assert names == {"memories_p"}
+        assert store.stats().total == 200
+        assert store.get(kept[0]) is not None
+
+
+class TestWriteBehind:
+    @pytest.fixture()
+    def ef(self) -> CountingEmbeddingFunction:
+        return CountingEmbeddingFunction()
+
+    @pytest.fixture()
+    def queued_store(
+        self, data_dir: Path, ef: CountingEmbeddingFunction
+    ) -> MemoryStore:
+        # A long delay keeps the background writer out of the way, so the
+        # tests decide when the queue drains.
+        return MemoryStore(
+            data_dir, embedding_function=ef, write_behind=True, write_behind_delay=60
+        )
+
+    def test_store_returns_before_embedding(
+        self, queued_store: MemoryStore, ef: CountingEmbeddingFunction
+    ) -> None:
+        m = queued_store.store("queued fact", project="p", tags=["t"])
+        assert ef.calls == []
+        # Reads see queued memories by writing them out first.
+        assert queued_store.get(m.id) == m
+        assert ef.calls == [["queued fact"]]
+        assert queued_store.recall("queued fact")[0].memory.id == m.id
+
+    def test_list_and_stats_see_pending(self, queued_store: MemoryStore) -> None:
+        queued_store.store_many([{"content": f"fact {i}"} for i in range(3)])
+        memories, total, _, _ = queued_store.list_memories()
+        assert total == 3
+        assert len(memories) == 3
+        assert queued_store.stats().total == 3
+
+    def test_batches_embedding(
+        self, queued_store: MemoryStore, ef: CountingEmbeddingFunction
+    ) -> None:
+        for i in range(5):
+            queued_store.store(f"fact {i}", project="p")
+        assert queued_store.flush() == 5
+        assert ef.calls == [[f"fact {i}" for i in range(5)]]
+        assert queued_store.flush() == 0
+
+    def test_survives_crash(self, data_dir: Path) -> None:
+        crashed = MemoryStore(data_dir, write_behind=True, write_behind_delay=60)
+        m = crashed.store("must not be lost", project="p")
+        # No close(): the process dies with the memory only in the queue.
+
+        restarted = MemoryStore(data_dir, write_behind=True)
+        assert restarted.get(m.id) == m
+        restarted.close()
+
+    def test_replay_is_idempotent(self, queued_store: MemoryStore) -> None:
+        m = queued_store.store("written once", project="p", tags=["a"])
+        # Crash after the write but before the row is acknowledged.
+        with patch("mcp_memory.storage.IngestQueue.ack", side_effect=RuntimeError):
+            with pytest.raises(RuntimeError):
+                queued_store.flush()
+        # Restated before the replay: the replay merges it.
+        queued_store.store("written once", project="p", tags=["b"])
+        queued_store.flush()
+        memories, total, _, _ = queued_store.list_memories()
+        assert total == 1
+        assert memories[0].id == m.id
+        assert sorted(memories[0].tags) == ["a", "b"]
+
+    def test_restatements_keep_final_ids(self, queued_store: MemoryStore) -> None:
+        first = queued_store.store("same words", project="p", tags=["a"])
+        results = queued_store.store_many(
+            [
+                {"content": "same words", "project": "p", "tags": ["b"]},
+                {"content": "other words", "project": "p"},
+                {"content": "other words", "project": "p", "importance": 5},
+            ]
+        )
+        assert results[0].memory is not None
+        assert results[0].memory.id == first.id
+        assert results[0].reused == REUSED_EXACT
+        assert results[2].memory == results[1].memory
+        assert results[2].reused == REUSED_EXACT
+
+        queued_store.flush()
+        again = queued_store.store("same words", project="p", tags=["c"])
+        assert again.id == first.id
+        stored = queued_store.get(first.id)
+        assert stored is not None
+        assert sorted(stored.tags) == ["a", "b", "c"]
+        other = queued_store.get(results[1].memory.id)  # type: ignore[union-attr]
+        assert other is not None
+        assert other.importance == 5
+        assert queued_store.stats().total == 2
+
+    def test_import_writes_queue_first(
+        self, queued_store: MemoryStore, ef: CountingEmbeddingFunction, tmp_path: Path
+    ) -> None:
+        m = queued_store.store("queued fact", project="p", tags=["old"])
+        snapshot = tmp_path / "snapshot"
+        queued_store.export_snapshot(snapshot)
+        queued_store.store("queued fact", project="p", tags=["new"])
+        queued_store.store("queued again", project="p")
+
+        queued_store.import_snapshot(snapshot)
+        # The queue was written out before the snapshot's copies, not after.
+        assert ef.calls == [["queued fact"], ["queued again"]]
+        restored = queued_store.get(m.id)
+        assert restored is not None
+        assert restored.tags == ["old"]
+        assert queued_store.stats().total == 2
+
+    def test_background_writer_drains(self, data_dir: Path) -> None:
+        store = MemoryStore(data_dir, write_behind=True, write_behind_delay=0)
+        store.store("drained in the background", project="p")
+        for _ in range(100):
+            if store.stats().total:
+                break
+            time.sleep(0.05)
+        store.close()
+        assert MemoryStore(data_dir).stats().total == 1
+
+
+class TestIngestFile:
+    @pytest.fixture()
+    def design_doc(self, tmp_path: Path) -> Path:
+        sections = [
+            "Authentication uses short lived tokens signed by the gateway.",
+            "Billing runs nightly and retries failed charges three times.",
+            "Search is backed by a vector index rebuilt every hour.",
+        ]
+        path = tmp_path / "design.md"
+        path.write_text("\n\n".join(s * 4 for s in sections))
+        return path
+
+    def test_chunks_share_parent_and_source(
+        self, store: MemoryStore, design_doc: Path
+    ) -> None:
+        result = store.ingest_file(
+            design_doc, project="docs", chunk_size=300, chunk_overlap=50
+        )
+        assert result.chunks > 1
+        assert result.source == str(design_doc.resolve())
+
+        memories, _, _, _ = store.list_memories(project="docs", page_size=100)
+        assert len(memories) == result.chunks
+        assert {m.parent_id for m in memories} == {result.parent_id}
+        assert {m.source for m in memories} == {result.source}
+        assert sorted(m.chunk for m in memories) == list(range(result.chunks))
+
+    def test_embeds_in_batches(self, data_dir: Path, design_doc: Path) -> None:
+        ef = CountingEmbeddingFunction()
+        store = MemoryStore(data_dir, embedding_function=ef)
+        result = store.ingest_file(
+            design_doc, project="docs", chunk_size=200, chunk_overlap=0, batch_size=2
+        )
+        assert [len(c) for c in ef.calls[:-1]] == [2] * (len(ef.calls) - 1)
+        assert sum(len(c) for c in ef.calls) == result.chunks
+
+    def test_collapse_keeps_best_chunk(
+        self, store: MemoryStore, design_doc: Path
+    ) -> None:
+        store.ingest_file(design_doc, project="docs", chunk_size=200, chunk_overlap=50)
+        store.store("Tokens expire after fifteen minutes", project="docs")
+
+        plain = store.recall("authentication tokens", project="docs")
+        parents = [r.memory.parent_id for r in plain if r.memory.parent_id]
+        assert len(parents) > len(set(parents))
+
+        collapsed = store.recall("authentication tokens", project="docs", collapse=True)
+        assert len(collapsed) == 2
+        assert collapsed[0].memory.id == plain[0].memory.id
+        (many,) = store.recall_many(
+            ["authentication tokens"], project="docs", collapse=True
+        )
+        assert [r.memory.id for r in many] == [r.memory.id for r in collapsed]
+
+    def test_empty_file(self, store: MemoryStore, tmp_path: Path) -> None:
+        path = tmp_path / "empty.txt"
+        path.write_text("\n\n")
+        assert store.ingest_file(path, project="docs").chunks == 0
+        assert store.stats().total == 0
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import asyncio
+import threading
+import time
 from pathlib import Path
+from typing import Any
 from unittest.mock import patch
 
 import pytest
 
 import mcp_memory.server as server_module
 from mcp_memory.config import Config
+from mcp_memory.metrics import PROMETHEUS_FILENAME, Metrics
 from mcp_memory.storage import MemoryStore
 
 
@@ -26,81 +31,353 @@ def _patch_server(tmp_path: Path) -> None:
 
 
 class TestRememberTool:
-    def test_remember_basic(self) -> None:
-        result = server_module.remember("test memory content")
+    async def test_remember_basic(self) -> None:
+        result = await server_module.remember("test memory content")
         assert "Stored memory" in result
         assert "project 'global'" in result
 
-    def test_remember_with_project(self) -> None:
-        result = server_module.remember("test", project="myproject")
+    async def test_remember_with_project(self) -> None:
+        result = await server_module.remember("test", project="myproject")
         assert "project 'myproject'" in result
 
-    def test_remember_with_tags(self) -> None:
-        result = server_module.remember("test", tags=["a", "b"])
+    async def test_remember_with_tags(self) -> None:
+        result = await server_module.remember("test", tags=["a", "b"])
         assert "tags [a, b]" in result
 
-    def test_remember_empty_content(self) -> None:
-        result = server_module.remember("   ")
+    async def test_remember_empty_content(self) -> None:
+        result = await server_module.remember("   ")
         assert "Error" in result
 
-    def test_remember_invalid_importance(self) -> None:
-        result = server_module.remember("test", importance=0)
+    async def test_remember_duplicate(self) -> None:
+        first = await server_module.remember("use uv for installs")
+        memory_id = first.split()[2]
+        result = await server_module.remember("Use uv for installs", tags=["tools"])
+        assert f"Reused existing memory {memory_id}" in result
+        assert "same content already stored" in result
+        assert "tags [tools]" in result
+
+    async def test_remember_invalid_importance(self) -> None:
+        result = await server_module.remember("test", importance=0)
         assert "Error" in result
-        result = server_module.remember("test", importance=6)
+        result = await server_module.remember("test", importance=6)
+        assert "Error" in result
+
+
+class TestRememberManyTool:
+    async def test_remember_many_basic(self) -> None:
+        result = await server_module.remember_many(
+            [
+                {"content": "first batch item"},
+                {"content": "second batch item", "project": "other"},
+            ]
+        )
+        assert "Stored 2 of 2 memories" in result
+        assert "project 'global'" in result
+        assert "project 'other'" in result
+
+    async def test_remember_many_default_project(self) -> None:
+        result = await server_module.remember_many([{"content": "x"}], project="bulk")
+        assert "project 'bulk'" in result
+
+    async def test_remember_many_reports_item_errors(self) -> None:
+        result = await server_module.remember_many(
+            [
+                {"content": "valid"},
+                {"content": "  "},
+                {"content": "bad importance", "importance": 9},
+            ]
+        )
+        assert "Stored 1 of 3 memories" in result
+        assert "[1] Error: content cannot be empty." in result
+        assert "[2] Error: importance must be 1-5, got 9." in result
+
+    async def test_remember_many_empty(self) -> None:
+        result = await server_module.remember_many([])
         assert "Error" in result
 
 
 class TestRecallTool:
-    def test_recall_found(self) -> None:
-        server_module.remember("Python is a great programming language")
-        result = server_module.recall("programming language")
+    async def test_recall_found(self) -> None:
+        await server_module.remember("Python is a great programming language")
+        result = await server_module.recall("programming language")
         assert "Found" in result
         assert "Python" in result
 
-    def test_recall_not_found(self) -> None:
-        result = server_module.recall("something that does not exist")
+    async def test_recall_rerank(self) -> None:
+        await server_module.remember("Python is great for scripting", importance=5)
+        plain = await server_module.recall("python")
+        assert "Relevance:" in plain
+        assert "Score:" not in plain
+        reranked = await server_module.recall("python", rerank=True)
+        assert "Score: " in reranked
+
+    async def test_recall_not_found(self) -> None:
+        result = await server_module.recall("something that does not exist")
         assert "No memories found" in result
 
-    def test_recall_empty_query(self) -> None:
-        result = server_module.recall("   ")
+    async def test_recall_empty_query(self) -> None:
+        result = await server_module.recall("   ")
+        assert "Error" in result
+
+
+class TestRecallManyTool:
+    async def test_recall_many(self) -> None:
+        await server_module.remember("Python is great for scripting")
+        await server_module.remember("Rust is fast and safe")
+        result = await server_module.recall_many(["python", "rust"], n_results=1)
+        assert "=== 'python': 1 matching memories ===" in result
+        assert "=== 'rust': 1 matching memories ===" in result
+        assert result.index("Python is great") < result.index("Rust is fast")
+
+    async def test_recall_many_dedup(self) -> None:
+        await server_module.remember("Python is great for scripting")
+        result = await server_module.recall_many(
+            ["python scripting", "python"], dedup=True
+        )
+        assert result.count("Python is great for scripting") == 1
+
+    async def test_recall_exhaustive(self) -> None:
+        await server_module.remember("Python is great for scripting", project="dev")
+        result = await server_module.recall("python", exhaustive=True)
+        assert "Python is great for scripting" in result
+        result = await server_module.recall_many(["python"], exhaustive=True)
+        assert "Python is great for scripting" in result
+
+    async def test_recall_many_empty(self) -> None:
+        assert "Error" in await server_module.recall_many([])
+        assert "Error" in await server_module.recall_many(["ok", "  "])
+
+
+class TestIngestFileTool:
+    async def test_ingest_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "notes.txt"
+        path.write_text("Deploys go out on Tuesdays. " * 20)
+        result = await server_module.ingest_file(
+            str(path), project="docs", chunk_size=200, chunk_overlap=20
+        )
+        assert f"Stored {path.resolve()} as" in result
+        assert "in project 'docs'" in result
+
+        recalled = await server_module.recall("deploys", project="docs")
+        assert "Chunk: 0 of " in recalled
+        collapsed = await server_module.recall("deploys", project="docs", collapse=True)
+        assert "1 matching memories" in collapsed
+
+    async def test_ingest_file_errors(self, tmp_path: Path) -> None:
+        assert "not a file" in await server_module.ingest_file(str(tmp_path))
+        assert "not a file" in await server_module.ingest_file(
+            str(tmp_path / "missing.txt")
+        )
+        path = tmp_path / "notes.txt"
+        path.write_text("text")
+        assert "Error" in await server_module.ingest_file(
+            str(path), chunk_size=10, chunk_overlap=10
+        )
+        empty = tmp_path / "empty.txt"
+        empty.write_text("")
+        assert "Nothing to store" in await server_module.ingest_file(str(empty))
+
+
+class TestGetMemoryTool:
+    async def test_get_memory(self) -> None:
+        stored = await server_module.remember("fetch by id", tags=["x"])
+        memory_id = stored.split()[2]
+        result = await server_module.get_memory(memory_id)
+        assert f"- {memory_id}" in result
+        assert "Content: fetch by id" in result
+        assert "Tags: x" in result
+
+    async def test_get_memory_missing(self) -> None:
+        result = await server_module.get_memory("fake-id")
+        assert "No memory found" in result
+
+    async def test_get_memory_empty(self) -> None:
+        result = await server_module.get_memory("  ")
         assert "Error" in result
 
 
 class TestForgetTool:
-    def test_forget_no_criteria(self) -> None:
-        result = server_module.forget()
+    async def test_forget_no_criteria(self) -> None:
+        result = await server_module.forget()
         assert "Error" in result
 
-    def test_forget_by_project(self) -> None:
-        server_module.remember("to delete", project="temp")
-        result = server_module.forget(project="temp")
+    async def test_forget_by_project(self) -> None:
+        await server_module.remember("to delete", project="temp")
+        result = await server_module.forget(project="temp")
         assert "Deleted" in result
 
-    def test_forget_nonexistent(self) -> None:
-        result = server_module.forget(memory_ids=["fake-id"])
+    async def test_forget_nonexistent(self) -> None:
+        result = await server_module.forget(memory_ids=["fake-id"])
         assert "No memories matched" in result
 
 
+class TestCompactTool:
+    async def test_compact(self) -> None:
+        await server_module.remember("to delete", project="temp")
+        await server_module.forget(project="temp")
+        result = await server_module.compact()
+        assert "reclaimed" in result
+        assert "No collection needed rebuilding." in result
+
+    async def test_compact_invalid(self) -> None:
+        result = await server_module.compact(min_deleted=-0.1)
+        assert result.startswith("Error")
+
+
 class TestListMemoriesTool:
-    def test_list_empty(self) -> None:
-        result = server_module.list_memories()
+    async def test_list_empty(self) -> None:
+        result = await server_module.list_memories()
         assert "No memories stored" in result
 
-    def test_list_with_memories(self) -> None:
-        server_module.remember("first memory")
-        server_module.remember("second memory")
-        result = server_module.list_memories()
+    async def test_list_with_memories(self) -> None:
+        await server_module.remember("first memory")
+        await server_module.remember("second memory")
+        result = await server_module.list_memories()
         assert "Showing 1-2 of 2" in result
 
-    def test_list_invalid_page(self) -> None:
-        result = server_module.list_memories(page=0)
+    async def test_list_with_cursor(self) -> None:
+        for i in range(3):
+            await server_module.remember(f"memory {i}")
+        first = await server_module.list_memories(page_size=2)
+        assert "Next cursor: " in first
+        cursor = first.rsplit("Next cursor: ", 1)[1].strip()
+
+        second = await server_module.list_memories(page_size=2, cursor=cursor)
+        assert "Showing 1 of 3 memories (from cursor)" in second
+        assert "Next cursor" not in second
+
+    async def test_list_invalid_cursor(self) -> None:
+        await server_module.remember("memory")
+        result = await server_module.list_memories(cursor="garbage")
+        assert "Error: invalid cursor" in result
+
+    async def test_list_invalid_page(self) -> None:
+        result = await server_module.list_memories(page=0)
         assert "Error" in result
 
 
+class TestConcurrency:
+    async def test_tools_do_not_block_event_loop(self) -> None:
+        def slow_recall(**kwargs: Any) -> list[Any]:
+            time.sleep(0.3)
+            return []
+
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            for _ in range(5):
+                await asyncio.sleep(0.02)
+                ticks += 1
+
+        with patch.object(server_module.store, "recall", slow_recall):
+            result, _ = await asyncio.gather(server_module.recall("anything"), ticker())
+        assert "No memories found" in result
+        assert ticks == 5
+
+    async def test_concurrent_tool_calls(self) -> None:
+        await asyncio.gather(
+            *(server_module.remember(f"memory {i}", project="p") for i in range(4))
+        )
+        result = await server_module.list_memories(project="p")
+        assert "Showing 1-4 of 4" in result
+
+
+class TestMemoryStatsTool:
+    async def test_stats_empty(self) -> None:
+        result = await server_module.memory_stats()
+        assert "No memories stored" in result
+
+    async def test_stats(self) -> None:
+        await server_module.remember("a", project="one", tags=["x"], importance=5)
+        await server_module.remember("b", project="two", tags=["x", "y"])
+        result = await server_module.memory_stats()
+        assert "2 memories in 2 projects" in result
+        assert "Projects: one: 1, two: 1" in result
+        assert "Tags: x: 2, y: 1" in result
+        assert "3/5: 1" in result
+        assert "5/5: 1" in result
+        assert "Oldest: " in result
+
+    async def test_stats_project(self) -> None:
+        await server_module.remember("a", project="one")
+        await server_module.remember("b", project="two")
+        result = await server_module.memory_stats(project="one")
+        assert "1 memories in 1 projects" in result
+
+
+class TestServerMetricsTool:
+    async def test_server_metrics(self, tmp_path: Path) -> None:
+        metrics = Metrics()
+        store = MemoryStore(tmp_path, metrics=metrics)
+        with (
+            patch.object(server_module, "metrics", metrics),
+            patch.object(server_module, "store", store),
+        ):
+            assert "No operations recorded" in await server_module.server_metrics()
+            await server_module.remember("metrics are useful")
+            await server_module.recall("metrics")
+            result = await server_module.server_metrics()
+        assert "Latency by stage (ms):" in result
+        for name in ("recall.embed", "recall.search", "recall.format", "store_many"):
+            assert f"  {name} " in result
+        assert "Query embedding cache: 0 hits, 1 misses" in result
+        assert "Recall result cache: 0 hits, 1 misses" in result
+
+    async def test_server_metrics_disabled(self) -> None:
+        with patch.object(server_module, "metrics", Metrics(enabled=False)):
+            result = await server_module.server_metrics()
+        assert "Metrics are disabled" in result
+
+
+class TestStartup:
+    async def test_lifespan_starts_background_warm_up(self) -> None:
+        warmed = threading.Event()
+        with patch.object(server_module.store, "warm_up", warmed.set):
+            async with server_module._lifespan(server_module.mcp):
+                assert warmed.wait(timeout=5)
+
+    async def test_lifespan_warm_up_disabled(self, tmp_path: Path) -> None:
+        cfg = Config(
+            data_dir=tmp_path, default_project="global", max_results=10, warmup=False
+        )
+        with (
+            patch.object(server_module, "config", cfg),
+            patch.object(server_module.store, "warm_up") as warm_up,
+        ):
+            async with server_module._lifespan(server_module.mcp):
+                pass
+        warm_up.assert_not_called()
+
+    async def test_lifespan_exports_metrics(self, tmp_path: Path) -> None:
+        cfg = Config(
+            data_dir=tmp_path,
+            default_project="global",
+            max_results=10,
+            warmup=False,
+            metrics_export="prometheus",
+        )
+        with patch.object(server_module, "config", cfg):
+            async with server_module._lifespan(server_module.mcp):
+                pass
+        assert (tmp_path / PROMETHEUS_FILENAME).exists()
+
+    async def test_first_recall_is_logged(
+        self, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        server_module._firsts.clear()
+        with caplog.at_level("INFO", logger="mcp_memory.server"):
+            await server_module.recall("anything")
+            await server_module.recall("anything")
+        messages = [r.getMessage() for r in caplog.records]
+        assert sum("time to first response" in m for m in messages) == 1
+        assert sum("time to first recall" in m for m in messages) == 1
+
+
 class TestFullFlow:
-    def test_remember_recall_forget(self) -> None:
+    async def test_remember_recall_forget(self) -> None:
         # Store
-        remember_result = server_module.remember(
+        remember_result = await server_module.remember(
             "Architecture decision: use microservices",
             project="backend",
             tags=["architecture"],
@@ -109,19 +386,19 @@ class TestFullFlow:
         assert "Stored memory" in remember_result
 
         # Recall
-        recall_result = server_module.recall(
+        recall_result = await server_module.recall(
             "architecture decisions", project="backend"
         )
         assert "microservices" in recall_result
 
         # List
-        list_result = server_module.list_memories(project="backend")
+        list_result = await server_module.list_memories(project="backend")
         assert "Showing 1-1 of 1" in list_result
 
         # Forget
-        forget_result = server_module.forget(project="backend")
+        forget_result = await server_module.forget(project="backend")
         assert "Deleted 1" in forget_result
 
         # Verify deleted
-        recall_after = server_module.recall("architecture", project="backend")
+        recall_after = await server_module.recall("architecture", project="backend")
         assert "No memories found" in recall_after